@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Сквозной бенчмарк Playlist.get_from, Video.get_from и get_transcripts
+# на локальном сервере вместо youtube.com (см. benchmarks/stub_server.py).
+# Запуск из корня репозитория:
+#     python -m benchmarks.end_to_end
+#     python -m benchmarks.end_to_end --save baseline.json
+#     python -m benchmarks.end_to_end --compare baseline.json
+#
+# Время прогона делится на этапы: fetch - запросы, parse - разбор ответов
+# и видео, aggregate - все остальное (итоги, списки). Пиковая память, а также
+# память и количество блоков, что остались после прогона, - по tracemalloc.
+#
+# С --compare код возврата 1, если CPU, пиковая память или количество блоков
+# выросли больше чем на --threshold, или поменялось количество запросов
+# и загруженных байт.
+
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from dataclasses import dataclass, asdict
+from typing import Any, Callable
+
+import requests
+
+from benchmarks.fixtures import MIX_PAGE_SIZE, MIX_PAGE_STEP
+from benchmarks.stub_server import StubServer
+from third_party.metrics import registry as metrics
+from third_party.youtube_com import common
+from third_party.youtube_com.common import (
+    METRIC_STAGE_SECONDS,
+    MIX_MAX_PAGES,
+    Playlist,
+    Video,
+)
+
+
+# NOTE: Этапы METRIC_STAGE_SECONDS, которые не вложены друг в друга
+STAGES_FETCH = ["http", "rate_limit_wait"]
+STAGES_PARSE = [
+    "json_decode",
+    "extract_page_data",
+    "find_renderers",
+    "parse_videos",
+    "playlist_metadata",
+]
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable[[], Any]
+    check: Callable[[Any], bool]
+    setup: Callable[[], None] = lambda: None
+
+
+@dataclass
+class Result:
+    name: str
+    wall_ms: float
+    cpu_ms: float
+    fetch_ms: float
+    parse_ms: float
+    aggregate_ms: float
+    requests: int
+    bytes_parsed: int
+    peak_kb: float
+    retained_kb: float
+    retained_blocks: int
+
+
+class Traffic:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+
+    def on_response(self, rs: requests.Response, *args, **kwargs):
+        self.requests += 1
+        self.bytes += len(rs.content)
+
+
+def use_html():
+    # Без настроек клиента первая порция загружается из HTML страницы
+    common.innertube_cfg_data.clear()
+
+
+def get_scenarios() -> list[Scenario]:
+    video_holder: dict[str, Video] = dict()
+
+    def load_video():
+        video_holder["video"] = Video.get_from("benchVideo01")
+
+    return [
+        Scenario(
+            "mix 50",
+            lambda: Playlist.get_from("RDbench50"),
+            lambda p: len(p.video_list) == 50,
+        ),
+        Scenario(
+            "mix 1000, max pages",
+            lambda: Playlist.get_from("RDbench1000"),
+            # Видео без повторов, и только из MIX_MAX_PAGES порций
+            lambda p: len({v.id for v in p.video_list}) == len(p.video_list)
+            == MIX_PAGE_SIZE + MIX_PAGE_STEP * (MIX_MAX_PAGES - 1),
+        ),
+        Scenario(
+            "playlist 100, html",
+            lambda: Playlist.get_from("PLbench100"),
+            lambda p: len(p.video_list) == 100,
+            setup=use_html,
+        ),
+        Scenario(
+            "playlist 1000, html",
+            lambda: Playlist.get_from("PLbench1000"),
+            lambda p: len(p.video_list) == 1000,
+            setup=use_html,
+        ),
+        Scenario(
+            "playlist 1000, browse",
+            lambda: Playlist.get_from("PLbench1000"),
+            lambda p: len(p.video_list) == 1000,
+        ),
+        Scenario(
+            "playlist 5000, browse",
+            lambda: Playlist.get_from("PLbench5000"),
+            lambda p: len(p.video_list) == 5000,
+        ),
+        Scenario(
+            "playlist 5000, summary",
+            lambda: Playlist.get_from("PLbench5000", summary=True),
+            lambda p: len(p.video_list) == 5000,
+        ),
+        Scenario(
+            "playlist 5000, stop 150",
+            lambda: Playlist.get_from("PLbench5000", stop_after_seq=150),
+            lambda p: len(p.video_list) == 200 and not p.is_complete,
+        ),
+        Scenario(
+            "video",
+            lambda: Video.get_from("benchVideo01"),
+            lambda v: v.duration_seconds == 3725,
+        ),
+        Scenario(
+            "video transcripts",
+            lambda: video_holder["video"].get_transcripts(),
+            lambda items: len(items) == 500,
+            setup=load_video,
+        ),
+    ]
+
+
+def get_stage_seconds(stages: list[str]) -> float:
+    sums = metrics.get_sums(METRIC_STAGE_SECONDS, "stage")
+    return sum(sums.get(stage, 0.0) for stage in stages)
+
+
+def measure(scenario: Scenario, traffic: Traffic, repeat: int) -> Result:
+    # Первый прогон - прогрев и проверка результата
+    scenario.setup()
+    assert scenario.check(scenario.run()), scenario.name
+
+    best_wall = best_cpu = float("inf")
+    fetch = parse = 0.0
+    requests_count = bytes_parsed = 0
+    for _ in range(repeat):
+        scenario.setup()
+        gc.collect()
+
+        traffic.requests = traffic.bytes = 0
+        fetch_start = get_stage_seconds(STAGES_FETCH)
+        parse_start = get_stage_seconds(STAGES_PARSE)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        scenario.run()
+
+        wall = time.perf_counter() - wall
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+        requests_count, bytes_parsed = traffic.requests, traffic.bytes
+
+        # Этапы - из самого быстрого прогона
+        if wall < best_wall:
+            best_wall = wall
+            fetch = get_stage_seconds(STAGES_FETCH) - fetch_start
+            parse = get_stage_seconds(STAGES_PARSE) - parse_start
+
+    # Память отдельным прогоном, т.к. tracemalloc сильно замедляет код
+    scenario.setup()
+    gc.collect()
+    tracemalloc.start()
+    result = scenario.run()
+    retained, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+
+    return Result(
+        name=scenario.name,
+        wall_ms=best_wall * 1000,
+        cpu_ms=best_cpu * 1000,
+        fetch_ms=fetch * 1000,
+        parse_ms=parse * 1000,
+        aggregate_ms=max(best_wall - fetch - parse, 0) * 1000,
+        requests=requests_count,
+        bytes_parsed=bytes_parsed,
+        peak_kb=peak / 1024,
+        retained_kb=retained / 1024,
+        retained_blocks=sum(stat.count for stat in snapshot.statistics("filename")),
+    )
+
+
+def print_results(results: list[Result], baseline: dict[str, dict] | None = None):
+    print(
+        f"{'Stage':<26} {'wall, ms':>9} {'cpu, ms':>9} {'fetch, ms':>10} "
+        f"{'parse, ms':>10} {'aggr, ms':>9} {'requests':>9} {'parsed, KB':>11} "
+        f"{'peak, KB':>10} {'retained, KB':>13} {'blocks':>8}"
+    )
+    for r in results:
+        line = (
+            f"{r.name:<26} {r.wall_ms:>9.1f} {r.cpu_ms:>9.1f} {r.fetch_ms:>10.1f} "
+            f"{r.parse_ms:>10.1f} {r.aggregate_ms:>9.1f} {r.requests:>9} "
+            f"{r.bytes_parsed / 1024:>11.0f} {r.peak_kb:>10.0f} {r.retained_kb:>13.0f} "
+            f"{r.retained_blocks:>8}"
+        )
+        if baseline and r.name in baseline:
+            base = baseline[r.name]
+            line += (
+                f"   cpu {r.cpu_ms / base['cpu_ms'] - 1:+.0%}"
+                f", peak {r.peak_kb / base['peak_kb'] - 1:+.0%}"
+            )
+        print(line)
+
+
+def get_regressions(
+    results: list[Result],
+    baseline: dict[str, dict],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(r.name)
+        if not base:
+            continue
+
+        for key in ["cpu_ms", "peak_kb", "retained_blocks"]:
+            # NOTE: В старых сохраненных результатах блоков нет
+            if key in base and getattr(r, key) > base[key] * (1 + threshold):
+                regressions.append(f"{r.name}: {key} {base[key]:.1f} -> {getattr(r, key):.1f}")
+
+        # Лишние запросы или загрузки - признак сломанной пагинации
+        for key in ["requests", "bytes_parsed"]:
+            if getattr(r, key) != base[key]:
+                regressions.append(f"{r.name}: {key} {base[key]} -> {getattr(r, key)}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Save results as JSON baseline")
+    parser.add_argument("--compare", help="Compare with JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    traffic = Traffic()
+    common.transport.hooks.append(traffic.on_response)
+
+    # NOTE: Замеряется разбор, а не пауза между запросами
+    common.rate_limiter.max_rate = 1_000_000
+    common.rate_limiter.burst = 1_000_000
+    common.rate_limiter.set_rate(1_000_000)
+
+    with StubServer() as server:
+        common.BASE_URL = server.base_url
+        results = [
+            measure(scenario, traffic, args.repeat) for scenario in get_scenarios()
+        ]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({r.name: asdict(r) for r in results}, f, indent=4)
+
+    if baseline:
+        regressions = get_regressions(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for text in regressions:
+                print(f"    {text}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
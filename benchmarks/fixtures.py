@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# NOTE: Синтетические данные в формате ytInitialData страницы плейлиста.
+#       Структура повторяет ответы ютуба, а содержимое генерируется
+
+
+import json
+import random
+
+
+PAGE_SIZE = 100
+
+# NOTE: Порции миксов пересекаются, как у ютуба: последние
+#       MIX_PAGE_SIZE - MIX_PAGE_STEP видео порции приходят и в следующей
+MIX_PAGE_SIZE = 25
+MIX_PAGE_STEP = 20
+
+
+def get_video_id(n: int) -> str:
+    return f"vid{n:08d}"
+
+
+def get_runs(text: str) -> dict:
+    return {
+        "runs": [{"text": text}],
+        "accessibility": {"accessibilityData": {"label": text}},
+    }
+
+
+def get_thumbnails(video_id: str) -> dict:
+    return {
+        "thumbnails": [
+            {
+                "url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg?sqp=-oaymwE&rs=AOn4CL",
+                "width": width,
+                "height": height,
+            }
+            for width, height in [(168, 94), (196, 110), (246, 138), (336, 188)]
+        ]
+    }
+
+
+def get_playlist_video_renderer(n: int, playlist_id: str) -> dict:
+    video_id = get_video_id(n)
+    seconds = random.Random(n).randint(30, 3 * 60 * 60)
+    hh, mm = divmod(seconds, 3600)
+    mm, ss = divmod(mm, 60)
+    length_text = f"{hh}:{mm:02d}:{ss:02d}" if hh else f"{mm}:{ss:02d}"
+
+    return {
+        "playlistVideoRenderer": {
+            "videoId": video_id,
+            "thumbnail": get_thumbnails(video_id),
+            "title": get_runs(f"Video #{n + 1}"),
+            "index": {"simpleText": str(n + 1)},
+            "shortBylineText": {
+                "runs": [
+                    {
+                        "text": "Channel",
+                        "navigationEndpoint": {
+                            "clickTrackingParams": "CAAQ",
+                            "commandMetadata": {
+                                "webCommandMetadata": {
+                                    "url": "/@channel",
+                                    "webPageType": "WEB_PAGE_TYPE_CHANNEL",
+                                    "rootVe": 3611,
+                                    "apiUrl": "/youtubei/v1/browse",
+                                }
+                            },
+                            "browseEndpoint": {
+                                "browseId": "UC0000000000000000000000",
+                                "canonicalBaseUrl": "/@channel",
+                            },
+                        },
+                    }
+                ]
+            },
+            "lengthText": {
+                "accessibility": {"accessibilityData": {"label": length_text}},
+                "simpleText": length_text,
+            },
+            "navigationEndpoint": {
+                "clickTrackingParams": "CAAQ",
+                "commandMetadata": {
+                    "webCommandMetadata": {
+                        "url": f"/watch?v={video_id}&list={playlist_id}&index={n + 1}",
+                        "webPageType": "WEB_PAGE_TYPE_WATCH",
+                        "rootVe": 3832,
+                    }
+                },
+                "watchEndpoint": {
+                    "videoId": video_id,
+                    "playlistId": playlist_id,
+                    "index": n,
+                    "params": "OAE%3D",
+                },
+            },
+            "lengthSeconds": str(seconds),
+            "trackingParams": "CAAQ",
+            "isPlayable": True,
+            "menu": {
+                "menuRenderer": {
+                    "items": [
+                        {
+                            "menuServiceItemRenderer": {
+                                "text": get_runs("Add to queue"),
+                                "icon": {"iconType": "ADD_TO_QUEUE_TAIL"},
+                                "serviceEndpoint": {
+                                    "signalServiceEndpoint": {
+                                        "signal": "CLIENT_SIGNAL",
+                                        "actions": [
+                                            {
+                                                "addToPlaylistCommand": {
+                                                    "videoId": video_id,
+                                                    "listType": "PLAYLIST_EDIT_LIST_TYPE_QUEUE",
+                                                }
+                                            }
+                                        ],
+                                    }
+                                },
+                            }
+                        },
+                    ],
+                    "accessibility": {"accessibilityData": {"label": "Action menu"}},
+                }
+            },
+            "thumbnailOverlays": [
+                {
+                    "thumbnailOverlayTimeStatusRenderer": {
+                        "text": {"simpleText": length_text},
+                        "style": "DEFAULT",
+                    }
+                },
+                {"thumbnailOverlayNowPlayingRenderer": {"text": get_runs("Now playing")}},
+            ],
+            "videoInfo": {"runs": [{"text": "1K views"}, {"text": " • "}, {"text": "1 year ago"}]},
+        }
+    }
+
+
+def get_continuation_item_renderer(token: str, is_mix: bool = False) -> dict:
+    return {
+        "continuationItemRenderer": {
+            "trigger": "CONTINUATION_TRIGGER_ON_ITEM_SHOWN",
+            "continuationEndpoint": {
+                "clickTrackingParams": "CAAQ",
+                "commandMetadata": {
+                    "webCommandMetadata": {
+                        "sendPost": True,
+                        "apiUrl": "/youtubei/v1/next" if is_mix else "/youtubei/v1/browse",
+                    }
+                },
+                "continuationCommand": {
+                    "token": token,
+                    "request": (
+                        "CONTINUATION_REQUEST_TYPE_WATCH_NEXT"
+                        if is_mix
+                        else "CONTINUATION_REQUEST_TYPE_BROWSE"
+                    ),
+                },
+            },
+        }
+    }
+
+
+def get_video_items(
+    playlist_id: str,
+    video_count: int,
+    start: int = 0,
+    page_size: int | None = PAGE_SIZE,
+) -> list[dict]:
+    end = video_count if page_size is None else min(start + page_size, video_count)
+    items = [get_playlist_video_renderer(n, playlist_id) for n in range(start, end)]
+    if end < video_count:
+        items.append(get_continuation_item_renderer(f"{playlist_id}:{end}"))
+
+    return items
+
+
+def get_yt_initial_data(
+    playlist_id: str,
+    video_count: int,
+    page_size: int | None = PAGE_SIZE,
+) -> dict:
+    """
+    ytInitialData страницы плейлиста. При page_size=None все видео
+    будут в одной порции (удобно для микробенчмарков).
+    """
+
+    return {
+        "responseContext": {
+            "serviceTrackingParams": [
+                {"service": "GFEEDBACK", "params": [{"key": "route", "value": "channel."}]},
+                {"service": "CSI", "params": [{"key": "c", "value": "WEB"}]},
+            ],
+        },
+        "contents": {
+            "twoColumnBrowseResultsRenderer": {
+                "tabs": [
+                    {
+                        "tabRenderer": {
+                            "selected": True,
+                            "content": {
+                                "sectionListRenderer": {
+                                    "contents": [
+                                        {
+                                            "itemSectionRenderer": {
+                                                "contents": [
+                                                    {
+                                                        "playlistVideoListRenderer": {
+                                                            "contents": get_video_items(
+                                                                playlist_id,
+                                                                video_count,
+                                                                page_size=page_size,
+                                                            ),
+                                                            "playlistId": playlist_id,
+                                                            "isEditable": False,
+                                                            "canReorder": False,
+                                                        }
+                                                    }
+                                                ]
+                                            }
+                                        }
+                                    ],
+                                }
+                            },
+                        }
+                    }
+                ]
+            }
+        },
+        "header": {
+            "playlistHeaderRenderer": {
+                "playlistId": playlist_id,
+                "title": {"simpleText": f"Playlist {playlist_id}"},
+                "numVideosText": {"runs": [{"text": f"{video_count:,}"}, {"text": " videos"}]},
+            }
+        },
+        "metadata": {
+            "playlistMetadataRenderer": {
+                "title": f"Playlist {playlist_id}",
+                "androidAppindexingLink": f"android-app://com.google.android.youtube/http/www.youtube.com/playlist?list={playlist_id}",
+            }
+        },
+        "sidebar": {
+            "playlistSidebarRenderer": {
+                "items": [
+                    {
+                        "playlistSidebarPrimaryInfoRenderer": {
+                            "stats": [
+                                {"runs": [{"text": f"{video_count:,}"}, {"text": " videos"}]},
+                                {"simpleText": "1,000 views"},
+                            ],
+                        }
+                    }
+                ]
+            }
+        },
+    }
+
+
+def get_continuation_data(playlist_id: str, video_count: int, start: int) -> dict:
+    """Ответ /youtubei/v1/browse на continuation с токеном "<playlist_id>:<start>"""
+
+    return {
+        "responseContext": {"visitorData": "Cgs"},
+        "onResponseReceivedActions": [
+            {
+                "appendContinuationItemsAction": {
+                    "continuationItems": get_video_items(playlist_id, video_count, start),
+                    "targetId": "pl-video-list",
+                }
+            }
+        ],
+    }
+
+
+YT_CFG_DATA = {
+    "INNERTUBE_API_KEY": "AIzaSyBenchmark",
+    "INNERTUBE_CONTEXT": {
+        "client": {
+            "hl": "en",
+            "gl": "US",
+            "clientName": "WEB",
+            "clientVersion": "2.20240101.00.00",
+        },
+    },
+}
+
+
+def get_html(
+    yt_initial_data: dict,
+    yt_initial_player_response: dict | None = None,
+) -> str:
+    """Страница со встроенными ytcfg, ytInitialData и ytInitialPlayerResponse"""
+
+    # NOTE: Настоящие страницы в основном состоят из скриптов и стилей
+    filler = "<script>var _f = function () { return 0; };</script>\n" * 2_000
+
+    scripts = [
+        f"<script>ytcfg.set({json.dumps(YT_CFG_DATA)});</script>",
+        f"<script>var ytInitialData = {json.dumps(yt_initial_data)};</script>",
+    ]
+    if yt_initial_player_response:
+        scripts.append(
+            f"<script>var ytInitialPlayerResponse = "
+            f"{json.dumps(yt_initial_player_response)};</script>"
+        )
+
+    return (
+        "<!DOCTYPE html><html><head><title>YouTube</title>"
+        + filler
+        + "".join(scripts)
+        + "</head><body></body></html>"
+    )
+
+
+def get_playlist_panel_video_renderer(n: int, playlist_id: str) -> dict:
+    item = get_playlist_video_renderer(n, playlist_id)["playlistVideoRenderer"]
+    return {
+        "playlistPanelVideoRenderer": {
+            "title": {"simpleText": item["title"]["runs"][0]["text"]},
+            "lengthText": item["lengthText"],
+            "indexText": {"simpleText": str(n + 1)},
+            "thumbnail": item["thumbnail"],
+            "navigationEndpoint": item["navigationEndpoint"],
+            "videoId": item["videoId"],
+            "shortBylineText": item["shortBylineText"],
+        }
+    }
+
+
+def get_mix_video_items(playlist_id: str, video_count: int, start: int = 0) -> list[dict]:
+    """
+    Порция микса: MIX_PAGE_SIZE видео с номера start по кругу. Следующая
+    порция начнется через MIX_PAGE_STEP, поэтому часть видео повторится,
+    а после video_count видео новых уже не будет. Как и настоящий микс,
+    он бесконечный: continuation есть в каждой порции.
+    """
+
+    items = [
+        get_playlist_panel_video_renderer(n % video_count, playlist_id)
+        for n in range(start, start + MIX_PAGE_SIZE)
+    ]
+    items.append(
+        get_continuation_item_renderer(f"{playlist_id}:{start + MIX_PAGE_STEP}", is_mix=True)
+    )
+    return items
+
+
+def get_mix_yt_initial_data(playlist_id: str, video_count: int) -> dict:
+    """ytInitialData страницы микса с первой порцией видео"""
+
+    return {
+        "contents": {
+            "twoColumnWatchNextResults": {
+                "playlist": {
+                    "playlist": {
+                        "title": f"Mix - {playlist_id}",
+                        "contents": get_mix_video_items(playlist_id, video_count),
+                        "playlistId": playlist_id,
+                        "isInfinite": True,
+                    }
+                }
+            }
+        }
+    }
+
+
+def get_mix_continuation_data(playlist_id: str, video_count: int, start: int) -> dict:
+    """Ответ /youtubei/v1/next на continuation с токеном "<playlist_id>:<start>"""
+
+    return {
+        "responseContext": {"visitorData": "Cgs"},
+        "continuationContents": {
+            "playlistPanelContinuation": {
+                "contents": get_mix_video_items(playlist_id, video_count, start),
+                "playlistId": playlist_id,
+                "isInfinite": True,
+            }
+        },
+    }
+
+
+def get_video_yt_initial_data(video_id: str) -> dict:
+    return {
+        "contents": {
+            "twoColumnWatchNextResults": {
+                "results": {
+                    "results": {
+                        "contents": [
+                            {
+                                "videoPrimaryInfoRenderer": {
+                                    "title": get_runs(f"Video {video_id}"),
+                                    "dateText": {"simpleText": "Jan 5, 2021"},
+                                }
+                            }
+                        ]
+                    }
+                }
+            }
+        },
+        "engagementPanels": [
+            {
+                "engagementPanelSectionListRenderer": {
+                    "content": {
+                        "continuationItemRenderer": {
+                            "continuationEndpoint": {
+                                "getTranscriptEndpoint": {"params": f"transcript:{video_id}"}
+                            }
+                        }
+                    }
+                }
+            }
+        ],
+    }
+
+
+def get_video_yt_initial_player_response(video_id: str) -> dict:
+    return {
+        "videoDetails": {
+            "videoId": video_id,
+            "title": f"Video {video_id}",
+            "lengthSeconds": "3725",
+            "viewCount": "123456",
+            "thumbnail": get_thumbnails(video_id),
+        }
+    }
+
+
+def get_transcript_data(segment_count: int) -> dict:
+    """Ответ /youtubei/v1/get_transcript"""
+
+    segments = []
+    for n in range(segment_count):
+        start_ms = n * 4_000
+        mm, ss = divmod(start_ms // 1000, 60)
+        segments.append(
+            {
+                "transcriptSegmentRenderer": {
+                    "startMs": str(start_ms),
+                    "endMs": str(start_ms + 4_000),
+                    "snippet": {"runs": [{"text": f"Segment text #{n + 1}"}]},
+                    "startTimeText": {"simpleText": f"{mm}:{ss:02d}"},
+                }
+            }
+        )
+
+    return {
+        "actions": [
+            {
+                "updateEngagementPanelAction": {
+                    "content": {
+                        "transcriptRenderer": {
+                            "content": {
+                                "transcriptSearchPanelRenderer": {
+                                    "body": {
+                                        "transcriptSegmentListRenderer": {
+                                            "initialSegments": segments
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        ]
+    }
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Сравнение однопроходного поиска рендереров с прежним вариантом на dpath.
+# Запуск из корня репозитория:
+#     python -m benchmarks.renderer_extractor
+
+
+import time
+import timeit
+
+# pip install dpath==2.0.5
+import dpath.util
+
+from benchmarks.fixtures import get_yt_initial_data
+from third_party.youtube_com.common import (
+    VIDEO_RENDERER_KEYS,
+    CONTINUATION_ITEM_KEY,
+    get_raw_video_renderer_items_and_continuation_item,
+)
+
+
+def get_raw_video_renderer_items_and_continuation_item_dpath(
+    data: dict,
+) -> tuple[list[dict], dict | None]:
+    items = []
+    for key in VIDEO_RENDERER_KEYS:
+        items += dpath.util.values(data, f"**/{key}")
+
+    try:
+        continuation_item = dpath.util.values(data, f"**/{CONTINUATION_ITEM_KEY}")[0]
+    except (KeyError, IndexError):
+        continuation_item = None
+
+    return items, continuation_item
+
+
+def run(video_counts: list[int], repeat: int = 3):
+    print(f"{'Videos':>8} {'dpath, ms':>12} {'single pass, ms':>16} {'speedup':>8}")
+
+    for video_count in video_counts:
+        # Все видео в одной порции и continuationItemRenderer в конце
+        data = get_yt_initial_data("PLbenchmark", video_count + 1, page_size=video_count)
+
+        # NOTE: dpath на 5000 видео работает минуты, поэтому замер один
+        t = time.perf_counter()
+        expected = get_raw_video_renderer_items_and_continuation_item_dpath(data)
+        dpath_seconds = time.perf_counter() - t
+
+        actual = get_raw_video_renderer_items_and_continuation_item(data)
+        assert actual == expected
+        assert len(actual[0]) == video_count
+
+        single_pass_seconds = min(
+            timeit.repeat(
+                lambda: get_raw_video_renderer_items_and_continuation_item(data),
+                number=1,
+                repeat=repeat,
+            )
+        )
+        print(
+            f"{video_count:>8} {dpath_seconds * 1000:>12.1f} "
+            f"{single_pass_seconds * 1000:>16.1f} "
+            f"{dpath_seconds / single_pass_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run([100, 1_000, 5_000])
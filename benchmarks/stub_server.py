@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# NOTE: Локальная замена youtube.com для бенчмарков. Отдает страницы и ответы
+#       /youtubei/v1/* из benchmarks/fixtures.py, размер плейлиста задается в id:
+#       PLbench1000 - плейлист из 1000 видео, RDbench50 - микс из 50 видео
+#       (порции микса пересекаются и не кончаются, как у ютуба).
+#       Сервер работает в отдельном процессе, чтобы не влиять на замеры CPU.
+#
+# Запуск отдельно:
+#     python -m benchmarks.stub_server 8000
+
+
+import functools
+import json
+import multiprocessing
+import re
+import sys
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.fixtures import (
+    get_continuation_data,
+    get_html,
+    get_mix_continuation_data,
+    get_mix_yt_initial_data,
+    get_transcript_data,
+    get_video_yt_initial_data,
+    get_video_yt_initial_player_response,
+    get_yt_initial_data,
+)
+
+
+PATTERN_PLAYLIST_ID = re.compile(r"^(?P<prefix>PL|RD)bench(?P<count>\d+)$")
+TRANSCRIPT_SEGMENT_COUNT = 500
+
+
+def get_video_count(playlist_id: str) -> int:
+    m = PATTERN_PLAYLIST_ID.match(playlist_id)
+    if not m:
+        raise ValueError(f"Unknown playlist id: {playlist_id!r}")
+    return int(m["count"])
+
+
+@functools.lru_cache(maxsize=None)
+def get_playlist_page(playlist_id: str) -> bytes:
+    video_count = get_video_count(playlist_id)
+    if playlist_id.startswith("RD"):
+        data = get_mix_yt_initial_data(playlist_id, video_count)
+    else:
+        data = get_yt_initial_data(playlist_id, video_count)
+
+    return get_html(data).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def get_browse_data(playlist_id: str) -> bytes:
+    data = get_yt_initial_data(playlist_id, get_video_count(playlist_id))
+    return json.dumps(data).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def get_continuation_page(playlist_id: str, start: int) -> bytes:
+    video_count = get_video_count(playlist_id)
+    if playlist_id.startswith("RD"):
+        data = get_mix_continuation_data(playlist_id, video_count, start)
+    else:
+        data = get_continuation_data(playlist_id, video_count, start)
+
+    return json.dumps(data).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def get_video_page(video_id: str) -> bytes:
+    return get_html(
+        get_video_yt_initial_data(video_id),
+        get_video_yt_initial_player_response(video_id),
+    ).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def get_transcript_page() -> bytes:
+    return json.dumps(get_transcript_data(TRANSCRIPT_SEGMENT_COUNT)).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # NOTE: Заголовки и тело пишутся отдельно, и на маленьких ответах
+    #       Nagle вместе с отложенным ACK добавлял к запросу ~40 мс
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        try:
+            if url.path == "/playlist":
+                body = get_playlist_page(query["list"][0])
+            elif url.path == "/watch":
+                body = get_video_page(query["v"][0])
+            else:
+                raise ValueError(url.path)
+        except (KeyError, ValueError):
+            self.send_error(404)
+            return
+
+        self.send_body(body, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        data = json.loads(self.rfile.read(length) or b"{}")
+
+        try:
+            if url.path in ("/youtubei/v1/browse", "/youtubei/v1/next") and "continuation" in data:
+                playlist_id, start = data["continuation"].rsplit(":", maxsplit=1)
+                body = get_continuation_page(playlist_id, int(start))
+            elif url.path == "/youtubei/v1/browse":
+                # NOTE: browseId = "VL" + id плейлиста
+                body = get_browse_data(data["browseId"][2:])
+            elif url.path == "/youtubei/v1/get_transcript":
+                body = get_transcript_page()
+            else:
+                raise ValueError(url.path)
+        except (KeyError, ValueError):
+            self.send_error(404)
+            return
+
+        self.send_body(body, "application/json")
+
+
+def serve(port: int, port_queue: "multiprocessing.Queue | None" = None):
+    # NOTE: Много одновременных подключений у асинхронного клиента
+    ThreadingHTTPServer.request_queue_size = 1024
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    if port_queue:
+        port_queue.put(server.server_port)
+
+    server.serve_forever()
+
+
+class StubServer:
+    def __init__(self, port: int = 0):
+        self.port = port
+        self._process: multiprocessing.Process | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        port_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=serve,
+            args=(self.port, port_queue),
+            daemon=True,
+        )
+        self._process.start()
+        self.port = port_queue.get(timeout=30)
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "StubServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    print(f"Serving on http://127.0.0.1:{port}")
+    serve(port)
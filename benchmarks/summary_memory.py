@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Сравнение памяти, которую удерживает список Video и список VideoSummary.
+# Запуск из корня репозитория:
+#     python -m benchmarks.summary_memory
+
+
+import gc
+import json
+import pickle
+import tracemalloc
+
+from dataclasses import replace
+
+from benchmarks.fixtures import get_yt_initial_data
+from third_party.youtube_com.common import (
+    Context,
+    Video,
+    VideoSummary,
+    get_raw_video_renderer_items_and_continuation_item,
+)
+
+
+def get_retained_bytes(raw: str, summary: bool) -> tuple[int, int]:
+    """Память после сборки списка видео и размер его pickle"""
+
+    gc.collect()
+    tracemalloc.start()
+
+    yt_initial_data = json.loads(raw)
+    context = Context(yt_initial_data=yt_initial_data)
+    items, _ = get_raw_video_renderer_items_and_continuation_item(yt_initial_data)
+    if summary:
+        video_list = [VideoSummary.parse_from(data_video) for data_video in items]
+    else:
+        video_list = [Video.parse_from(data_video, context) for data_video in items]
+
+    # Исходные данные больше не нужны - остается только то, на что ссылаются видео
+    del yt_initial_data, context, items
+    gc.collect()
+
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # NOTE: Раньше в кэш попадали Video без Context
+    if not summary:
+        video_list = [replace(video, context=None) for video in video_list]
+
+    return retained, len(pickle.dumps(video_list))
+
+
+def run(video_counts: list[int]):
+    print(
+        f"{'Videos':>8} {'Video, KB':>10} {'Summary, KB':>12} "
+        f"{'pickle Video, KB':>17} {'pickle Summary, KB':>19}"
+    )
+
+    for video_count in video_counts:
+        raw = json.dumps(
+            get_yt_initial_data("PLbenchmark", video_count, page_size=None)
+        )
+
+        full_bytes, full_pickle = get_retained_bytes(raw, summary=False)
+        summary_bytes, summary_pickle = get_retained_bytes(raw, summary=True)
+        print(
+            f"{video_count:>8} {full_bytes / 1024:>10.0f} {summary_bytes / 1024:>12.0f} "
+            f"{full_pickle / 1024:>17.0f} {summary_pickle / 1024:>19.0f}"
+        )
+
+
+if __name__ == "__main__":
+    run([100, 1_000, 5_000])
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# Сравнение Video.parse_from с прежним вариантом на dpath.
+# Запуск из корня репозитория:
+#     python -m benchmarks.video_parser
+
+
+import copy
+import re
+import timeit
+
+from datetime import date
+from urllib.parse import urljoin
+
+# pip install dpath==2.0.5
+import dpath.util
+
+from benchmarks.fixtures import get_video_items
+from third_party.youtube_com.common import (
+    BASE_URL,
+    Thumbnail,
+    Video,
+    process_text,
+    seconds_to_str,
+    time_to_seconds,
+)
+
+
+def parse_date_old(value: str) -> date | None:
+    for regex_pattern, months in [
+        (
+            r"(?P<month>%s) (?P<day>\d{,2}), (?P<year>\d{4})",
+            ['jan', 'feb', 'mar', 'apr', 'may', 'june', 'july', 'aug', 'sep', 'oct', 'nov', 'dec'],
+        ),
+        (
+            r"(?P<day>\d{,2}) (?P<month>%s)\.? (?P<year>\d{4})",
+            ['янв', 'февр', 'мар', 'апр', 'мая', 'июн', 'июл', 'авг', 'сент', 'окт', 'нояб', 'дек'],
+        ),
+    ]:
+        regex = regex_pattern % "|".join(months)
+        m = re.search(regex, value, flags=re.IGNORECASE)
+        if not m:
+            continue
+
+        return date(
+            year=int(m["year"]),
+            month=months.index(m["month"]) + 1,
+            day=int(m["day"]),
+        )
+
+
+def parse_from_old(data_video: dict) -> Video:
+    if (title := data_video.get("title")) and isinstance(title, str):
+        pass
+    else:
+        try:
+            title = dpath.util.get(data_video, "title/runs/0/text")
+        except KeyError:
+            title = dpath.util.get(data_video, "title/simpleText")
+
+    url_video = urljoin(
+        BASE_URL,
+        dpath.util.get(
+            data_video, "navigationEndpoint/commandMetadata/webCommandMetadata/url"
+        ),
+    )
+
+    try:
+        duration_seconds = int(data_video["lengthSeconds"])
+    except KeyError:
+        try:
+            text = dpath.util.get(data_video, "lengthText/simpleText")
+            duration_seconds = time_to_seconds(text)
+        except KeyError:
+            duration_seconds = None
+
+    try:
+        seq = int(data_video["index"]["simpleText"])
+    except:
+        seq = None
+
+    try:
+        create_date_raw = process_text(data_video["dateText"]["simpleText"])
+    except:
+        create_date_raw = None
+
+    try:
+        create_date = parse_date_old(create_date_raw)
+    except:
+        create_date = None
+
+    try:
+        view_count = int(data_video["viewCount"])
+    except:
+        view_count = None
+
+    try:
+        badges = dpath.util.values(data_video, "**/metadataBadgeRenderer/style")
+        is_live_now = "BADGE_STYLE_TYPE_LIVE_NOW" in badges
+    except KeyError:
+        is_live_now = False
+
+    return Video(
+        id=data_video["videoId"],
+        url=url_video,
+        title=title,
+        duration_seconds=duration_seconds,
+        duration_text=seconds_to_str(duration_seconds) if duration_seconds else None,
+        seq=seq,
+        is_live_now=is_live_now,
+        thumbnails=[
+            Thumbnail.get_from(thumbnail)
+            for thumbnail in dpath.util.values(data_video, "thumbnail/thumbnails/*")
+        ],
+        view_count=view_count,
+        create_date=create_date,
+        create_date_raw=create_date_raw,
+    )
+
+
+def get_data_videos(video_count: int) -> list[dict]:
+    items = [
+        item["playlistVideoRenderer"]
+        for item in get_video_items("PLbenchmark", video_count, page_size=None)
+    ]
+
+    # Разные варианты полей, чтобы сверить все ветки разбора
+    for i, item in enumerate(items):
+        match i % 5:
+            case 1:
+                del item["lengthSeconds"]
+                item["title"] = {"simpleText": item["title"]["runs"][0]["text"]}
+                item["dateText"] = {"simpleText": "15 мар. 2021 г."}
+            case 2:
+                del item["lengthSeconds"]
+                del item["lengthText"]
+                item["viewCount"] = "1234"
+                item["badges"] = [
+                    {"metadataBadgeRenderer": {"style": "BADGE_STYLE_TYPE_LIVE_NOW"}}
+                ]
+            case 3:
+                del item["index"]
+                item["dateText"] = {"simpleText": "jan 5, 2021"}
+                item["viewCount"] = "no views"
+            case 4:
+                item["title"] = "Plain title"
+                item["dateText"] = {"simpleText": "Premiered Jan 5, 2021"}
+
+    return items
+
+
+def run(video_counts: list[int], repeat: int = 3):
+    print(f"{'Videos':>8} {'dpath, ms':>12} {'compiled, ms':>13} {'speedup':>8}")
+
+    for video_count in video_counts:
+        data_videos = get_data_videos(video_count)
+
+        for data_video in data_videos:
+            expected = parse_from_old(copy.deepcopy(data_video))
+            actual = Video.parse_from(data_video)
+            assert actual == expected, (actual, expected)
+            assert actual.thumbnails == expected.thumbnails
+
+        old_seconds = min(
+            timeit.repeat(
+                lambda: [parse_from_old(data_video) for data_video in data_videos],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        new_seconds = min(
+            timeit.repeat(
+                lambda: [Video.parse_from(data_video) for data_video in data_videos],
+                number=1,
+                repeat=repeat,
+            )
+        )
+        print(
+            f"{video_count:>8} {old_seconds * 1000:>12.1f} "
+            f"{new_seconds * 1000:>13.1f} "
+            f"{old_seconds / new_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run([100, 1_000, 5_000])
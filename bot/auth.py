@@ -15,7 +15,7 @@ from telegram import (
     InlineKeyboardButton,
     ReplyKeyboardMarkup,
 )
-from telegram.ext import Filters, CallbackContext, Dispatcher
+from telegram.ext import filters, Application, CallbackContext, ContextTypes
 
 from bot.common import reply_message, SeverityEnum
 from config import USER_NAME_ADMINS, DEFAULT_PASSWORD
@@ -55,33 +55,33 @@ def is_admin(update: Update) -> bool:
 
 
 def set_bot_password(
-    context_or_dispatcher: CallbackContext | Dispatcher,
+    context_or_application: CallbackContext | Application,
     password: str = DEFAULT_PASSWORD,
 ):
-    context_or_dispatcher.bot_data[BotDataEnum.PASSWORD] = password
-    context_or_dispatcher.user_data[BotDataEnum.STATE] = None
+    context_or_application.bot_data[BotDataEnum.PASSWORD] = password
 
+    # NOTE: У Application user_data - данные всех пользователей, и только для чтения
+    if isinstance(context_or_application, CallbackContext):
+        context_or_application.user_data[BotDataEnum.STATE] = None
 
-def get_bot_password(context_or_dispatcher: CallbackContext | Dispatcher) -> str:
-    return context_or_dispatcher.bot_data.get(BotDataEnum.PASSWORD)
 
+def get_bot_password(context_or_application: CallbackContext | Application) -> str:
+    return context_or_application.bot_data.get(BotDataEnum.PASSWORD)
 
-def set_user_password(
-    context_or_dispatcher: CallbackContext | Dispatcher,
-    password: str,
-):
-    context_or_dispatcher.user_data[BotDataEnum.PASSWORD] = password
-    context_or_dispatcher.user_data[BotDataEnum.STATE] = None
+
+def set_user_password(context: CallbackContext, password: str):
+    context.user_data[BotDataEnum.PASSWORD] = password
+    context.user_data[BotDataEnum.STATE] = None
 
 
-def get_user_password(context_or_dispatcher: CallbackContext | Dispatcher) -> str:
-    return context_or_dispatcher.user_data.get(BotDataEnum.PASSWORD)
+def get_user_password(context: CallbackContext) -> str:
+    return context.user_data.get(BotDataEnum.PASSWORD)
 
 
 def access_check(log: logging.Logger):
     def actual_decorator(func):
         @functools.wraps(func)
-        def wrapper(update: Update, context: CallbackContext):
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message = update.message
             is_message = bool(update.message)
 
@@ -89,7 +89,7 @@ def access_check(log: logging.Logger):
             if update.effective_user:
                 user_id = update.effective_user.id
             if not user_id:
-                reply_message(
+                await reply_message(
                     "Allowed for users only",
                     update, context,
                     severity=SeverityEnum.ERROR,
@@ -103,7 +103,7 @@ def access_check(log: logging.Logger):
                 if is_message and state == StateEnum.TYPING_BOT_PASSWORD:
                     set_bot_password(context, message.text)
                     text = "Password has successful changed!"
-                    reply_message(
+                    await reply_message(
                         text, update, context,
                         severity=SeverityEnum.INFO,
                     )
@@ -113,7 +113,7 @@ def access_check(log: logging.Logger):
             elif get_bot_password(context) != get_user_password(context):
                 if state is None or not is_message:
                     context.user_data[BotDataEnum.STATE] = StateEnum.TYPING_USER_PASSWORD
-                    reply_message(
+                    await reply_message(
                         "No access! Enter your password:",
                         update, context,
                         reply_markup=MARKUP_INLINE_SET_USER_PASSWORD,
@@ -124,7 +124,7 @@ def access_check(log: logging.Logger):
                     # Checking the entered password
                     if get_bot_password(context) != message.text:
                         text = "Invalid password!"
-                        reply_message(
+                        await reply_message(
                             text, update, context,
                             reply_markup=MARKUP_INLINE_SET_USER_PASSWORD,
                             severity=SeverityEnum.ERROR,
@@ -136,21 +136,21 @@ def access_check(log: logging.Logger):
                     text = "The password is correct! Access is now allowed! Repeat request"
                     log.info(text)
 
-                    reply_message(
+                    await reply_message(
                         text, update, context,
                         severity=SeverityEnum.INFO,
                     )
 
                 return
 
-            return func(update, context)
+            return await func(update, context)
 
         return wrapper
 
     return actual_decorator
 
 
-FILTER_BY_ADMIN = Filters.user(username=USER_NAME_ADMINS)
+FILTER_BY_ADMIN = filters.User(username=USER_NAME_ADMINS)
 
 
 INLINE_KEYBOARD_BUTTON_CANCEL = InlineKeyboardButton(
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import asyncio
+import functools
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import config
+from bot.common import log
+from bot.job_scheduler import QueueFullError
+from bot.single_flight import SingleFlight
+from third_party.metrics import registry as metrics
+from third_party.youtube_com.async_common import AsyncChannel
+from third_party.youtube_com.common import Channel, ChannelStats, ChannelStatsBuilder
+
+
+class ChannelCache:
+    """
+    Итоги по каналам в SQLite, переживают перезапуск бота.
+
+    Итоги моложе ttl_seconds отдаются сразу. Итоги моложе
+    snapshot_max_age_seconds обновляются инкрементально: загружаются только
+    новые видео. Более старые считаются заново.
+
+    Во время полной загрузки каждые checkpoint_every_pages порций итоги
+    сохраняются вместе с порцией, с которой продолжить. Если загрузка
+    прервалась (ошибка, отмена, перезапуск), то следующая, не позже
+    checkpoint_max_age_seconds, продолжится с этого места.
+
+    Запросы к SQLite в асинхронных методах идут в отдельном потоке
+    (asyncio.to_thread), чтобы не останавливать цикл событий.
+    """
+
+    def __init__(
+        self,
+        db_file_name: str | Path,
+        ttl_seconds: float,
+        snapshot_max_age_seconds: float,
+        checkpoint_max_age_seconds: float,
+        checkpoint_every_pages: int,
+        log: logging.Logger | None = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_max_age_seconds = snapshot_max_age_seconds
+        self.checkpoint_max_age_seconds = checkpoint_max_age_seconds
+        self.checkpoint_every_pages = checkpoint_every_pages
+        self.log = log
+
+        self._lock = threading.RLock()
+        self._single_flight = SingleFlight()
+
+        self._connect = sqlite3.connect(db_file_name, check_same_thread=False)
+        self._connect.execute(
+            """
+            CREATE TABLE IF NOT EXISTS channel_stats (
+                id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connect.commit()
+
+    def get_item(self, channel_id: str) -> tuple[float, ChannelStats] | None:
+        with self._lock:
+            row = self._connect.execute(
+                "SELECT data, updated_at FROM channel_stats WHERE id = ?",
+                (channel_id,),
+            ).fetchone()
+
+        if not row:
+            return
+
+        data, updated_at = row
+        return updated_at, pickle.loads(data)
+
+    def _set_data(self, channel_id: str, data: bytes):
+        with self._lock:
+            self._connect.execute(
+                "INSERT OR REPLACE INTO channel_stats (id, data, updated_at) "
+                "VALUES (?, ?, ?)",
+                (channel_id, data, time.time()),
+            )
+            self._connect.commit()
+
+    def set(self, stats: ChannelStats):
+        self._set_data(stats.id, pickle.dumps(stats))
+
+    def delete(self, channel_id: str):
+        with self._lock:
+            self._connect.execute("DELETE FROM channel_stats WHERE id = ?", (channel_id,))
+            self._connect.commit()
+
+    def get(self, channel_id: str) -> ChannelStats | None:
+        """Полные итоги моложе ttl_seconds"""
+
+        item = self.get_item(channel_id)
+        if not item:
+            return
+
+        updated_at, stats = item
+        if stats.is_complete and time.time() - updated_at < self.ttl_seconds:
+            return stats
+
+    async def get_or_fetch(
+        self,
+        url_or_handle: str,
+        on_progress: Callable[[ChannelStatsBuilder], None] | None = None,
+        schedule: Callable[
+            [Callable[[], Awaitable[ChannelStats]]], Awaitable[ChannelStats]
+        ] | None = None,
+    ) -> ChannelStats:
+        """
+        on_progress и schedule - как у PlaylistCache.get_or_fetch
+        """
+
+        channel_id, url = Channel.get_id_and_url(url_or_handle)
+
+        stats = await asyncio.to_thread(self.get, channel_id)
+        if stats:
+            metrics.inc("channel_cache_total", result="hit")
+            return stats
+
+        fetch = functools.partial(self._fetch, channel_id, url, on_progress)
+        if schedule:
+            fetch = functools.partial(schedule, fetch)
+
+        # NOTE: QueueFullError чужой загрузки - про очередь другого пользователя
+        stats, is_shared = await self._single_flight.do(
+            channel_id, fetch, retry_shared_on=(QueueFullError,)
+        )
+        metrics.inc("channel_cache_total", result="coalesced" if is_shared else "miss")
+        return stats
+
+    async def _fetch(
+        self,
+        channel_id: str,
+        url: str,
+        on_progress: Callable[[ChannelStatsBuilder], None] | None = None,
+    ) -> ChannelStats:
+        previous = checkpoint = None
+
+        item = await asyncio.to_thread(self.get_item, channel_id)
+        if item:
+            updated_at, stats = item
+            age = time.time() - updated_at
+            if stats.is_complete:
+                # Итоги могли посчитаться в другой задаче, пока эта ждала очереди
+                if age < self.ttl_seconds:
+                    return stats
+
+                if age < self.snapshot_max_age_seconds:
+                    previous = stats
+
+            elif age < self.checkpoint_max_age_seconds:
+                checkpoint = stats
+
+        checkpoint_pages = checkpoint.loaded_pages if checkpoint else 0
+        last_stats: ChannelStats | None = None
+
+        # NOTE: Итоги без списка видео, их pickle быстрый и делается сразу, пока
+        #       итоги не изменились, а запись в базу - в фоне. Перед окончательной
+        #       записью нужно дождаться фоновых, иначе они ее перезапишут
+        checkpoint_writes: list[asyncio.Task] = []
+
+        def on_page(builder: ChannelStatsBuilder):
+            nonlocal last_stats
+            last_stats = builder.stats
+
+            # NOTE: Инкрементальное обновление короткое, его не сохраняем,
+            #       иначе незавершенные итоги заменили бы полные
+            if (
+                not builder.previous
+                and not builder.stats.is_complete
+                and builder.loaded_pages % self.checkpoint_every_pages == 0
+            ):
+                checkpoint_writes.append(
+                    asyncio.create_task(
+                        asyncio.to_thread(
+                            self._set_data, channel_id, pickle.dumps(builder.stats)
+                        )
+                    )
+                )
+                metrics.inc("channel_checkpoints_total", result="saved")
+
+            if on_progress:
+                on_progress(builder)
+
+        try:
+            stats = await AsyncChannel.get_stats(
+                url, previous=previous, checkpoint=checkpoint, on_progress=on_page
+            )
+        except (Exception, asyncio.CancelledError):
+            await asyncio.gather(*checkpoint_writes, return_exceptions=True)
+
+            if last_stats and not previous and last_stats.loaded_pages > checkpoint_pages:
+                await asyncio.to_thread(self.set, last_stats)
+                metrics.inc("channel_checkpoints_total", result="saved")
+
+            elif checkpoint:
+                # С этого места продолжить не вышло - в следующий раз с начала
+                await asyncio.to_thread(self.delete, channel_id)
+                metrics.inc("channel_checkpoints_total", result="dropped")
+
+            raise
+
+        await asyncio.gather(*checkpoint_writes, return_exceptions=True)
+
+        if checkpoint and self.log:
+            self.log.info(
+                f"Channel {channel_id!r} resumed from page {checkpoint_pages}, "
+                f"total pages: {stats.loaded_pages}"
+            )
+
+        await asyncio.to_thread(self.set, stats)
+        return stats
+
+
+channel_cache = ChannelCache(
+    db_file_name=config.DB_FILE_NAME,
+    ttl_seconds=config.CHANNEL_CACHE_TTL_SECONDS,
+    snapshot_max_age_seconds=config.CHANNEL_CACHE_SNAPSHOT_MAX_AGE_SECONDS,
+    checkpoint_max_age_seconds=config.CHANNEL_CHECKPOINT_MAX_AGE_SECONDS,
+    checkpoint_every_pages=config.CHANNEL_CHECKPOINT_EVERY_PAGES,
+    log=log,
+)
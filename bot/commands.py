@@ -4,7 +4,15 @@
 __author__ = "ipetrash"
 
 
-import time
+import asyncio
+import copy
+import csv
+import functools
+import io
+import math
+import re
+
+from typing import Any, Awaitable, Callable, TypeVar
 
 from telegram import (
     Update,
@@ -12,16 +20,38 @@ from telegram import (
     InlineKeyboardButton,
     ReplyKeyboardRemove,
 )
+from telegram.constants import InlineKeyboardButtonLimit
+from telegram.error import BadRequest
 from telegram.ext import (
-    Dispatcher,
-    CallbackContext,
+    Application,
+    ContextTypes,
     MessageHandler,
     CommandHandler,
-    Filters,
+    filters,
     CallbackQueryHandler,
 )
 
-from bot.common import reply_message, log_func, process_error, log, SeverityEnum
+from config import (
+    BATCH_CONCURRENCY,
+    BATCH_MAX_PLAYLISTS,
+    JOB_ADMIN_WEIGHT,
+    LISTING_PAGE_SIZE,
+    REQUEST_DEADLINE_SECONDS,
+    WARM_REFRESH_INTERVAL_SECONDS,
+)
+from bot.common import (
+    METRIC_BOT_STAGE_SECONDS,
+    reply_message,
+    log_func,
+    process_error,
+    log,
+    SeverityEnum,
+)
+from bot.channel_cache import channel_cache
+from bot.job_scheduler import QueueFullError, job_scheduler
+from bot.playlist_cache import playlist_cache
+from bot.seq_filters import FilterError, MAX_SEQ, format_ranges, parse_filters
+from bot.warm_refresh import job_warm_refresh, warm_refresher
 from bot.auth import (
     FILTER_BY_ADMIN,
     MARKUP_REPLY_ADMIN,
@@ -37,10 +67,16 @@ from bot.auth import (
 from bot.regexp_patterns import (
     COMMAND_START,
     COMMAND_HELP,
+    COMMAND_STATS,
     PATTERN_PLAYLIST_ID,
     PATTERN_PLAYLIST_ID_WITH_FILTERS,
+    PATTERN_PLAYLIST_PAGE,
+    PATTERN_PLAYLIST_CSV,
+    PATTERN_CONTINUE_PLAYLIST,
+    PATTERN_CONTINUE_CHANNEL,
     PATTERN_GENERATE_RANDOM_PASSWORD,
     PATTERN_CANCEL,
+    PATTERN_PLAYLIST_REF,
     PATTERN_GET_BOT_PASSWORD,
     PATTERN_SET_BOT_PASSWORD,
     COMMAND_GET_BOT_PASSWORD,
@@ -48,121 +84,672 @@ from bot.regexp_patterns import (
     COMMAND_REMOVE_REPLY_KEYBOARD,
     PATTERN_REMOVE_REPLY_KEYBOARD,
 )
+from third_party.metrics import registry as metrics
 from third_party.auto_in_progress_message import (
+    show_temp_message,
     show_temp_message_decorator,
+    progress_scheduler,
     ProgressValue,
 )
 from third_party.regexp import fill_string_pattern
-from third_party.youtube_com.common import Playlist, Video, seconds_to_str
+from third_party.youtube_com.common import (
+    Channel,
+    ChannelStats,
+    ChannelStatsBuilder,
+    Playlist,
+    PlaylistVideoListBuilder,
+    seconds_to_str,
+)
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceededError(Exception):
+    """
+    Загрузка не уложилась в REQUEST_DEADLINE_SECONDS и продолжается в фоне.
+    partial - то, что успело загрузиться (None, если еще ничего).
+    """
+
+    def __init__(self, partial: "Playlist | ChannelStats | None"):
+        super().__init__("Deadline exceeded")
+        self.partial = partial
+
+
+TEXT_CONTINUE = (
+    "Loading continues in the background, "
+    "press the button to get the result when it is done"
+)
+
+
+async def wait_with_deadline(
+    aw: Awaitable[T],
+    deadline: float | None,
+    get_partial: Callable[[], Any],
+) -> T:
+    """
+    deadline - время по loop.time(), None - без ограничения.
+
+    NOTE: Загрузки в PlaylistCache и ChannelCache защищены от отмены
+          (см. SingleFlight), поэтому по deadline отменяется только ожидание
+    """
+
+    timeout = asyncio.timeout_at(deadline)
+    try:
+        async with timeout:
+            return await aw
+    except TimeoutError:
+        if not timeout.expired():
+            raise
+
+        metrics.inc("bot_deadline_exceeded_total", help="Requests answered with partial results")
+        raise DeadlineExceededError(get_partial())
+
+
+def get_deadline() -> float:
+    return asyncio.get_running_loop().time() + REQUEST_DEADLINE_SECONDS
+
+
+def is_valid_callback_data(data: str) -> bool:
+    return len(data.encode("utf-8")) <= InlineKeyboardButtonLimit.MAX_CALLBACK_DATA
+
+
+def get_page_count(video_count: int) -> int:
+    return max(1, math.ceil(video_count / LISTING_PAGE_SIZE))
 
 
 def get_description_playlist(
     playlist: Playlist,
-    full: bool = True,
     filters: str = None,
+    page: int | None = None,
 ) -> str:
+    """
+    Описание плейлиста с итогами. Если указан page, то добавляются видео
+    этой страницы (по LISTING_PAGE_SIZE на страницу), а не всего плейлиста.
+    """
+
+    # NOTE: У неполного плейлиста загружены не все видео
+    video_count = len(playlist.video_list)
+    if not playlist.is_complete:
+        video_count = playlist.video_count or f"{video_count}+"
+
     lines = [
         f"Playlist {playlist.title!r}",
-        f"Video count: {len(playlist.video_list)}",
+        f"Video count: {video_count}",
     ]
 
-    seq_filters: list[int] = []
+    index = playlist.index
     if filters:
-        if "," in filters:
-            seq_filters += list(map(lambda x: int(x.strip()), filters.split(",")))
-        elif "-" in filters:
-            start, end = map(int, filters.split("-"))
-            seq_filters += list(range(start, end + 1))
-
-    if seq_filters:
         lines.append(f"Filters: {filters}")
-    
-    total_duration_seconds: int = 0
-    video_list: list[Video] = []
-    for video in playlist.video_list:
-        if seq_filters and video.seq not in seq_filters:
-            continue
-
-        video_list.append(video)
-        total_duration_seconds += video.duration_seconds
+        ranges = parse_filters(filters)
+    else:
+        ranges = [(1, MAX_SEQ)]
 
+    filtered_count, total_duration_seconds, unknown_count = index.get_total(ranges)
     total_duration_text = seconds_to_str(total_duration_seconds)
 
-    if seq_filters:
-        lines.append(f"Filtered video count: {len(video_list)}")
+    if filters:
+        lines.append(f"Filtered video count: {filtered_count}")
+
+    if page is not None:
+        positions = index.get_positions(ranges)
+        lines.append(f"Video (page {page} of {get_page_count(len(positions))}):")
 
-    if full:
-        lines.append("Video:")
-        for video in video_list:
+        start = (page - 1) * LISTING_PAGE_SIZE
+        for i in positions[start: start + LISTING_PAGE_SIZE]:
+            video = playlist.video_list[i]
             lines.append(f"  {video.seq}. {video.title!r} ({video.duration_text})")
         lines.append("")  # Empty line
 
+    if unknown_count:
+        lines.append(f"Video with unknown duration: {unknown_count}")
+
     lines.append(
         f"Total time: {total_duration_text} ({total_duration_seconds} total seconds)"
     )
     return "\n".join(lines)
 
 
-def reply_playlist(
+def get_csv_playlist(playlist: Playlist, ranges: list[tuple[int, int]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["seq", "id", "title", "duration_seconds", "duration"])
+    for i in playlist.index.get_positions(ranges):
+        video = playlist.video_list[i]
+        writer.writerow(
+            [video.seq, video.id, video.title, video.duration_seconds, video.duration_text]
+        )
+
+    # NOTE: С BOM Excel правильно определяет кодировку
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def get_filters_text(ranges: list[tuple[int, int]]) -> str | None:
+    return None if ranges == [(1, MAX_SEQ)] else format_ranges(ranges)
+
+
+def get_markup_listing(
+    playlist_id: str,
+    ranges: list[tuple[int, int]],
+    page: int,
+    page_count: int,
+) -> InlineKeyboardMarkup | None:
+    """
+    Кнопки листания страниц и выгрузки в CSV. None, если callback_data
+    не помещаются в лимит Telegram (слишком длинные фильтры).
+    """
+
+    ranges_text = format_ranges(ranges)
+
+    buttons = []
+    if page > 1:
+        buttons.append(
+            InlineKeyboardButton(
+                text="◀ Prev",
+                callback_data=fill_string_pattern(
+                    PATTERN_PLAYLIST_PAGE, page - 1, playlist_id, ranges_text
+                ),
+            )
+        )
+    if page < page_count:
+        buttons.append(
+            InlineKeyboardButton(
+                text="Next ▶",
+                callback_data=fill_string_pattern(
+                    PATTERN_PLAYLIST_PAGE, page + 1, playlist_id, ranges_text
+                ),
+            )
+        )
+
+    button_csv = InlineKeyboardButton(
+        text="Download CSV",
+        callback_data=fill_string_pattern(PATTERN_PLAYLIST_CSV, playlist_id, ranges_text),
+    )
+
+    for button in buttons + [button_csv]:
+        if not is_valid_callback_data(button.callback_data):
+            return
+
+    return InlineKeyboardMarkup([row for row in [buttons, [button_csv]] if row])
+
+
+def get_partial_text(partial: Playlist | ChannelStats) -> str:
+    if isinstance(partial, ChannelStats):
+        text = f"Loaded {partial.video_count} video so far"
+    elif partial.video_count:
+        text = f"Loaded {len(partial.video_list)} of {partial.video_count} video"
+    else:
+        text = f"Loaded {len(partial.video_list)} video so far"
+
+    return f"{text}, the total is partial"
+
+
+def get_markup_continue(
+    pattern: re.Pattern,
+    *args,
+) -> InlineKeyboardMarkup | None:
+    callback_data = fill_string_pattern(pattern, *args)
+    if not is_valid_callback_data(callback_data):
+        return
+
+    return InlineKeyboardMarkup.from_button(
+        InlineKeyboardButton(text="Continue in background", callback_data=callback_data)
+    )
+
+
+def get_markup_continue_playlist(
+    playlist_id_or_url: str,
+    filters: str,
+) -> InlineKeyboardMarkup | None:
+    playlist_id, _ = Playlist.get_id_and_url(playlist_id_or_url)
+    try:
+        ranges = parse_filters(filters) if filters else [(1, MAX_SEQ)]
+    except FilterError:
+        # NOTE: Об ошибке в фильтрах сообщат, когда плейлист загрузится
+        ranges = [(1, MAX_SEQ)]
+
+    return get_markup_continue(
+        PATTERN_CONTINUE_PLAYLIST, playlist_id, format_ranges(ranges)
+    )
+
+
+def get_short_description_playlist(playlist: Playlist) -> str:
+    video_count, duration_seconds, unknown_count = playlist.index.get_total(
+        [(1, MAX_SEQ)]
+    )
+
+    text = f"{playlist.title!r}: {video_count} video, {seconds_to_str(duration_seconds)}"
+    if unknown_count:
+        text += f" ({unknown_count} with unknown duration)"
+    return text
+
+
+def get_description_channel(stats: ChannelStats) -> str:
+    lines = [
+        f"Channel {stats.title!r}",
+        f"Video count: {stats.video_count}",
+    ]
+    if stats.unknown_count:
+        lines.append(f"Video with unknown duration: {stats.unknown_count}")
+    lines.append(
+        f"Total time: {stats.duration_text} ({stats.duration_seconds} total seconds)"
+    )
+
+    if stats.by_year:
+        lines.append("")  # Empty line
+        lines.append("By year (approximately):")
+
+        # Сначала новые, неизвестный год в конце
+        for year, (count, duration_seconds) in sorted(
+            stats.by_year.items(), key=lambda item: item[0] or 0, reverse=True
+        ):
+            lines.append(
+                f"  {year or 'Unknown'}: {count} video, {seconds_to_str(duration_seconds)}"
+            )
+
+    return "\n".join(lines)
+
+
+def get_progress_text(builder: PlaylistVideoListBuilder) -> str:
+    text = f"Pages: {builder.loaded_pages}, video: {builder.loaded_videos}"
+    if builder.video_count:
+        text += f" of {builder.video_count}"
+    return text
+
+
+def get_playlist_refs(text: str) -> tuple[list[str], list[str]]:
+    """
+    Разделяет текст на ссылки/id плейлистов (без повторов) и остальное.
+    Все найденные ссылки, в том числе повторы, из остального убираются
+    """
+
+    refs = dict()
+    other = []
+    last_end = 0
+    for m in PATTERN_PLAYLIST_REF.finditer(text):
+        playlist_id, _ = Playlist.get_id_and_url(m.group())
+        refs.setdefault(playlist_id, m.group())
+
+        other += text[last_end:m.start()].split()
+        last_end = m.end()
+
+    other += text[last_end:].split()
+
+    return list(refs.values()), other
+
+
+def get_on_progress(
+    temp_message: show_temp_message = None,
+) -> Callable[[PlaylistVideoListBuilder | ChannelStatsBuilder], None] | None:
+    if not temp_message:
+        return
+
+    def on_progress(builder: PlaylistVideoListBuilder | ChannelStatsBuilder):
+        temp_message.set_progress(get_progress_text(builder))
+
+    return on_progress
+
+
+def get_schedule(
+    update: Update,
+    temp_message: show_temp_message = None,
+) -> Callable[[Callable[[], Awaitable[Any]]], Awaitable[Any]]:
+    """Загрузка через очередь JobScheduler от имени пользователя"""
+
+    on_position = None
+    if temp_message:
+        def on_position(position: int):
+            temp_message.set_progress(f"Position in queue: {position}")
+
+    return functools.partial(
+        job_scheduler.run,
+        update.effective_user.id,
+        weight=JOB_ADMIN_WEIGHT if is_admin(update) else 1,
+        on_position=on_position,
+    )
+
+
+def get_partial_playlist(
+    playlist_id_or_url: str,
+    builder: PlaylistVideoListBuilder | None,
+) -> Playlist | None:
+    if not builder or not builder.video_list:
+        return
+
+    playlist_id, url = Playlist.get_id_and_url(playlist_id_or_url)
+
+    # NOTE: to_summary копирует список видео, а builder продолжит его менять
+    playlist = Playlist.create(
+        playlist_id, url, builder.context, builder.video_count, builder
+    ).to_summary()
+    playlist.is_complete = False
+    return playlist
+
+
+async def get_playlist(
+    playlist_id_or_url: str,
+    update: Update,
+    stop_after_seq: int | None = None,
+    temp_message: show_temp_message = None,
+    deadline: float | None = None,
+) -> Playlist:
+    """
+    Если не уложились в deadline, то будет DeadlineExceededError
+    с частью плейлиста, а загрузка продолжится в фоне
+    """
+
+    last_builder: PlaylistVideoListBuilder | None = None
+    show_progress = get_on_progress(temp_message)
+
+    def on_progress(builder: PlaylistVideoListBuilder):
+        nonlocal last_builder
+        last_builder = builder
+
+        if show_progress:
+            show_progress(builder)
+
+    with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="get_playlist"):
+        playlist = await wait_with_deadline(
+            playlist_cache.get_or_fetch(
+                playlist_id_or_url,
+                stop_after_seq=stop_after_seq,
+                on_progress=on_progress,
+                schedule=get_schedule(update, temp_message),
+                deadline=deadline,
+            ),
+            deadline,
+            lambda: get_partial_playlist(playlist_id_or_url, last_builder),
+        )
+
+    warm_refresher.popularity.record(playlist.id)
+    return playlist
+
+
+async def reply_channel(
+    url_or_handle: str,
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    temp_message: show_temp_message = None,
+    deadline: float | None = None,
+):
+    last_builder: ChannelStatsBuilder | None = None
+    show_progress = get_on_progress(temp_message)
+
+    def on_progress(builder: ChannelStatsBuilder):
+        nonlocal last_builder
+        last_builder = builder
+
+        if show_progress:
+            show_progress(builder)
+
+    try:
+        with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="get_channel"):
+            stats = await wait_with_deadline(
+                channel_cache.get_or_fetch(
+                    url_or_handle,
+                    on_progress=on_progress,
+                    schedule=get_schedule(update, temp_message),
+                ),
+                deadline,
+                # NOTE: Итоги продолжат меняться, нужна копия
+                lambda: copy.deepcopy(last_builder.stats) if last_builder else None,
+            )
+    except DeadlineExceededError as e:
+        channel_id, _ = Channel.get_id_and_url(url_or_handle)
+        if e.partial:
+            text = f"{get_description_channel(e.partial)}\n\n{get_partial_text(e.partial)}"
+        else:
+            text = "The channel is still loading"
+
+        await reply_message(
+            f"{text}\n{TEXT_CONTINUE}",
+            update, context,
+            reply_markup=get_markup_continue(PATTERN_CONTINUE_CHANNEL, channel_id),
+        )
+        return
+    except QueueFullError as e:
+        text = f"Too many requests, please try again in {e.retry_after} seconds"
+        await reply_message(text, update, context, severity=SeverityEnum.ERROR)
+        return
+    except Exception:
+        text = "Invalid channel url!"
+
+        if is_admin(update):
+            log.exception(text)
+
+        await reply_message(text, update, context, severity=SeverityEnum.ERROR)
+        return
+
+    # NOTE: Загрузку остановил PaginationGuard, после max_pages ее можно продолжить
+    if not stats.is_complete:
+        text = f"{get_description_channel(stats)}\n\n{get_partial_text(stats)}"
+        reply_markup = None
+        if stats.continuation_item:
+            text += "\nToo many pages for one request, press the button to load the next ones"
+            reply_markup = get_markup_continue(PATTERN_CONTINUE_CHANNEL, stats.id)
+
+        await reply_message(text, update, context, reply_markup=reply_markup)
+        return
+
+    await reply_message(get_description_channel(stats), update, context)
+
+
+async def reply_playlists(
+    playlist_ids_or_urls: list[str],
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    temp_message: show_temp_message = None,
+    deadline: float | None = None,
+):
+    """
+    Несколько плейлистов за раз: загружаются одновременно (не больше
+    BATCH_CONCURRENCY), готовые строки сразу попадают в сообщение
+    с прогрессом, а в ответе - строки всех плейлистов и общий итог.
+    """
+
+    if len(playlist_ids_or_urls) > BATCH_MAX_PLAYLISTS:
+        text = f"Too many playlists, no more than {BATCH_MAX_PLAYLISTS} at a time"
+        await reply_message(text, update, context, severity=SeverityEnum.ERROR)
+        return
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    playlists: list[Playlist | None] = [None] * len(playlist_ids_or_urls)
+    lines: list[str | None] = [None] * len(playlist_ids_or_urls)
+    is_partial = False
+
+    async def process(i: int, playlist_id_or_url: str):
+        nonlocal is_partial
+
+        async with semaphore:
+            try:
+                playlists[i] = await get_playlist(
+                    playlist_id_or_url, update, deadline=deadline
+                )
+                lines[i] = get_short_description_playlist(playlists[i])
+            except DeadlineExceededError as e:
+                is_partial = True
+                playlists[i] = e.partial
+                if e.partial:
+                    lines[i] = (
+                        f"{get_short_description_playlist(e.partial)} "
+                        f"({get_partial_text(e.partial)})"
+                    )
+                else:
+                    lines[i] = f"{playlist_id_or_url}: still loading"
+            except QueueFullError as e:
+                lines[i] = (
+                    f"{playlist_id_or_url}: too many requests, "
+                    f"please try again in {e.retry_after} seconds"
+                )
+            except Exception:
+                lines[i] = f"{playlist_id_or_url}: invalid playlist id or url!"
+                if is_admin(update):
+                    log.exception(lines[i])
+
+        if temp_message:
+            done_lines = [line for line in lines if line]
+            temp_message.set_progress(
+                f"Done {len(done_lines)} of {len(lines)}:\n" + "\n".join(done_lines)
+            )
+
+    await asyncio.gather(*(process(i, x) for i, x in enumerate(playlist_ids_or_urls)))
+
+    total_count = total_duration_seconds = total_unknown_count = 0
+    for playlist in filter(None, playlists):
+        count, duration_seconds, unknown_count = playlist.index.get_total([(1, MAX_SEQ)])
+        total_count += count
+        total_duration_seconds += duration_seconds
+        total_unknown_count += unknown_count
+
+    text_lines = [f"Playlists: {len(lines)}"]
+    text_lines += [f"  {i}. {line}" for i, line in enumerate(lines, start=1)]
+    text_lines.append("")  # Empty line
+    text_lines.append(f"Total video count: {total_count}")
+    if total_unknown_count:
+        text_lines.append(f"Video with unknown duration: {total_unknown_count}")
+    text_lines.append(
+        f"Total time: {seconds_to_str(total_duration_seconds)} "
+        f"({total_duration_seconds} total seconds)"
+    )
+    if is_partial:
+        text_lines.append("")  # Empty line
+        text_lines.append(
+            "Some playlists are still loading in the background, "
+            "send the request again a little later"
+        )
+    await reply_message("\n".join(text_lines), update, context)
+
+
+async def reply_playlist_csv(
+    playlist: Playlist,
+    ranges: list[tuple[int, int]],
+    update: Update,
+):
+    with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="get_description"):
+        data = get_csv_playlist(playlist, ranges)
+
+    with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="telegram_reply"):
+        await update.effective_message.reply_document(
+            document=data,
+            filename=f"{playlist.id}.csv",
+            caption=get_description_playlist(playlist, filters=get_filters_text(ranges)),
+            do_quote=True,
+        )
+
+
+async def reply_playlist(
     query: str,
     update: Update,
-    context: CallbackContext,
+    context: ContextTypes.DEFAULT_TYPE,
     show_full: bool = True,
+    temp_message: show_temp_message = None,
+    deadline: float | None = None,
 ):
     if " " in query:
-        playlist_id_or_url, filters = map(str.strip, query.split(" "))
+        playlist_id_or_url, filters = map(str.strip, query.split(" ", maxsplit=1))
     else:
         playlist_id_or_url = query
         filters = ""
 
+    # Если нужны только первые видео, то остальные можно не загружать
+    stop_after_seq = None
+    if filters:
+        try:
+            _, end = parse_filters(filters)[-1]
+            if end != MAX_SEQ:
+                stop_after_seq = end
+        except (FilterError, IndexError):
+            pass
+
+    is_partial = False
     try:
-        playlist = Playlist.get_from(playlist_id_or_url)
-    except:
+        playlist = await get_playlist(
+            playlist_id_or_url, update, stop_after_seq, temp_message, deadline
+        )
+    except DeadlineExceededError as e:
+        if not e.partial:
+            text = f"The playlist is still loading\n{TEXT_CONTINUE}"
+            markup = get_markup_continue_playlist(playlist_id_or_url, filters)
+            await reply_message(text, update, context, reply_markup=markup)
+            return
+
+        playlist = e.partial
+        is_partial = True
+    except QueueFullError as e:
+        text = f"Too many requests, please try again in {e.retry_after} seconds"
+        await reply_message(text, update, context, severity=SeverityEnum.ERROR)
+        return
+    except Exception:
         text = "Invalid playlist id or url!"
 
         if is_admin(update):
             log.exception(text)
 
-        reply_message(text, update, context, severity=SeverityEnum.ERROR)
+        await reply_message(text, update, context, severity=SeverityEnum.ERROR)
         return
 
-    text = get_description_playlist(playlist, full=show_full, filters=filters)
+    try:
+        ranges = parse_filters(filters) if filters else [(1, MAX_SEQ)]
+        with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="get_description"):
+            text = get_description_playlist(
+                playlist, filters=filters, page=1 if show_full else None
+            )
+    except FilterError as e:
+        await reply_message(str(e), update, context, severity=SeverityEnum.ERROR)
+        return
 
-    if show_full:
-        markup = None
+    if is_partial:
+        text += f"\n\n{get_partial_text(playlist)}\n{TEXT_CONTINUE}"
+        markup = get_markup_continue_playlist(playlist.id, filters)
+    elif show_full:
+        filtered_count, _, _ = playlist.index.get_total(ranges)
+        page_count = get_page_count(filtered_count)
+        markup = get_markup_listing(playlist.id, ranges, 1, page_count)
+
+        # NOTE: Без кнопок остальные страницы не открыть - весь список уходит файлом
+        if not markup and page_count > 1:
+            await reply_playlist_csv(playlist, ranges, update)
+            return
     else:
-        buttons = [
-            InlineKeyboardButton(
-                text="Show full playlist",
-                callback_data=fill_string_pattern(PATTERN_PLAYLIST_ID, playlist.id),
-            )
+        buttons_data = [
+            ("Show full playlist", fill_string_pattern(PATTERN_PLAYLIST_ID, playlist.id)),
         ]
         if filters:
-            buttons.append(
-                InlineKeyboardButton(
-                    text="Show filtered playlist",
-                    callback_data=fill_string_pattern(
+            # NOTE: Фильтры в более короткой записи: как их ввели или диапазонами
+            buttons_data.append(
+                (
+                    "Show filtered playlist",
+                    fill_string_pattern(
                         PATTERN_PLAYLIST_ID_WITH_FILTERS,
                         playlist.id,
-                        filters,
+                        min(filters, format_ranges(ranges), key=len),
                     ),
                 )
             )
-        markup = InlineKeyboardMarkup.from_column(buttons)
 
-    reply_message(text, update, context, reply_markup=markup)
+        # NOTE: Со слишком длинной callback_data Telegram отклонит весь ответ
+        buttons = [
+            InlineKeyboardButton(text=button_text, callback_data=data)
+            for button_text, data in buttons_data
+            if is_valid_callback_data(data)
+        ]
+        markup = InlineKeyboardMarkup.from_column(buttons) if buttons else None
+
+    await reply_message(text, update, context, reply_markup=markup)
 
 
 @log_func(log)
-def on_start(update: Update, context: CallbackContext):
+async def on_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     markup = ReplyKeyboardRemove()
     text = (
-        "Bot for displaying the total duration of the youtube playlist.\n\n"
-        "Send me an id or link to a playlist (or video with playlist).\n"
+        "Bot for displaying the total duration of the youtube playlist or channel.\n\n"
+        "Send me an id or link to a playlist (or video with playlist) or a channel.\n"
         "Examples:\n"
         "    * PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO\n"
         "    * https://www.youtube.com/playlist?list=PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO\n"
-        "    * https://www.youtube.com/watch?v=4ewTMva83tQ&list=PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO"
+        "    * https://www.youtube.com/watch?v=4ewTMva83tQ&list=PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO\n"
+        "    * https://www.youtube.com/@YouTube/videos\n"
+        "    * https://www.youtube.com/@YouTube/streams"
     )
     if is_admin(update):
         text += (
@@ -170,10 +757,11 @@ def on_start(update: Update, context: CallbackContext):
             f"\nUse /{COMMAND_REMOVE_REPLY_KEYBOARD} for remove reply keyboard"
             f"\nUse /{COMMAND_SET_BOT_PASSWORD} for set bot password"
             f"\nUse /{COMMAND_GET_BOT_PASSWORD} for get bot password"
+            f"\nUse /{COMMAND_STATS} for get bot statistics"
         )
         markup = MARKUP_REPLY_ADMIN
 
-    reply_message(
+    await reply_message(
         text,
         update, context,
         disable_web_page_preview=True,
@@ -182,18 +770,24 @@ def on_start(update: Update, context: CallbackContext):
 
 
 @log_func(log)
-def on_get_bot_password(update: Update, context: CallbackContext):
+async def on_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    text = metrics.get_summary() or "No statistics yet"
+    await reply_message(text, update, context)
+
+
+@log_func(log)
+async def on_get_bot_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = get_bot_password(context)
-    reply_message(text, update, context)
+    await reply_message(text, update, context)
 
 
 @log_func(log)
-def on_set_bot_password(update: Update, context: CallbackContext):
+async def on_set_bot_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = "Ok, now enter your new password or select actions below:"
 
     context.user_data[BotDataEnum.STATE] = StateEnum.TYPING_BOT_PASSWORD
 
-    reply_message(
+    await reply_message(
         text,
         update, context,
         severity=SeverityEnum.INFO,
@@ -202,13 +796,13 @@ def on_set_bot_password(update: Update, context: CallbackContext):
 
 
 @log_func(log)
-def on_typing_bot_password(update: Update, context: CallbackContext):
+async def on_typing_bot_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message = update.effective_message
 
     set_bot_password(context, message.text)
     text = "Password has successful changed!"
 
-    reply_message(text, update, context, severity=SeverityEnum.INFO)
+    await reply_message(text, update, context, severity=SeverityEnum.INFO)
 
 
 @log_func(log)
@@ -216,130 +810,320 @@ def on_typing_bot_password(update: Update, context: CallbackContext):
     text=SeverityEnum.INFO.get_text("In progress..."),
     reply_markup=ReplyKeyboardRemove(),
 )
-def on_remove_reply_keyboard(update: Update, context: CallbackContext):
-    time.sleep(1)
+async def on_remove_reply_keyboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await asyncio.sleep(1)
 
 
 @log_func(log)
 @access_check(log)
-@show_temp_message_decorator(
-    text=SeverityEnum.INFO.get_text("In progress {value}"),
-    progress_value=ProgressValue.RECTS_SMALL,
-)
-def on_request(update: Update, context: CallbackContext):
+async def on_request(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message = update.effective_message
-    reply_playlist(message.text, update, context, show_full=False)
+    with metrics.in_progress("bot_requests_in_progress"):
+        async with show_temp_message(
+            text=SeverityEnum.INFO.get_text("In progress {value}\n{progress}"),
+            update=update,
+            context=context,
+            progress_value=ProgressValue.RECTS_SMALL,
+        ) as temp_message:
+            deadline = get_deadline()
+
+            if Channel.is_url(message.text.strip()):
+                await reply_channel(
+                    message.text.strip(), update, context,
+                    temp_message=temp_message,
+                    deadline=deadline,
+                )
+                return
+
+            refs, other = get_playlist_refs(message.text)
+            if len(refs) < 2:
+                # NOTE: Без повторов ссылки, иначе повтор разобрался бы как фильтр
+                text = " ".join(refs + other) if refs else message.text
+                await reply_playlist(
+                    text, update, context,
+                    show_full=False,
+                    temp_message=temp_message,
+                    deadline=deadline,
+                )
+                return
+
+            if other:
+                text = "Filters are supported only for a single playlist"
+                await reply_message(text, update, context, severity=SeverityEnum.ERROR)
+                return
+
+            await reply_playlists(
+                refs, update, context, temp_message=temp_message, deadline=deadline
+            )
 
 
 @log_func(log)
 @access_check(log)
-def on_callback_get_full_playlist(update: Update, context: CallbackContext):
+async def on_callback_get_full_playlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     if query:
-        query.answer()
+        await query.answer()
 
     playlist_id = context.match.group(1)
-    reply_playlist(playlist_id, update, context, show_full=True)
+    await reply_playlist(playlist_id, update, context, show_full=True)
 
 
 @log_func(log)
 @access_check(log)
-def on_callback_get_filtered_playlist(update: Update, context: CallbackContext):
+async def on_callback_get_filtered_playlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     if query:
-        query.answer()
+        await query.answer()
 
     playlist_id, filters = context.match.groups()
     query = f"{playlist_id} {filters}"
-    reply_playlist(query, update, context, show_full=True)
+    await reply_playlist(query, update, context, show_full=True)
+
+
+async def get_playlist_from_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    playlist_id: str,
+) -> Playlist | None:
+    try:
+        return await get_playlist(playlist_id, update)
+    except QueueFullError as e:
+        text = f"Too many requests, please try again in {e.retry_after} seconds"
+        await reply_message(text, update, context, severity=SeverityEnum.ERROR)
+
+
+@log_func(log)
+@access_check(log)
+async def on_callback_playlist_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    page, playlist_id, ranges_text = context.match.groups()
+    playlist = await get_playlist_from_callback(update, context, playlist_id)
+    if not playlist:
+        return
+
+    ranges = parse_filters(ranges_text)
+    filters = get_filters_text(ranges)
+
+    # NOTE: После обновления кэша в плейлисте могло стать меньше видео
+    filtered_count, _, _ = playlist.index.get_total(ranges)
+    page_count = get_page_count(filtered_count)
+    page = min(int(page), page_count)
+
+    with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="get_description"):
+        text = get_description_playlist(playlist, filters=filters, page=page)
+
+    try:
+        with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="telegram_edit"):
+            await query.edit_message_text(
+                text,
+                reply_markup=get_markup_listing(playlist.id, ranges, page, page_count),
+            )
+    except BadRequest as e:
+        # Повторное нажатие той же кнопки, пока сообщение еще не обновилось
+        if "not modified" not in str(e):
+            raise
+
+
+@log_func(log)
+@access_check(log)
+async def on_callback_playlist_csv(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+
+    playlist_id, ranges_text = context.match.groups()
+    playlist = await get_playlist_from_callback(update, context, playlist_id)
+    if not playlist:
+        return
+
+    await reply_playlist_csv(playlist, parse_filters(ranges_text), update)
+
+
+async def remove_reply_markup(update: Update):
+    try:
+        await update.callback_query.edit_message_reply_markup(reply_markup=None)
+    except BadRequest as e:
+        # Кнопку уже убрали при прошлом нажатии
+        if "not modified" not in str(e):
+            raise
+
+
+@log_func(log)
+@access_check(log)
+async def on_callback_continue_playlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    await remove_reply_markup(update)
+
+    playlist_id, ranges_text = context.match.groups()
+    filters = get_filters_text(parse_filters(ranges_text))
+
+    async with show_temp_message(
+        text=SeverityEnum.INFO.get_text("In progress {value}\n{progress}"),
+        update=update,
+        context=context,
+        progress_value=ProgressValue.RECTS_SMALL,
+    ) as temp_message:
+        await reply_playlist(
+            f"{playlist_id} {filters}" if filters else playlist_id,
+            update, context,
+            show_full=False,
+            temp_message=temp_message,
+        )
 
 
 @log_func(log)
-def on_callback_generate_random_password(update: Update, context: CallbackContext):
+@access_check(log)
+async def on_callback_continue_channel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    await remove_reply_markup(update)
+
+    async with show_temp_message(
+        text=SeverityEnum.INFO.get_text("In progress {value}\n{progress}"),
+        update=update,
+        context=context,
+        progress_value=ProgressValue.RECTS_SMALL,
+    ) as temp_message:
+        # NOTE: В кнопке id канала, без адреса сайта он подходит только для @handle
+        await reply_channel(
+            Channel.get_url(context.match.group(1)), update, context,
+            temp_message=temp_message,
+        )
+
+
+@log_func(log)
+async def on_callback_generate_random_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     if query:
-        query.answer()
+        await query.answer()
 
     password = generate_new_password()
     set_bot_password(context, password)
 
     text = f"New password: {password}"
-    reply_message(
+    await reply_message(
         text, update, context,
         severity=SeverityEnum.INFO,
     )
 
 
 @log_func(log)
-def on_cancel_input_password(update: Update, context: CallbackContext):
+async def on_cancel_input_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     if query:
-        query.answer()
+        await query.answer()
 
     context.user_data[BotDataEnum.STATE] = None
 
     text = "You're canceled input password"
-    reply_message(
+    await reply_message(
         text, update, context,
         severity=SeverityEnum.INFO,
     )
 
 
-def on_error(update: Update, context: CallbackContext):
-    process_error(log, update, context)
+async def on_error(update: object, context: ContextTypes.DEFAULT_TYPE):
+    await process_error(log, update, context)
+
 
+def setup(app: Application):
+    set_bot_password(app)
 
-def setup(dp: Dispatcher):
-    set_bot_password(dp)
+    metrics.gauge(
+        "bot_update_queue_size",
+        app.update_queue.qsize,
+        help="Updates waiting for the application",
+    )
+    metrics.gauge(
+        "bot_concurrent_updates",
+        lambda: app.update_processor.current_concurrent_updates,
+        help="Updates being processed right now",
+    )
+    metrics.gauge(
+        "bot_progress_messages",
+        lambda: len(progress_scheduler),
+        help="Messages with progress waiting for the scheduler",
+    )
 
-    dp.add_handler(CommandHandler(COMMAND_START, on_start))
-    dp.add_handler(CommandHandler(COMMAND_HELP, on_start))
+    app.add_handler(CommandHandler(COMMAND_START, on_start))
+    app.add_handler(CommandHandler(COMMAND_HELP, on_start))
+    app.add_handler(CommandHandler(COMMAND_STATS, on_stats, FILTER_BY_ADMIN))
 
-    dp.add_handler(
+    app.add_handler(
         MessageHandler(
-            FILTER_BY_ADMIN & Filters.regex(PATTERN_GET_BOT_PASSWORD),
+            FILTER_BY_ADMIN & filters.Regex(PATTERN_GET_BOT_PASSWORD),
             on_get_bot_password,
         )
     )
-    dp.add_handler(
+    app.add_handler(
         CommandHandler(COMMAND_GET_BOT_PASSWORD, on_get_bot_password, FILTER_BY_ADMIN)
     )
 
-    dp.add_handler(
+    app.add_handler(
         MessageHandler(
-            FILTER_BY_ADMIN & Filters.regex(PATTERN_SET_BOT_PASSWORD),
+            FILTER_BY_ADMIN & filters.Regex(PATTERN_SET_BOT_PASSWORD),
             on_set_bot_password,
         )
     )
-    dp.add_handler(
+    app.add_handler(
         CommandHandler(COMMAND_SET_BOT_PASSWORD, on_set_bot_password, FILTER_BY_ADMIN)
     )
 
-    dp.add_handler(
+    app.add_handler(
         CommandHandler(COMMAND_REMOVE_REPLY_KEYBOARD, on_remove_reply_keyboard)
     )
-    dp.add_handler(
+    app.add_handler(
         MessageHandler(
-            Filters.regex(PATTERN_REMOVE_REPLY_KEYBOARD), on_remove_reply_keyboard
+            filters.Regex(PATTERN_REMOVE_REPLY_KEYBOARD), on_remove_reply_keyboard
         )
     )
 
-    dp.add_handler(MessageHandler(Filters.text, on_request))
+    app.add_handler(MessageHandler(filters.TEXT, on_request))
 
-    dp.add_handler(
+    app.add_handler(
         CallbackQueryHandler(on_callback_get_full_playlist, pattern=PATTERN_PLAYLIST_ID)
     )
-    dp.add_handler(
+    app.add_handler(
         CallbackQueryHandler(on_callback_get_filtered_playlist, pattern=PATTERN_PLAYLIST_ID_WITH_FILTERS)
     )
-    dp.add_handler(
+    app.add_handler(
+        CallbackQueryHandler(on_callback_playlist_page, pattern=PATTERN_PLAYLIST_PAGE)
+    )
+    app.add_handler(
+        CallbackQueryHandler(on_callback_playlist_csv, pattern=PATTERN_PLAYLIST_CSV)
+    )
+    app.add_handler(
+        CallbackQueryHandler(
+            on_callback_continue_playlist, pattern=PATTERN_CONTINUE_PLAYLIST
+        )
+    )
+    app.add_handler(
+        CallbackQueryHandler(
+            on_callback_continue_channel, pattern=PATTERN_CONTINUE_CHANNEL
+        )
+    )
+    app.add_handler(
         CallbackQueryHandler(
             on_callback_generate_random_password,
             pattern=PATTERN_GENERATE_RANDOM_PASSWORD,
         )
     )
-    dp.add_handler(
+    app.add_handler(
         CallbackQueryHandler(on_cancel_input_password, pattern=PATTERN_CANCEL)
     )
 
-    dp.add_error_handler(on_error)
+    app.add_error_handler(on_error)
+
+    # NOTE: JobQueue есть, только если установлен python-telegram-bot[job-queue]
+    if app.job_queue:
+        app.job_queue.run_repeating(
+            job_warm_refresh,
+            interval=WARM_REFRESH_INTERVAL_SECONDS,
+            first=WARM_REFRESH_INTERVAL_SECONDS,
+            name="warm_refresh",
+            job_kwargs=dict(max_instances=1, coalesce=True),
+        )
+    else:
+        log.warning("JobQueue is not available, background refresh is disabled")
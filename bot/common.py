@@ -13,11 +13,17 @@ from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import Union
 
-from telegram import Update, ReplyMarkup, Message
-from telegram.ext import CallbackContext
+from telegram import Update, Message
+from telegram.ext import ContextTypes
 
 import config
 from config import DIR_LOGS
+from third_party.auto_in_progress_message import ReplyMarkup
+from third_party.metrics import registry as metrics
+
+
+# NOTE: Время по этапам обработки сообщений (метка stage)
+METRIC_BOT_STAGE_SECONDS = "bot_stage_seconds"
 
 
 def get_logger(
@@ -52,7 +58,7 @@ def get_logger(
 def log_func(log: logging.Logger):
     def actual_decorator(func):
         @functools.wraps(func)
-        def wrapper(update: Update, context: CallbackContext):
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if update:
                 chat_id = user_id = first_name = last_name = username = language_code = None
 
@@ -86,7 +92,7 @@ def log_func(log: logging.Logger):
 
                 log.debug(msg)
 
-            return func(update, context)
+            return await func(update, context)
 
         return wrapper
 
@@ -102,10 +108,32 @@ class SeverityEnum(enum.Enum):
         return self.value.format(text=text)
 
 
-def reply_message(
+def split_text(text: str, max_length: int) -> list[str]:
+    """
+    Разбиение текста на части не длиннее max_length, по возможности
+    по границам строк
+    """
+
+    parts = []
+    while len(text) > max_length:
+        n = text.rfind("\n", 0, max_length + 1)
+        if n <= 0:
+            parts.append(text[:max_length])
+            text = text[max_length:]
+        else:
+            parts.append(text[:n])
+            text = text[n + 1:]
+
+    if text or not parts:
+        parts.append(text)
+
+    return parts
+
+
+async def reply_message(
     text: str,
     update: Update,
-    context: CallbackContext,
+    context: ContextTypes.DEFAULT_TYPE,
     severity: SeverityEnum = SeverityEnum.NONE,
     reply_markup: ReplyMarkup = None,
     quote: bool = True,
@@ -116,24 +144,28 @@ def reply_message(
     text = severity.get_text(text)
 
     result = []
-    for n in range(0, len(text), config.MAX_MESSAGE_LENGTH):
-        mess = text[n: n + config.MAX_MESSAGE_LENGTH]
-        result.append(
-            message.reply_text(
-                mess,
-                reply_markup=reply_markup,
-                quote=quote,
-                **kwargs
+    for mess in split_text(text, config.MAX_MESSAGE_LENGTH):
+        with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="telegram_reply"):
+            result.append(
+                await message.reply_text(
+                    mess,
+                    reply_markup=reply_markup,
+                    do_quote=quote,
+                    **kwargs
+                )
             )
-        )
 
     return result
 
 
-def process_error(log: logging.Logger, update: Update, context: CallbackContext):
+async def process_error(
+    log: logging.Logger,
+    update: object,
+    context: ContextTypes.DEFAULT_TYPE,
+):
     log.error("Error: %s\nUpdate: %s", context.error, update, exc_info=context.error)
-    if update:
-        reply_message(config.ERROR_TEXT, update, context, severity=SeverityEnum.ERROR)
+    if isinstance(update, Update) and update.effective_message:
+        await reply_message(config.ERROR_TEXT, update, context, severity=SeverityEnum.ERROR)
 
 
 log = get_logger(__file__, DIR_LOGS / "log.txt")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from dataclasses import replace
+from pathlib import Path
+
+import config
+from bot.common import METRIC_BOT_STAGE_SECONDS, log
+from third_party.metrics import registry as metrics
+from third_party.youtube_com.async_common import AsyncVideo
+from third_party.youtube_com.common import Playlist, Video, seconds_to_str
+
+
+class DurationResolver:
+    """
+    Досчитывание продолжительности видео, у которых в плейлисте ее нет
+    (например, у некоторых миксов и премьер): продолжительность берется
+    со страницы видео.
+
+    Страницы загружаются одновременно, но не больше concurrency сразу
+    и не больше max_videos на плейлист. Найденные продолжительности хранятся
+    в SQLite без срока. Если продолжительности нет и на странице видео
+    (трансляция или еще не вышедшая премьера), то видео не проверяется
+    повторно miss_ttl_seconds.
+
+    Досчитывание идет не дольше timeout_seconds и заканчивается за
+    DEADLINE_RESERVE_SECONDS до deadline запроса: то, что не успело
+    загрузиться, досчитается при следующей загрузке плейлиста. Видео,
+    страницу которого загрузить не удалось, не проверяется error_ttl_seconds.
+    """
+
+    # NOTE: Время на ответ пользователю после досчитывания
+    DEADLINE_RESERVE_SECONDS = 1
+
+    def __init__(
+        self,
+        db_file_name: str | Path,
+        concurrency: int,
+        max_videos: int,
+        miss_ttl_seconds: float,
+        timeout_seconds: float,
+        error_ttl_seconds: float,
+        log: logging.Logger | None = None,
+    ):
+        self.concurrency = concurrency
+        self.max_videos = max_videos
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self.log = log
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = threading.Lock()
+
+        # video_id -> когда не удалось загрузить страницу
+        self._errors: dict[str, float] = dict()
+
+        self._connect = sqlite3.connect(db_file_name, check_same_thread=False)
+        self._connect.execute(
+            """
+            CREATE TABLE IF NOT EXISTS video_duration (
+                id TEXT PRIMARY KEY,
+                duration_seconds INTEGER,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connect.commit()
+
+    def get_many(self, video_ids: list[str]) -> dict[str, int | None]:
+        """
+        Известные продолжительности. None - на странице видео ее не было,
+        а проверять снова еще рано.
+        """
+
+        items = dict()
+        min_miss_updated_at = time.time() - self.miss_ttl_seconds
+
+        # NOTE: SQLite ограничивает количество параметров в запросе
+        chunk_size = 500
+        for i in range(0, len(video_ids), chunk_size):
+            chunk = video_ids[i: i + chunk_size]
+            with self._lock:
+                rows = self._connect.execute(
+                    "SELECT id, duration_seconds, updated_at FROM video_duration "
+                    f"WHERE id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            for video_id, duration_seconds, updated_at in rows:
+                if duration_seconds or updated_at >= min_miss_updated_at:
+                    items[video_id] = duration_seconds
+
+        return items
+
+    def set_many(self, items: dict[str, int | None]):
+        updated_at = time.time()
+        with self._lock:
+            self._connect.executemany(
+                "INSERT OR REPLACE INTO video_duration (id, duration_seconds, updated_at) "
+                "VALUES (?, ?, ?)",
+                [
+                    (video_id, duration_seconds, updated_at)
+                    for video_id, duration_seconds in items.items()
+                ],
+            )
+            self._connect.commit()
+
+    async def _load(self, video_id: str) -> int | None:
+        async with self._semaphore:
+            with metrics.timer(METRIC_BOT_STAGE_SECONDS, stage="resolve_duration"):
+                return await AsyncVideo.get_duration_seconds(video_id)
+
+    def is_failed(self, video_id: str) -> bool:
+        failed_at = self._errors.get(video_id)
+        return failed_at is not None and time.time() - failed_at < self.error_ttl_seconds
+
+    def _set_failed(self, video_id: str):
+        now = time.time()
+        self._errors[video_id] = now
+
+        # Устаревшие ошибки убираются, чтобы словарь не рос без конца
+        if len(self._errors) > self.max_videos * 100:
+            self._errors = {
+                video_id: failed_at
+                for video_id, failed_at in self._errors.items()
+                if now - failed_at < self.error_ttl_seconds
+            }
+
+    async def load_many(
+        self,
+        video_ids: list[str],
+        deadline: float | None = None,
+    ) -> dict[str, int | None]:
+        """deadline - время по loop.time(), к нему незагруженные страницы отменяются"""
+
+        if not video_ids:
+            return dict()
+
+        loop = asyncio.get_running_loop()
+        tasks = {
+            asyncio.create_task(self._load(video_id)): video_id
+            for video_id in video_ids
+        }
+        try:
+            done, pending = await asyncio.wait(
+                tasks,
+                timeout=None if deadline is None else max(0, deadline - loop.time()),
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if pending:
+            metrics.inc(
+                "bot_resolve_durations_timeout_total",
+                len(pending),
+                help="Video pages not loaded before the resolve deadline",
+            )
+
+        items = dict()
+        for task in done:
+            video_id = tasks[task]
+            error = task.exception()
+            if error:
+                if self.log:
+                    self.log.warning(f"Failed to get duration of {video_id!r}: {error!r}")
+                self._set_failed(video_id)
+                continue
+
+            items[video_id] = task.result()
+
+        await asyncio.to_thread(self.set_many, items)
+        return items
+
+    async def resolve(self, playlist: Playlist, deadline: float | None = None) -> int:
+        """
+        Заполняет продолжительность видео плейлиста, у которых ее нет,
+        и пересчитывает общую продолжительность. Возвращает, у скольких
+        видео она теперь известна.
+
+        deadline - время по loop.time(), к которому нужно ответить пользователю.
+        """
+
+        unknown_ids = list(
+            dict.fromkeys(
+                video.id
+                for video in playlist.video_list
+                if video.duration_seconds is None
+            )
+        )
+        if not unknown_ids:
+            return 0
+
+        durations = await asyncio.to_thread(self.get_many, unknown_ids)
+
+        missing_ids = [
+            video_id
+            for video_id in unknown_ids
+            if video_id not in durations and not self.is_failed(video_id)
+        ]
+
+        resolve_deadline = asyncio.get_running_loop().time() + self.timeout_seconds
+        if deadline is not None:
+            resolve_deadline = min(
+                resolve_deadline, deadline - self.DEADLINE_RESERVE_SECONDS
+            )
+
+        durations.update(
+            await self.load_many(missing_ids[:self.max_videos], resolve_deadline)
+        )
+
+        resolved = 0
+        for i, video in enumerate(playlist.video_list):
+            if video.duration_seconds is not None:
+                continue
+
+            duration_seconds = durations.get(video.id)
+            if not duration_seconds:
+                continue
+
+            # NOTE: У VideoSummary duration_text - свойство
+            if isinstance(video, Video):
+                video = replace(video, duration_text=seconds_to_str(duration_seconds))
+            playlist.video_list[i] = replace(video, duration_seconds=duration_seconds)
+            resolved += 1
+
+        if resolved:
+            metrics.inc("bot_resolved_durations_total", resolved)
+
+            playlist.duration_seconds = sum(
+                video.duration_seconds
+                for video in playlist.video_list
+                if video.duration_seconds
+            )
+            playlist.duration_text = seconds_to_str(playlist.duration_seconds)
+
+            # NOTE: Индекс считается по длительностям, его нужно пересчитать
+            playlist.__dict__.pop("index", None)
+
+        return resolved
+
+
+duration_resolver = DurationResolver(
+    db_file_name=config.DB_FILE_NAME,
+    concurrency=config.DURATION_RESOLVE_CONCURRENCY,
+    max_videos=config.DURATION_RESOLVE_MAX_VIDEOS,
+    miss_ttl_seconds=config.DURATION_RESOLVE_MISS_TTL_SECONDS,
+    timeout_seconds=config.DURATION_RESOLVE_TIMEOUT_SECONDS,
+    error_ttl_seconds=config.DURATION_RESOLVE_ERROR_TTL_SECONDS,
+    log=log,
+)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import asyncio
+import itertools
+import math
+import time
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+import config
+from third_party.metrics import registry as metrics
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Job:
+    user_id: Hashable
+    start_tag: float
+    finish_tag: float
+    seq: int
+    started: asyncio.Future = field(repr=False)
+    on_position: Callable[[int], None] | None = field(default=None, repr=False)
+    position: int | None = None
+
+
+class JobScheduler:
+    """
+    Очередь тяжелых задач (загрузка плейлистов) с честным разделением между
+    пользователями.
+
+    Одновременно выполняется не больше max_in_flight задач, и не больше
+    max_per_user задач одного пользователя. Очередь - взвешенная справедливая
+    (start-time fair queuing): следующей запускается задача с наименьшей
+    виртуальной меткой, а метки задач одного пользователя растут на 1 / weight
+    за задачу. Поэтому тот, кто прислал десять плейлистов, не задерживает
+    остальных больше чем на одну свою задачу.
+
+    Если в очереди уже max_queue_size задач (или max_queued_per_user задач
+    пользователя), то run бросает QueueFullError с оценкой, через сколько
+    секунд стоит повторить.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_per_user: int,
+        max_queue_size: int,
+        max_queued_per_user: int,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_per_user = max_per_user
+        self.max_queue_size = max_queue_size
+        self.max_queued_per_user = max_queued_per_user
+
+        self.in_flight = 0
+        self.rejected = 0
+
+        self._queues: dict[Hashable, deque[_Job]] = dict()
+        self._running: dict[Hashable, int] = dict()
+        self._last_finish_tag: dict[Hashable, float] = dict()
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+        # Скользящее среднее длительности задачи - для подсказки при отказе
+        self._avg_duration = 1.0
+
+    @property
+    def queue_size(self) -> int:
+        return sum(map(len, self._queues.values()))
+
+    def get_retry_after(self) -> int:
+        pending = self.queue_size + self.in_flight
+        return max(1, math.ceil(self._avg_duration * pending / self.max_in_flight))
+
+    async def run(
+        self,
+        user_id: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        weight: float = 1,
+        on_position: Callable[[int], None] | None = None,
+    ) -> Any:
+        """
+        Выполнение func в очереди пользователя user_id. on_position вызывается
+        с номером в очереди (с 1), пока задача ждет запуска.
+        """
+
+        queue = self._queues.get(user_id)
+        if self.queue_size >= self.max_queue_size or (
+            queue and len(queue) >= self.max_queued_per_user
+        ):
+            self.rejected += 1
+            raise QueueFullError(self.get_retry_after())
+
+        start_tag = max(self._virtual_time, self._last_finish_tag.get(user_id, 0.0))
+        job = _Job(
+            user_id=user_id,
+            start_tag=start_tag,
+            finish_tag=start_tag + 1 / weight,
+            seq=next(self._seq),
+            started=asyncio.get_running_loop().create_future(),
+            on_position=on_position,
+        )
+        self._last_finish_tag[user_id] = job.finish_tag
+        self._queues.setdefault(user_id, deque()).append(job)
+
+        queued_at = time.monotonic()
+        self._dispatch()
+
+        try:
+            await job.started
+        except asyncio.CancelledError:
+            if not job.started.done() or job.started.cancelled():
+                self._remove(job)
+                self._dispatch()
+                raise
+
+            # NOTE: Задачу успели запустить - слот нужно вернуть
+            self._release(job, 0)
+            raise
+
+        started_at = time.monotonic()
+        metrics.observe(
+            "bot_job_wait_seconds",
+            started_at - queued_at,
+            help="Time spent by jobs in the queue",
+        )
+
+        try:
+            return await func()
+        finally:
+            self._release(job, time.monotonic() - started_at)
+
+    def _remove(self, job: _Job):
+        queue = self._queues.get(job.user_id)
+        if queue and job in queue:
+            queue.remove(job)
+        self._forget_if_idle(job.user_id)
+
+    def _forget_if_idle(self, user_id: Hashable):
+        if self._queues.get(user_id):
+            return
+
+        self._queues.pop(user_id, None)
+        if not self._running.get(user_id):
+            self._running.pop(user_id, None)
+            self._last_finish_tag.pop(user_id, None)
+
+    def _release(self, job: _Job, duration: float):
+        self.in_flight -= 1
+        self._running[job.user_id] -= 1
+        self._forget_if_idle(job.user_id)
+
+        if duration:
+            self._avg_duration = 0.9 * self._avg_duration + 0.1 * duration
+
+        self._dispatch()
+
+    def _get_next_job(self) -> _Job | None:
+        candidates = [
+            queue[0]
+            for user_id, queue in self._queues.items()
+            if queue and self._running.get(user_id, 0) < self.max_per_user
+        ]
+        if not candidates:
+            return
+
+        return min(candidates, key=lambda job: (job.start_tag, job.seq))
+
+    def _dispatch(self):
+        while self.in_flight < self.max_in_flight:
+            job = self._get_next_job()
+            if not job:
+                break
+
+            self._queues[job.user_id].popleft()
+
+            # NOTE: Ожидание отменили, но задача еще не успела убрать себя из очереди
+            if job.started.cancelled():
+                continue
+
+            self._virtual_time = max(self._virtual_time, job.start_tag)
+            self._running[job.user_id] = self._running.get(job.user_id, 0) + 1
+            self.in_flight += 1
+            job.started.set_result(None)
+
+        self._notify_positions()
+
+    def _notify_positions(self):
+        waiting = sorted(
+            (job for queue in self._queues.values() for job in queue),
+            key=lambda job: (job.start_tag, job.seq),
+        )
+        for position, job in enumerate(waiting, start=1):
+            if job.on_position and job.position != position:
+                job.position = position
+                job.on_position(position)
+
+
+job_scheduler = JobScheduler(
+    max_in_flight=config.JOB_MAX_IN_FLIGHT,
+    max_per_user=config.JOB_MAX_PER_USER,
+    max_queue_size=config.JOB_MAX_QUEUE_SIZE,
+    max_queued_per_user=config.JOB_MAX_QUEUED_PER_USER,
+)
+
+metrics.gauge("bot_jobs_queued", lambda: job_scheduler.queue_size)
+metrics.gauge("bot_jobs_in_flight", lambda: job_scheduler.in_flight)
+metrics.gauge("bot_jobs_rejected", lambda: job_scheduler.rejected)
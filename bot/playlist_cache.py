@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import asyncio
+import dataclasses
+import functools
+import pickle
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import config
+from bot.duration_resolver import DurationResolver, duration_resolver
+from bot.job_scheduler import QueueFullError
+from bot.single_flight import SingleFlight
+from third_party.metrics import registry as metrics
+from third_party.youtube_com.async_common import AsyncPlaylist
+from third_party.youtube_com.common import Playlist, PlaylistVideoListBuilder
+
+
+@dataclasses.dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+    coalesced: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def is_seq_covered(running_stop_after_seq: int | None, stop_after_seq: int | None) -> bool:
+    """Загрузка до running_stop_after_seq подходит тому, кому нужно до stop_after_seq"""
+
+    if running_stop_after_seq is None:
+        return True
+
+    return stop_after_seq is not None and running_stop_after_seq >= stop_after_seq
+
+
+class PlaylistCache:
+    """
+    Двухуровневый кэш плейлистов по их id: LRU в памяти и SQLite на диске.
+    Данные с диска переживают перезапуск бота.
+
+    Устаревшие (старше ttl_seconds) плейлисты остаются на диске в виде снимков
+    до snapshot_max_age_seconds - по ним плейлист обновляется инкрементально.
+
+    Одновременные запросы одного и того же плейлиста загружают его один раз.
+
+    Работа с SQLite и pickle в асинхронных методах идет в отдельном потоке
+    (asyncio.to_thread), чтобы не останавливать цикл событий. Память и база
+    под разными блокировками: поиск в памяти не ждет записи на диск.
+
+    Если передан duration_resolver, то у загруженных видео без
+    продолжительности она досчитывается перед сохранением в кэш, но не
+    дольше deadline того, кто загружает плейлист.
+    """
+
+    def __init__(
+        self,
+        db_file_name: str | Path,
+        ttl_seconds: float,
+        snapshot_max_age_seconds: float,
+        max_memory_items: int,
+        max_disk_items: int,
+        duration_resolver: DurationResolver | None = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_max_age_seconds = snapshot_max_age_seconds
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.duration_resolver = duration_resolver
+        self.stats = CacheStats()
+
+        # NOTE: _lock - для памяти и stats, _db_lock - для соединения с SQLite
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._single_flight = SingleFlight()
+
+        # playlist_id -> (updated_at, playlist)
+        self._memory: OrderedDict[str, tuple[float, Playlist]] = OrderedDict()
+
+        self._connect = sqlite3.connect(db_file_name, check_same_thread=False)
+        self._connect.execute(
+            """
+            CREATE TABLE IF NOT EXISTS playlist (
+                id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connect.commit()
+
+    def _is_fresh(self, updated_at: float, max_age_seconds: float = None) -> bool:
+        if max_age_seconds is None:
+            max_age_seconds = self.ttl_seconds
+
+        return time.time() - updated_at < max_age_seconds
+
+    def _set_memory(self, playlist_id: str, updated_at: float, playlist: Playlist):
+        self._memory[playlist_id] = updated_at, playlist
+        self._memory.move_to_end(playlist_id)
+
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.stats.memory_evictions += 1
+
+    def _get_memory(self, playlist_id: str) -> Playlist | None:
+        try:
+            updated_at, playlist = self._memory[playlist_id]
+        except KeyError:
+            return
+
+        if not self._is_fresh(updated_at):
+            del self._memory[playlist_id]
+            return
+
+        self._memory.move_to_end(playlist_id)
+        return playlist
+
+    def _get_disk(
+        self,
+        playlist_id: str,
+        max_age_seconds: float = None,
+    ) -> tuple[float, Playlist] | None:
+        with self._db_lock:
+            row = self._connect.execute(
+                "SELECT data, updated_at FROM playlist WHERE id = ?",
+                (playlist_id,),
+            ).fetchone()
+            if not row:
+                return
+
+            data, updated_at = row
+            if not self._is_fresh(updated_at, max_age_seconds):
+                return
+
+            self._connect.execute(
+                "UPDATE playlist SET accessed_at = ? WHERE id = ?",
+                (time.time(), playlist_id),
+            )
+            self._connect.commit()
+
+        return updated_at, pickle.loads(data)
+
+    def _set_disk(self, playlist_id: str, updated_at: float, playlist: Playlist):
+        data = pickle.dumps(playlist)
+
+        with self._db_lock:
+            self._connect.execute(
+                "INSERT OR REPLACE INTO playlist (id, data, updated_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (playlist_id, data, updated_at, updated_at),
+            )
+            self._evict_disk()
+            self._connect.commit()
+
+    def _evict_disk(self):
+        cursor = self._connect.execute(
+            "DELETE FROM playlist WHERE updated_at < ?",
+            (time.time() - self.snapshot_max_age_seconds,),
+        )
+        self.stats.disk_evictions += cursor.rowcount
+
+        cursor = self._connect.execute(
+            """
+            DELETE FROM playlist WHERE id IN (
+                SELECT id FROM playlist ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_disk_items,),
+        )
+        self.stats.disk_evictions += cursor.rowcount
+
+    def _get_from_memory(self, playlist_id: str) -> Playlist | None:
+        with self._lock:
+            playlist = self._get_memory(playlist_id)
+            if playlist:
+                self.stats.memory_hits += 1
+            return playlist
+
+    def _get_from_disk(self, playlist_id: str) -> Playlist | None:
+        item = self._get_disk(playlist_id)
+
+        with self._lock:
+            if not item:
+                self.stats.misses += 1
+                return
+
+            self.stats.disk_hits += 1
+            updated_at, playlist = item
+            self._set_memory(playlist_id, updated_at, playlist)
+            return playlist
+
+    def get(self, playlist_id: str) -> Playlist | None:
+        return self._get_from_memory(playlist_id) or self._get_from_disk(playlist_id)
+
+    async def aget(self, playlist_id: str) -> Playlist | None:
+        """Как get, но чтение с диска - в отдельном потоке"""
+
+        playlist = self._get_from_memory(playlist_id)
+        if playlist:
+            return playlist
+
+        return await asyncio.to_thread(self._get_from_disk, playlist_id)
+
+    def get_updated_at(self, playlist_id: str) -> float | None:
+        """Когда плейлист попал в кэш, без учета в статистике и LRU"""
+
+        with self._lock:
+            item = self._memory.get(playlist_id)
+            if item:
+                return item[0]
+
+        with self._db_lock:
+            row = self._connect.execute(
+                "SELECT updated_at FROM playlist WHERE id = ?",
+                (playlist_id,),
+            ).fetchone()
+            return row[0] if row else None
+
+    def get_snapshot(self, playlist_id: str) -> Playlist | None:
+        item = self._get_disk(playlist_id, self.snapshot_max_age_seconds)
+        if item:
+            _, playlist = item
+            return playlist
+
+    def set(self, playlist: Playlist) -> Playlist:
+        # NOTE: Context хранит весь ytInitialData и requests.Response (HTML страницы),
+        #       а для подсчета длительности хватает VideoSummary
+        playlist = playlist.to_summary()
+        updated_at = time.time()
+
+        with self._lock:
+            self._set_memory(playlist.id, updated_at, playlist)
+        self._set_disk(playlist.id, updated_at, playlist)
+
+        return playlist
+
+    async def get_or_fetch(
+        self,
+        url_or_id: str,
+        stop_after_seq: int | None = None,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        schedule: Callable[
+            [Callable[[], Awaitable[Playlist]]], Awaitable[Playlist]
+        ] | None = None,
+        deadline: float | None = None,
+    ) -> Playlist:
+        """
+        С stop_after_seq при промахе кэша загрузятся только видео до этого
+        номера. Такой неполный плейлист в кэш не попадает.
+
+        Плейлист одновременно загружается только один раз. К идущей загрузке
+        присоединяются, если она загружает не меньше видео (см. is_seq_covered),
+        иначе ждут ее окончания и загружают сами.
+
+        on_progress вызывается только у того, кто загружает плейлист, а не
+        ждет чужой загрузки.
+
+        Загрузка выполняется через schedule (см. JobScheduler.run), если он
+        передан. Ждущие чужой загрузки в очередь не попадают.
+
+        deadline (время по loop.time()) ограничивает досчитывание
+        продолжительностей (см. DurationResolver.resolve).
+        """
+
+        playlist_id, _ = Playlist.get_id_and_url(url_or_id)
+
+        playlist = await self.aget(playlist_id)
+        if playlist:
+            return playlist
+
+        fetch = functools.partial(
+            self._fetch, playlist_id, url_or_id, stop_after_seq, on_progress,
+            deadline=deadline,
+        )
+        if schedule:
+            fetch = functools.partial(schedule, fetch)
+
+        # NOTE: QueueFullError чужой загрузки - про очередь другого пользователя,
+        #       в этом случае загрузка начнется заново через свой schedule
+        playlist, is_shared = await self._single_flight.do(
+            playlist_id,
+            fetch,
+            retry_shared_on=(QueueFullError,),
+            scope=stop_after_seq,
+            is_covered=is_seq_covered,
+        )
+        if is_shared:
+            with self._lock:
+                self.stats.coalesced += 1
+
+        return playlist
+
+    async def refresh(
+        self,
+        playlist_id: str,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        schedule: Callable[
+            [Callable[[], Awaitable[Playlist]]], Awaitable[Playlist]
+        ] | None = None,
+    ) -> Playlist:
+        """
+        Загрузка плейлиста заново, даже если в кэше он еще свежий. Загрузка
+        инкрементальная, если есть снимок. Одновременные get_or_fetch того же
+        плейлиста дождутся ее, а не начнут свою.
+        """
+
+        fetch = functools.partial(
+            self._fetch, playlist_id, playlist_id, None, on_progress, force=True
+        )
+        if schedule:
+            fetch = functools.partial(schedule, fetch)
+
+        playlist, _ = await self._single_flight.do(
+            playlist_id,
+            fetch,
+            retry_shared_on=(QueueFullError,),
+            is_covered=is_seq_covered,
+        )
+        return playlist
+
+    async def _fetch(
+        self,
+        playlist_id: str,
+        url_or_id: str,
+        stop_after_seq: int | None = None,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        force: bool = False,
+        deadline: float | None = None,
+    ) -> Playlist:
+        # Плейлист мог загрузиться в другой задаче, пока эта проверяла кэш
+        if not force:
+            with self._lock:
+                playlist = self._get_memory(playlist_id)
+            if playlist:
+                return playlist
+
+        playlist = await AsyncPlaylist.get_from(
+            url_or_id,
+            previous=await asyncio.to_thread(self.get_snapshot, playlist_id),
+            stop_after_seq=stop_after_seq,
+            summary=True,
+            on_progress=on_progress,
+        )
+        if self.duration_resolver:
+            await self.duration_resolver.resolve(playlist, deadline)
+
+        if not playlist.is_complete:
+            return playlist
+
+        return await asyncio.to_thread(self.set, playlist)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+        with self._db_lock:
+            self._connect.execute("DELETE FROM playlist")
+            self._connect.commit()
+
+
+playlist_cache = PlaylistCache(
+    db_file_name=config.DB_FILE_NAME,
+    ttl_seconds=config.PLAYLIST_CACHE_TTL_SECONDS,
+    snapshot_max_age_seconds=config.PLAYLIST_CACHE_SNAPSHOT_MAX_AGE_SECONDS,
+    max_memory_items=config.PLAYLIST_CACHE_MAX_MEMORY_ITEMS,
+    max_disk_items=config.PLAYLIST_CACHE_MAX_DISK_ITEMS,
+    duration_resolver=duration_resolver if config.DURATION_RESOLVE_ENABLED else None,
+)
+
+for name in ["memory_hits", "disk_hits", "misses", "coalesced", "hit_rate"]:
+    metrics.gauge(
+        f"playlist_cache_{name}",
+        lambda name=name: getattr(playlist_cache.stats, name),
+    )
@@ -15,12 +15,29 @@ def pattern_to_command(pattern: re.Pattern) -> str:
 
 COMMAND_START = "start"
 COMMAND_HELP = "help"
+COMMAND_STATS = "stats"
 
 PATTERN_PLAYLIST_ID = re.compile("^playlist_id=(.+)$")
 PATTERN_PLAYLIST_ID_WITH_FILTERS = re.compile("^id=(.+) seqs=(.+)$")
+# NOTE: Страница списка видео и выгрузка в CSV. callback_data ограничены 64 байтами,
+#       поэтому ключи короткие, а фильтры - в виде format_ranges
+PATTERN_PLAYLIST_PAGE = re.compile(r"^pg=(\d+) (\S+) (\S+)$")
+PATTERN_PLAYLIST_CSV = re.compile(r"^csv (\S+) (\S+)$")
+# Дождаться загрузки, прерванной по REQUEST_DEADLINE_SECONDS
+PATTERN_CONTINUE_PLAYLIST = re.compile(r"^bg (\S+) (\S+)$")
+PATTERN_CONTINUE_CHANNEL = re.compile(r"^bg_channel (\S+)$")
 PATTERN_GENERATE_RANDOM_PASSWORD = re.compile("^generate_random_password$")
 PATTERN_CANCEL = re.compile("^cancel$")
 
+# NOTE: id плейлистов по префиксам: PL - обычные, OLAK5uy_ - альбомы,
+#       RD - миксы, UU - загрузки канала
+PLAYLIST_ID_REGEX = r"(?:PL[\w-]{16,32}|OLAK5uy_[\w-]{33}|RD[\w-]{11,}|UU[\w-]{22,24})"
+
+# Ссылка с list= или id плейлиста, отдельным словом в тексте (ищется через finditer)
+PATTERN_PLAYLIST_REF = re.compile(
+    rf"(?<!\S)(?:https?://\S+[?&]list=[\w-]+\S*|{PLAYLIST_ID_REGEX})(?!\S)"
+)
+
 PATTERN_GET_BOT_PASSWORD = re.compile("^Get bot password$", flags=re.IGNORECASE)
 COMMAND_GET_BOT_PASSWORD = pattern_to_command(PATTERN_GET_BOT_PASSWORD)
 
@@ -34,3 +51,22 @@ COMMAND_REMOVE_REPLY_KEYBOARD = pattern_to_command(PATTERN_REMOVE_REPLY_KEYBOARD
 if __name__ == "__main__":
     assert pattern_to_command(PATTERN_GET_BOT_PASSWORD) == "get_bot_password"
     assert COMMAND_GET_BOT_PASSWORD == "get_bot_password"
+
+    assert PATTERN_PLAYLIST_REF.fullmatch("PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO")
+    assert PATTERN_PLAYLIST_REF.fullmatch("RDGMEMQ1dJ7wXfLlqCjwV0xfSNbA")
+    assert PATTERN_PLAYLIST_REF.fullmatch(
+        "https://www.youtube.com/watch?v=4ewTMva83tQ&list=PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO"
+    )
+    assert not PATTERN_PLAYLIST_REF.search("1-1000000000000")
+    assert not PATTERN_PLAYLIST_REF.search("https://www.youtube.com/watch?v=4ewTMva83tQ")
+    assert not PATTERN_PLAYLIST_REF.search("PLAYLISTFILTER")
+    assert not PATTERN_PLAYLIST_REF.search("xPLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO")
+    assert [
+        m.group() for m in PATTERN_PLAYLIST_REF.finditer(
+            "PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO 1-5 PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO"
+        )
+    ] == ["PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO"] * 2
+
+    assert PATTERN_PLAYLIST_PAGE.match("pg=2 PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO 1-50,100-")
+    assert PATTERN_PLAYLIST_CSV.match("csv PLndO6DOY2cLyxQYX7pkDspTJ42JWx07AO 1-")
+    assert PATTERN_CONTINUE_CHANNEL.match("bg_channel @youtube/videos")
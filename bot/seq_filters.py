@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import re
+import sys
+
+
+# NOTE: Номер без верхней границы, например "100-"
+MAX_SEQ = sys.maxsize
+
+PATTERN_TERM = re.compile(
+    r"^(?P<exclude>!)?\s*(?P<start>\d*)\s*(?P<dash>-)?\s*(?P<end>\d*)$"
+)
+
+
+class FilterError(ValueError):
+    pass
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = merged[-1][0], max(merged[-1][1], end)
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def subtract_ranges(
+    ranges: list[tuple[int, int]],
+    excluded: list[tuple[int, int]],
+) -> list[tuple[int, int]]:
+    # NOTE: Оба списка отсортированы и без пересечений
+    result: list[tuple[int, int]] = []
+    i = 0
+    for start, end in ranges:
+        while i < len(excluded) and excluded[i][1] < start:
+            i += 1
+
+        j = i
+        while j < len(excluded) and excluded[j][0] <= end:
+            ex_start, ex_end = excluded[j]
+            if ex_start > start:
+                result.append((start, ex_start - 1))
+            start = ex_end + 1
+            j += 1
+
+        if start <= end:
+            result.append((start, end))
+
+    return result
+
+
+def parse_filters(text: str) -> list[tuple[int, int]]:
+    """
+    Разбор фильтра по номерам видео в список непересекающихся диапазонов
+    (start, end) включительно, отсортированных по возрастанию.
+
+    Через запятую: "5" - номер, "1-50" - диапазон, "100-" - от номера
+    и до конца, "-10" - с начала до номера. С "!" в начале - исключение.
+    Если есть только исключения, то они убираются из всего плейлиста.
+    Например: "1-50,60,100-", "!3,!7-9".
+    """
+
+    included: list[tuple[int, int]] = []
+    excluded: list[tuple[int, int]] = []
+
+    for term in text.split(","):
+        term = term.strip()
+        m = PATTERN_TERM.match(term)
+        if not term or not m or not (m["start"] or m["end"]):
+            raise FilterError(f"Invalid filter: {term!r}")
+
+        if m["dash"]:
+            start = int(m["start"]) if m["start"] else 1
+            end = int(m["end"]) if m["end"] else MAX_SEQ
+        elif m["end"]:
+            # Например "5 6" без дефиса
+            raise FilterError(f"Invalid filter: {term!r}")
+        else:
+            start = end = int(m["start"])
+
+        if start > end:
+            raise FilterError(f"Invalid range: {term!r}")
+
+        (excluded if m["exclude"] else included).append((start, end))
+
+    if not included:
+        included.append((1, MAX_SEQ))
+
+    return subtract_ranges(merge_ranges(included), merge_ranges(excluded))
+
+
+def format_ranges(ranges: list[tuple[int, int]]) -> str:
+    """
+    Обратное к parse_filters: самая короткая запись диапазонов,
+    например для callback_data кнопок.
+    """
+
+    if not ranges:
+        return "!1-"
+
+    terms = []
+    for start, end in ranges:
+        if start == end:
+            terms.append(str(start))
+        elif end == MAX_SEQ:
+            terms.append(f"{start}-")
+        else:
+            terms.append(f"{start}-{end}")
+
+    return ",".join(terms)
+
+
+if __name__ == "__main__":
+    assert parse_filters("5") == [(5, 5)]
+    assert parse_filters("1-3,2-5, 7") == [(1, 5), (7, 7)]
+    assert parse_filters("1-50,60,100-") == [(1, 50), (60, 60), (100, MAX_SEQ)]
+    assert parse_filters("-10,!3,!5-6") == [(1, 2), (4, 4), (7, 10)]
+    assert parse_filters("!1-5") == [(6, MAX_SEQ)]
+    assert parse_filters("1-10,!1-10") == []
+
+    assert format_ranges(parse_filters("1-50,60,100-")) == "1-50,60,100-"
+    assert format_ranges(parse_filters("1-3,2-5, 7")) == "1-5,7"
+    assert format_ranges(parse_filters("!1-5")) == "6-"
+    assert parse_filters(format_ranges([])) == []
+
+    for text in ["", "a", "1-2-3", "5-1", "!", "1,,2", "5 6"]:
+        try:
+            parse_filters(text)
+        except FilterError:
+            pass
+        else:
+            assert False, text
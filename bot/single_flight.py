@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import asyncio
+
+from typing import Any, Awaitable, Callable, Hashable, Type
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых вызовов: пока для ключа выполняется
+    корутина, остальные вызовы с тем же ключом ждут ее и получают тот же
+    результат (или то же исключение).
+
+    Корутина выполняется в отдельной задаче, поэтому отмена одного
+    из ждущих не отменяет загрузку для остальных.
+
+    У вызова может быть scope - сколько он делает, например до какого видео
+    загружается плейлист. Тогда к выполняющемуся вызову присоединяются,
+    только если is_covered(его scope, свой scope), иначе ждут его завершения
+    и вызывают сами. Так для ключа одновременно выполняется один вызов.
+    """
+
+    def __init__(self):
+        # key -> (задача, scope)
+        self._tasks: dict[Hashable, tuple[asyncio.Task, Any]] = dict()
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        retry_shared_on: tuple[Type[Exception], ...] = (),
+        scope: Any = None,
+        is_covered: Callable[[Any, Any], bool] | None = None,
+    ) -> tuple[Any, bool]:
+        """
+        Возвращает результат func и признак того, что он получен
+        из уже выполняющегося вызова.
+
+        Если чужой вызов упал с исключением из retry_shared_on, то ждущий
+        вызывает снова, уже со своим func. Это для ошибок, которые касаются
+        только того, кто начал вызов (например, QueueFullError его очереди).
+
+        scope и is_covered - см. описание класса.
+        """
+
+        while True:
+            task, task_scope = self._tasks.get(key, (None, None))
+
+            # NOTE: Завершенная задача убирается из _tasks колбэком, который
+            #       мог еще не успеть выполниться
+            is_shared = task is not None and not task.done()
+            if is_shared and is_covered and not is_covered(task_scope, scope):
+                # Результат чужого вызова не подходит, но и второй вызов
+                # параллельно с ним не нужен
+                await asyncio.wait([task])
+                continue
+
+            if not is_shared:
+                task = asyncio.ensure_future(func())
+                self._tasks[key] = task, scope
+                task.add_done_callback(
+                    lambda _, task=task: self._on_done(key, task)
+                )
+
+            try:
+                return await asyncio.shield(task), is_shared
+            except retry_shared_on:
+                if not is_shared:
+                    raise
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key, (None,))[0] is task:
+            del self._tasks[key]
+
+        # NOTE: Если все ждущие отменились, исключение иначе попадет в лог
+        #       как "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# NOTE: Фоновое обновление популярных плейлистов: их перезагружают до того,
+#       как кэш устареет, чтобы пользователи получали ответ сразу из кэша
+
+
+import asyncio
+import functools
+import logging
+import time
+
+from telegram.ext import ContextTypes
+
+import config
+from bot.common import log
+from bot.job_scheduler import JobScheduler, QueueFullError, job_scheduler
+from bot.playlist_cache import PlaylistCache, playlist_cache
+from third_party.metrics import registry as metrics
+from third_party.youtube_com.common import PlaylistVideoListBuilder
+
+
+# Отдельный "пользователь" в JobScheduler для фоновых загрузок
+WARM_REFRESH_USER_ID = "warm_refresh"
+
+
+class PlaylistPopularity:
+    """
+    Частота запросов плейлистов: у каждого id счетчик, который затухает
+    вдвое за half_life_seconds. Хранится не больше max_items самых частых.
+    """
+
+    def __init__(self, half_life_seconds: float, max_items: int):
+        self.half_life_seconds = half_life_seconds
+        self.max_items = max_items
+
+        # playlist_id -> (score, updated_at)
+        self._items: dict[str, tuple[float, float]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _get_score(self, playlist_id: str, now: float) -> float:
+        score, updated_at = self._items.get(playlist_id, (0.0, now))
+        return score * 0.5 ** ((now - updated_at) / self.half_life_seconds)
+
+    def record(self, playlist_id: str):
+        now = time.time()
+        self._items[playlist_id] = self._get_score(playlist_id, now) + 1, now
+
+        if len(self._items) > self.max_items:
+            self._items = {
+                playlist_id: (score, now)
+                for playlist_id, score in self.get_top(self.max_items, now=now)
+            }
+
+    def get_top(
+        self,
+        limit: int,
+        min_score: float = 0,
+        now: float = None,
+    ) -> list[tuple[str, float]]:
+        if now is None:
+            now = time.time()
+
+        items = [
+            (playlist_id, self._get_score(playlist_id, now))
+            for playlist_id in self._items
+        ]
+        items = [item for item in items if item[1] >= min_score]
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items[:limit]
+
+
+class WarmRefresher:
+    """
+    Раз в interval проверяет самые популярные плейлисты и перезагружает те,
+    кэш которых устареет в ближайшие ahead_seconds (или которых в кэше нет).
+
+    Запросы к YouTube ограничены бюджетом: не больше pages_per_hour порций
+    в час на все фоновые загрузки. Фоновые загрузки идут через JobScheduler
+    и только когда в нем нет ожидающих задач пользователей, т.е. когда бот
+    не нагружен.
+    """
+
+    def __init__(
+        self,
+        cache: PlaylistCache,
+        scheduler: JobScheduler,
+        popularity: PlaylistPopularity,
+        ahead_seconds: float,
+        max_playlists: int,
+        min_score: float,
+        pages_per_hour: float,
+        weight: float,
+        log: logging.Logger | None = None,
+    ):
+        self.cache = cache
+        self.scheduler = scheduler
+        self.popularity = popularity
+        self.ahead_seconds = ahead_seconds
+        self.max_playlists = max_playlists
+        self.min_score = min_score
+        self.pages_per_hour = pages_per_hour
+        self.weight = weight
+        self.log = log
+
+        self._budget = pages_per_hour
+        self._budget_updated_at = time.monotonic()
+
+    @property
+    def budget(self) -> float:
+        """Сколько порций еще можно загрузить, восполняется за час"""
+
+        now = time.monotonic()
+        self._budget = min(
+            self.pages_per_hour,
+            self._budget
+            + (now - self._budget_updated_at) * self.pages_per_hour / 3600,
+        )
+        self._budget_updated_at = now
+        return self._budget
+
+    def is_busy(self) -> bool:
+        return bool(self.scheduler.queue_size)
+
+    async def get_candidates(self) -> list[str]:
+        now = time.time()
+
+        items = []
+        for playlist_id, _ in self.popularity.get_top(
+            self.max_playlists, self.min_score
+        ):
+            updated_at = await asyncio.to_thread(self.cache.get_updated_at, playlist_id)
+            if (
+                updated_at is None
+                or updated_at + self.cache.ttl_seconds - now <= self.ahead_seconds
+            ):
+                items.append(playlist_id)
+
+        return items
+
+    async def refresh(self, playlist_id: str) -> int:
+        """Перезагрузка плейлиста, возвращает количество загруженных порций"""
+
+        pages = 0
+
+        def on_progress(builder: PlaylistVideoListBuilder):
+            nonlocal pages
+            pages = builder.loaded_pages
+
+        try:
+            await self.cache.refresh(
+                playlist_id,
+                on_progress=on_progress,
+                schedule=functools.partial(
+                    self.scheduler.run, WARM_REFRESH_USER_ID, weight=self.weight
+                ),
+            )
+            metrics.inc("bot_warm_refresh_total", result="ok")
+        except QueueFullError:
+            metrics.inc("bot_warm_refresh_total", result="queue_full")
+        except Exception:
+            metrics.inc("bot_warm_refresh_total", result="error")
+            if self.log:
+                self.log.exception(f"Error on warm refresh of {playlist_id!r}")
+
+        # NOTE: Даже неудачная загрузка - это хотя бы один запрос
+        return max(pages, 1)
+
+    async def process(self):
+        for playlist_id in await self.get_candidates():
+            if self.budget < 1:
+                metrics.inc("bot_warm_refresh_total", result="no_budget")
+                break
+
+            if self.is_busy():
+                metrics.inc("bot_warm_refresh_total", result="busy")
+                break
+
+            self._budget -= await self.refresh(playlist_id)
+
+
+async def job_warm_refresh(context: ContextTypes.DEFAULT_TYPE):
+    await warm_refresher.process()
+
+
+warm_refresher = WarmRefresher(
+    cache=playlist_cache,
+    scheduler=job_scheduler,
+    popularity=PlaylistPopularity(
+        half_life_seconds=config.WARM_REFRESH_HALF_LIFE_SECONDS,
+        max_items=config.WARM_REFRESH_MAX_TRACKED,
+    ),
+    ahead_seconds=config.WARM_REFRESH_AHEAD_SECONDS,
+    max_playlists=config.WARM_REFRESH_MAX_PLAYLISTS,
+    min_score=config.WARM_REFRESH_MIN_SCORE,
+    pages_per_hour=config.WARM_REFRESH_PAGES_PER_HOUR,
+    weight=config.WARM_REFRESH_WEIGHT,
+    log=log,
+)
+
+metrics.gauge("bot_warm_refresh_tracked", lambda: len(warm_refresher.popularity))
+metrics.gauge("bot_warm_refresh_budget", lambda: warm_refresher.budget)
@@ -18,6 +18,8 @@ DIR_LOGS.mkdir(parents=True, exist_ok=True)
 
 TOKEN_FILE_NAME = DIR / "TOKEN.txt"
 
+DB_FILE_NAME = DIR / "cache.sqlite"
+
 try:
     TOKEN = os.environ.get("TOKEN") or TOKEN_FILE_NAME.read_text("utf-8").strip()
     if not TOKEN:
@@ -38,4 +40,75 @@ USER_NAME_ADMINS = [
 
 MAX_MESSAGE_LENGTH = 4096
 
+# Full playlist listing is shown by pages of this many videos (one message edited by buttons)
+LISTING_PAGE_SIZE = 25
+
+# How many updates are processed at the same time.
+# Requests to YouTube are additionally paced by the rate limiter
+MAX_CONCURRENT_UPDATES = 256
+
+# After this the user gets what is loaded so far, loading continues in the background
+REQUEST_DEADLINE_SECONDS = 30
+
+PLAYLIST_CACHE_TTL_SECONDS = 60 * 60  # 1 hour
+# Older snapshots are not used for incremental refresh and are reloaded in full
+PLAYLIST_CACHE_SNAPSHOT_MAX_AGE_SECONDS = 24 * 60 * 60  # 1 day
+PLAYLIST_CACHE_MAX_MEMORY_ITEMS = 100
+PLAYLIST_CACHE_MAX_DISK_ITEMS = 10_000
+
+# Totals of channel videos/streams tabs (bot/channel_cache.py)
+CHANNEL_CACHE_TTL_SECONDS = 6 * 60 * 60  # 6 hours
+# Older totals are counted again in full, newer ones only get the new videos
+CHANNEL_CACHE_SNAPSHOT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60  # 1 week
+# An interrupted crawl continues from its checkpoint if it is not older than this
+CHANNEL_CHECKPOINT_MAX_AGE_SECONDS = 60 * 60  # 1 hour
+CHANNEL_CHECKPOINT_EVERY_PAGES = 20
+
+# Videos without duration in the playlist get it from the video page (bot/duration_resolver.py)
+DURATION_RESOLVE_ENABLED = True
+DURATION_RESOLVE_CONCURRENCY = 8
+DURATION_RESOLVE_MAX_VIDEOS = 200  # Per playlist
+# Video pages without duration (live streams, premieres) are checked again after this
+DURATION_RESOLVE_MISS_TTL_SECONDS = 24 * 60 * 60  # 1 day
+# Resolving stops after this (or before the request deadline), the rest is resolved on next loads
+DURATION_RESOLVE_TIMEOUT_SECONDS = 10
+# Videos whose page failed to load are not tried again for this long
+DURATION_RESOLVE_ERROR_TTL_SECONDS = 60 * 60  # 1 hour
+
+# Playlist loading jobs (bot/job_scheduler.py).
+# Cached playlists are answered without the queue
+JOB_MAX_IN_FLIGHT = 32
+# Not less than BATCH_CONCURRENCY, otherwise playlists of a batch wait for each other
+JOB_MAX_PER_USER = 4
+JOB_MAX_QUEUE_SIZE = 500
+JOB_MAX_QUEUED_PER_USER = 5
+# Admin jobs get a larger share of the queue
+JOB_ADMIN_WEIGHT = 2
+
+# Several playlists in one message
+BATCH_MAX_PLAYLISTS = 20
+BATCH_CONCURRENCY = 4
+
+# Kept-alive connections to YouTube: one per job that can run at the same time
+YOUTUBE_POOL_SIZE = JOB_MAX_IN_FLIGHT + DURATION_RESOLVE_CONCURRENCY
+
+# Background refresh of popular playlists (bot/warm_refresh.py)
+WARM_REFRESH_INTERVAL_SECONDS = 60
+# Playlists whose cache expires sooner than this are refreshed
+WARM_REFRESH_AHEAD_SECONDS = 10 * 60  # 10 minutes
+# Popularity is the request count that halves every WARM_REFRESH_HALF_LIFE_SECONDS
+WARM_REFRESH_HALF_LIFE_SECONDS = 6 * 60 * 60  # 6 hours
+WARM_REFRESH_MIN_SCORE = 3
+WARM_REFRESH_MAX_PLAYLISTS = 50
+WARM_REFRESH_MAX_TRACKED = 10_000
+# Upstream budget for background refresh, in playlist pages (up to 100 videos each)
+WARM_REFRESH_PAGES_PER_HOUR = 500
+# Share of JobScheduler for background refresh compared to a user
+WARM_REFRESH_WEIGHT = 0.5
+
+# Prometheus metrics endpoint: http://METRICS_HOST:METRICS_PORT/metrics
+# None - disabled
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9321
+
 ERROR_TEXT = "There was some problem. Please try again or try a little later..."
@@ -4,42 +4,67 @@
 __author__ = "ipetrash"
 
 
-import os
 import time
 
-# pip install python-telegram-bot
-from telegram.ext import Updater, Defaults
+# pip install python-telegram-bot[job-queue]
+from telegram.ext import Application
 
-from config import TOKEN
+from config import (
+    TOKEN,
+    METRICS_HOST,
+    METRICS_PORT,
+    MAX_CONCURRENT_UPDATES,
+    YOUTUBE_POOL_SIZE,
+)
 from bot.common import log
 from bot import commands
+from third_party.metrics import start_http_server
+from third_party.youtube_com.async_common import close_client
+from third_party.youtube_com.common import transport
+
+
+async def post_init(app: Application):
+    bot = app.bot
+    log.debug(f"Bot name {bot.first_name!r} ({bot.name})")
+
+
+async def post_shutdown(app: Application):
+    await close_client()
 
 
 def main():
     log.debug("Start")
 
-    cpu_count = os.cpu_count()
-    workers = cpu_count
-    log.debug(f"System: CPU_COUNT={cpu_count}, WORKERS={workers}")
+    # NOTE: Обработчики асинхронные, поэтому число одновременных запросов
+    #       ограничено не потоками, а MAX_CONCURRENT_UPDATES и темпом запросов
+    #       к YouTube (rate_limiter и лимиты соединений httpx)
+    log.debug(f"MAX_CONCURRENT_UPDATES={MAX_CONCURRENT_UPDATES}")
 
-    updater = Updater(
-        TOKEN,
-        workers=workers,
-        defaults=Defaults(run_async=True),
-    )
-    bot = updater.bot
-    log.debug(f"Bot name {bot.first_name!r} ({bot.name})")
+    # NOTE: До первого запроса, клиент httpx берет размер пула при создании
+    transport.set_pool_size(YOUTUBE_POOL_SIZE)
+    log.debug(f"YOUTUBE_POOL_SIZE={YOUTUBE_POOL_SIZE}")
 
-    dp = updater.dispatcher
-    commands.setup(dp)
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(MAX_CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    commands.setup(app)
 
-    updater.start_polling()
-    updater.idle()
+    # NOTE: Цикл событий не закрывается, чтобы main можно было перезапустить
+    app.run_polling(close_loop=False)
 
     log.debug("Finish")
 
 
 if __name__ == "__main__":
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT, host=METRICS_HOST)
+        log.debug(f"Metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
     while True:
         try:
             main()
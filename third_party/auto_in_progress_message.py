@@ -4,17 +4,32 @@
 __author__ = 'ipetrash'
 
 
+import asyncio
 import enum
 import functools
-import threading
+import logging
 import time
 
 from itertools import cycle
 
 # pip install python-telegram-bot
-from telegram import Update, ReplyMarkup, Message, ParseMode
-from telegram.ext import CallbackContext
-from telegram.error import BadRequest
+from telegram import (
+    Update,
+    Message,
+    ForceReply,
+    InlineKeyboardMarkup,
+    ReplyKeyboardMarkup,
+    ReplyKeyboardRemove,
+)
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+
+ReplyMarkup = InlineKeyboardMarkup | ReplyKeyboardMarkup | ReplyKeyboardRemove | ForceReply
+
+
+log = logging.getLogger(__name__)
 
 
 class ProgressValue(enum.Enum):
@@ -34,8 +49,10 @@ class ProgressValue(enum.Enum):
             text_fmt: str = 'In progress {value} ({seconds} seconds)',
             value: str = '',
             seconds: int = 0,
+            progress: str = '',
     ) -> str:
-        return text_fmt.format(value=value, seconds=seconds)
+        # NOTE: Без прогресса в конце останутся пустые строки
+        return text_fmt.format(value=value, seconds=seconds, progress=progress).rstrip()
 
     def get_init_text(
             self,
@@ -49,7 +66,7 @@ class ProgressValue(enum.Enum):
         )
 
 
-class InfinityProgressIndicatorThread(threading.Thread):
+class ProgressMessage:
     def __init__(
             self,
             text_fmt: str,
@@ -59,14 +76,7 @@ class InfinityProgressIndicatorThread(threading.Thread):
             reply_markup: ReplyMarkup = None,
             skip_progress: int = 1,
             init_seconds: int = 0,
-            *args,
-            **kwargs
     ):
-        super().__init__(*args, **kwargs)
-
-        self.daemon = True
-
-        self._stop = threading.Event()
         self._progress_bar = cycle(progress_value.value)
 
         for _ in range(skip_progress):
@@ -77,39 +87,130 @@ class InfinityProgressIndicatorThread(threading.Thread):
         self.parse_mode = parse_mode
         self.reply_markup = reply_markup
 
-        self._seconds: int = init_seconds
-        self.init_seconds: int = init_seconds
+        self.started_at: float = time.monotonic() - init_seconds
+        self.edited_at: float = time.monotonic()
 
-    def run(self):
-        self._seconds = self.init_seconds
+        # Текст, который уже показан у сообщения
+        self.text: str = None
 
-        while True:
-            time.sleep(1)
-            if self.is_stopped():
-                break
+        # Настоящий прогресс (например, сколько загружено), подставляется в {progress}
+        self.progress: str = ''
 
-            self._seconds += 1
+    def set_progress(self, progress: str):
+        self.progress = progress
 
-            text = ProgressValue.get_text(
-                text_fmt=self.text_fmt,
-                value=next(self._progress_bar),
-                seconds=self._seconds,
-            )
+    def get_next_text(self) -> str:
+        return ProgressValue.get_text(
+            text_fmt=self.text_fmt,
+            value=next(self._progress_bar),
+            seconds=int(time.monotonic() - self.started_at),
+            progress=self.progress,
+        )
+
+    async def edit(self, text: str):
+        await self.message.edit_text(
+            text=text,
+            parse_mode=self.parse_mode,
+            reply_markup=self.reply_markup,
+        )
+        self.text = text
+        self.edited_at = time.monotonic()
+
+
+class ProgressScheduler:
+    """
+    Одна задача на все сообщения с прогрессом вместо задачи на каждое сообщение.
+
+    Раз в interval секунд обновляет сообщения, которые не менялись хотя бы
+    min_edit_interval секунд (сначала те, что дольше всех ждут), но не больше
+    max_edits_per_second правок в секунду на все чаты. Правки одного такта
+    отправляются вместе. На RetryAfter от Telegram правки приостанавливаются
+    на указанное время.
+
+    Задача запускается при добавлении сообщения и завершается, когда сообщений
+    не осталось.
+    """
+
+    def __init__(
+            self,
+            interval: float = 1,
+            min_edit_interval: float = 3,
+            max_edits_per_second: float = 10,
+    ):
+        self.interval = interval
+        self.min_edit_interval = min_edit_interval
+        self.max_edits_per_second = max_edits_per_second
+
+        self._items: list[ProgressMessage] = []
+        self._task: asyncio.Task = None
+        self._paused_until: float = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: ProgressMessage):
+        self._items.append(item)
+
+        if not self._task or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def remove(self, item: ProgressMessage):
+        if item in self._items:
+            self._items.remove(item)
+
+    def _get_ready_items(self) -> list[ProgressMessage]:
+        now = time.monotonic()
+        items = [
+            item for item in self._items
+            if now - item.edited_at >= self.min_edit_interval
+        ]
+
+        items.sort(key=lambda item: item.edited_at)
+        return items[:max(1, int(self.max_edits_per_second * self.interval))]
+
+    async def _edit(self, item: ProgressMessage):
+        text = item.get_next_text()
+        if text == item.text:
+            return
+
+        try:
+            await item.edit(text)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if not isinstance(retry_after, (int, float)):
+                retry_after = retry_after.total_seconds()
+            self._paused_until = time.monotonic() + retry_after
+        except BadRequest as e:
+            # NOTE: Текст не поменялся - ожидаемо, это не ошибка
+            if 'message is not modified' not in str(e).lower():
+                self._on_edit_error(item)
+        except TelegramError:
+            self._on_edit_error(item)
+
+    def _on_edit_error(self, item: ProgressMessage):
+        log.warning('Failed to edit progress message', exc_info=True)
+
+        # NOTE: Следующая попытка - не раньше чем через min_edit_interval,
+        #       иначе сломанное сообщение пробовали бы править каждый такт
+        item.edited_at = time.monotonic()
+
+    async def process(self):
+        if time.monotonic() < self._paused_until:
+            return
+
+        await asyncio.gather(*map(self._edit, self._get_ready_items()))
+
+    async def _run(self):
+        while self._items:
+            await asyncio.sleep(self.interval)
 
             try:
-                self.message.edit_text(
-                    text=text,
-                    parse_mode=self.parse_mode,
-                    reply_markup=self.reply_markup,
-                )
-            except BadRequest:
-                pass
+                await self.process()
+            except Exception:
+                log.exception('Failed to update progress messages')
 
-    def stop(self):
-        self._stop.set()
 
-    def is_stopped(self) -> bool:
-        return self._stop.is_set()
+progress_scheduler = ProgressScheduler()
 
 
 class show_temp_message:
@@ -117,7 +218,7 @@ class show_temp_message:
             self,
             text: str,
             update: Update,
-            context: CallbackContext,
+            context: ContextTypes.DEFAULT_TYPE,
             parse_mode: ParseMode = None,
             reply_markup: ReplyMarkup = None,
             quote: bool = True,
@@ -134,39 +235,51 @@ class show_temp_message:
         self.message: Message = None
 
         self.progress_value = progress_value
-        self.thread_progress: InfinityProgressIndicatorThread = None
+        self.progress_message: ProgressMessage = None
 
-    def __enter__(self):
+    async def __aenter__(self):
         text = self.text
         if self.progress_value:
             text = self.progress_value.get_init_text(self.text)
 
-        self.message = self.update.effective_message.reply_text(
+        self.message = await self.update.effective_message.reply_text(
             text=text,
             parse_mode=self.parse_mode,
             reply_markup=self.reply_markup,
-            quote=self.quote,
+            do_quote=self.quote,
             **self.kwargs,
         )
 
         if self.progress_value:
-            self.thread_progress = InfinityProgressIndicatorThread(
+            self.progress_message = ProgressMessage(
                 text_fmt=self.text,
                 message=self.message,
                 progress_value=self.progress_value,
                 parse_mode=self.parse_mode,
                 reply_markup=self.reply_markup,
             )
-            self.thread_progress.start()
+            self.progress_message.text = text
+            progress_scheduler.add(self.progress_message)
 
         return self
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        if self.thread_progress:
-            self.thread_progress.stop()
+    def set_progress(self, progress: str):
+        """Текст для {progress}, покажется при следующем обновлении сообщения"""
+
+        if self.progress_message:
+            self.progress_message.set_progress(progress)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self.progress_message:
+            progress_scheduler.remove(self.progress_message)
 
         if self.message:
-            self.message.delete()
+            # NOTE: Ошибка удаления не должна подменять исключение из блока with
+            #       или прерывать ответ, который уже отправлен
+            try:
+                await self.message.delete()
+            except Exception:
+                log.warning('Failed to delete temp message', exc_info=True)
 
 
 def show_temp_message_decorator(
@@ -178,8 +291,8 @@ def show_temp_message_decorator(
 ):
     def actual_decorator(func):
         @functools.wraps(func)
-        def wrapper(update: Update, context: CallbackContext):
-            with show_temp_message(
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            async with show_temp_message(
                 text=text,
                 update=update,
                 context=context,
@@ -188,7 +301,7 @@ def show_temp_message_decorator(
                 progress_value=progress_value,
                 **kwargs,
             ):
-                return func(update, context)
+                return await func(update, context)
 
         return wrapper
     return actual_decorator
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# NOTE: Простые метрики в памяти процесса: счетчики, гистограммы и значения,
+#       которые вычисляются при выгрузке. Выгружаются в текстовом формате
+#       Prometheus (render) и в виде короткой сводки для людей (get_summary)
+
+
+import functools
+import threading
+import time
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+
+# Секунды: от запросов к памяти до загрузки большого плейлиста
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120,
+)
+
+LabelsType = tuple[tuple[str, str], ...]
+
+
+def get_labels(labels: dict[str, str]) -> LabelsType:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def escape_label_value(value: str) -> str:
+    """Экранирование значения метки, как требует текстовый формат Prometheus"""
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: LabelsType, **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+
+    return "{" + ",".join(f'{k}="{escape_label_value(v)}"' for k, v in items) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def get_quantile(self, q: float) -> float:
+        """Оценка квантиля по границам корзин (верхняя граница корзины)"""
+
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        total = 0
+        for i, count in enumerate(self.counts):
+            total += count
+            if total >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+
+        return float("inf")
+
+
+class Registry:
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self._help: dict[str, str] = dict()
+        self._counters: dict[str, dict[LabelsType, float]] = dict()
+        self._histograms: dict[str, dict[LabelsType, Histogram]] = dict()
+        self._gauges: dict[str, Callable[[], float]] = dict()
+        self._values: dict[str, float] = dict()
+
+    def _set_help(self, name: str, help: str):
+        if help:
+            self._help[name] = help
+
+    def inc(self, name: str, value: float = 1, help: str = "", **labels: str):
+        key = get_labels(labels)
+        with self._lock:
+            self._set_help(name, help)
+            values = self._counters.setdefault(name, dict())
+            values[key] = values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, help: str = "", **labels: str):
+        key = get_labels(labels)
+        with self._lock:
+            self._set_help(name, help)
+            values = self._histograms.setdefault(name, dict())
+            if key not in values:
+                values[key] = Histogram()
+            values[key].observe(value)
+
+    def gauge(self, name: str, func: Callable[[], float], help: str = ""):
+        """Значение берется из func в момент выгрузки"""
+
+        with self._lock:
+            self._set_help(name, help)
+            self._gauges[name] = func
+
+    def add(self, name: str, value: float, help: str = ""):
+        """Изменение значения, которое может и расти, и уменьшаться"""
+
+        with self._lock:
+            self._set_help(name, help)
+            self._values[name] = self._values.get(name, 0) + value
+            if name not in self._gauges:
+                self._gauges[name] = functools.partial(self._values.get, name, 0)
+
+    @contextmanager
+    def in_progress(self, name: str, help: str = "") -> Iterator[None]:
+        self.add(name, 1, help)
+        try:
+            yield
+        finally:
+            self.add(name, -1)
+
+    @contextmanager
+    def timer(self, name: str, help: str = "", **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, help, **labels)
+
+    def timed(self, name: str, help: str = "", **labels: str):
+        """Декоратор для timer"""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, help, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def get_sums(self, name: str, label: str) -> dict[str, float]:
+        """Суммы значений гистограммы name по значениям метки label"""
+
+        sums = dict()
+        with self._lock:
+            for labels, h in self._histograms.get(name, dict()).items():
+                value = dict(labels).get(label)
+                sums[value] = sums.get(value, 0.0) + h.sum
+
+        return sums
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus"""
+
+        lines = []
+
+        def add_header(name: str, type_name: str):
+            if name in self._help:
+                lines.append(f"# HELP {self.prefix}{name} {self._help[name]}")
+            lines.append(f"# TYPE {self.prefix}{name} {type_name}")
+
+        with self._lock:
+            for name, values in sorted(self._counters.items()):
+                add_header(name, "counter")
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{self.prefix}{name}{format_labels(labels)} {value}")
+
+            for name, values in sorted(self._histograms.items()):
+                add_header(name, "histogram")
+                full_name = self.prefix + name
+                for labels, histogram in sorted(values.items()):
+                    total = 0
+                    for le, count in zip(histogram.buckets, histogram.counts):
+                        total += count
+                        lines.append(
+                            f"{full_name}_bucket{format_labels(labels, le=str(le))} {total}"
+                        )
+                    lines.append(
+                        f"{full_name}_bucket{format_labels(labels, le='+Inf')} "
+                        f"{histogram.count}"
+                    )
+                    lines.append(f"{full_name}_sum{format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{full_name}_count{format_labels(labels)} {histogram.count}")
+
+            gauges = sorted(self._gauges.items())
+
+        # NOTE: Вне блокировки, т.к. функции сами могут брать блокировки
+        for name, func in gauges:
+            add_header(name, "gauge")
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines.append(f"{self.prefix}{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def get_summary(self) -> str:
+        """Сводка для людей: счетчики, время по этапам и текущие значения"""
+
+        lines = []
+
+        with self._lock:
+            for name, values in sorted(self._counters.items()):
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{name}{format_labels(labels)}: {value:g}")
+
+            for name, values in sorted(self._histograms.items()):
+                for labels, h in sorted(values.items()):
+                    avg = h.sum / h.count if h.count else 0.0
+                    lines.append(
+                        f"{name}{format_labels(labels)}: count={h.count}, "
+                        f"avg={avg * 1000:.1f} ms, p50<={h.get_quantile(0.5) * 1000:g} ms, "
+                        f"p95<={h.get_quantile(0.95) * 1000:g} ms"
+                    )
+
+            gauges = sorted(self._gauges.items())
+
+        for name, func in gauges:
+            try:
+                lines.append(f"{name}: {func():g}")
+            except Exception:
+                continue
+
+        return "\n".join(lines)
+
+
+registry = Registry()
+
+
+def start_http_server(port: int, host: str = "", path: str = "/metrics") -> ThreadingHTTPServer:
+    """Запуск сервера для Prometheus в фоновом потоке"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path != path:
+                self.send_error(404)
+                return
+
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server
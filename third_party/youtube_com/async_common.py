@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+# NOTE: Асинхронный вариант common.py: те же разбор данных и dataclass'ы,
+#       но сетевые запросы через httpx.AsyncClient, поэтому сотни загрузок
+#       могут идти одновременно в одном потоке
+
+
+import asyncio
+import time
+import weakref
+
+from typing import AsyncGenerator, Callable
+
+# pip install httpx==0.28.1
+import httpx
+
+from third_party.metrics import registry as metrics
+from third_party.youtube_com.common import (
+    CONNECT_TIMEOUT_SECONDS,
+    KEEPALIVE_EXPIRY_SECONDS,
+    METRIC_STAGE_SECONDS,
+    RETRIES,
+    TIMEOUT_SECONDS,
+    USER_AGENT,
+    transport,
+    Channel,
+    ChannelStats,
+    ChannelStatsBuilder,
+    Context,
+    InnertubeConfigError,
+    Playlist,
+    PlaylistVideoListBuilder,
+    TranscriptItem,
+    Video,
+    VideoSummary,
+    get_browse_request,
+    get_continuation_request,
+    get_page_data,
+    get_rate_limit_delay,
+    get_remaining_seconds,
+    get_raw_video_renderer_items_and_continuation_item,
+    process_browse_response,
+    process_response,
+    raise_if_error,
+    remember_innertube_cfg_data,
+)
+from third_party.youtube_com.transport import inc_connections
+
+
+MAX_CONNECTIONS = 100
+
+
+# NOTE: httpx.AsyncClient привязан к циклу событий, в котором создан
+_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+async def _on_request(request: httpx.Request):
+    # NOTE: Через trace httpcore сообщает об этапах запроса, по ним видно,
+    #       открывалось ли для него новое соединение
+    request.extensions["is_new_connection"] = False
+
+    async def trace(event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            request.extensions["is_new_connection"] = True
+
+    request.extensions["trace"] = trace
+
+
+async def _on_response(response: httpx.Response):
+    inc_connections(response.request.extensions.get("is_new_connection", False))
+
+
+def get_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+
+    client = _clients.get(loop)
+    if not client or client.is_closed:
+        client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            # NOTE: Accept all (required for mixes)
+            cookies={"SOCS": "CAI"},
+            # NOTE: У httpx повторяются только ошибки подключения
+            transport=httpx.AsyncHTTPTransport(
+                retries=RETRIES,
+                # NOTE: Размер пула общий с синхронным transport. Соединения
+                #       сверх него закрываются после запроса
+                limits=httpx.Limits(
+                    max_connections=max(MAX_CONNECTIONS, transport.pool_size),
+                    max_keepalive_connections=transport.pool_size,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            ),
+            timeout=httpx.Timeout(TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+            event_hooks={"request": [_on_request], "response": [_on_response]},
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+
+    return client
+
+
+async def close_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client:
+        await client.aclose()
+
+
+async def download_url_as_bytes(url: str) -> bytes:
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = await get_client().get(url)
+    process_response(rs, "thumbnail", is_paced=False)
+    rs.raise_for_status()
+    return rs.content
+
+
+async def load(url: str) -> tuple[httpx.Response, dict]:
+    await asyncio.sleep(get_rate_limit_delay())
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = await get_client().get(url)
+    process_response(rs, "page")
+    rs.raise_for_status()
+
+    page_data = get_page_data(rs)
+    remember_innertube_cfg_data(page_data)
+
+    data = page_data.get_yt_initial_data()
+    raise_if_error(data)
+
+    return rs, data
+
+
+async def load_browse(url: str, browse_id: str) -> tuple[httpx.Response, dict]:
+    api_url, params, browse_data, yt_cfg_data = get_browse_request(url, browse_id)
+    await asyncio.sleep(get_rate_limit_delay())
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = await get_client().post(api_url, params=params, json=browse_data)
+    process_response(rs, "browse")
+    return process_browse_response(rs, yt_cfg_data)
+
+
+async def load_continuation(
+    url: str,
+    yt_cfg_data: dict,
+    continuation_item: dict,
+) -> dict:
+    api_url, params, json_data = get_continuation_request(
+        url, yt_cfg_data, continuation_item
+    )
+
+    await asyncio.sleep(get_rate_limit_delay())
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = await get_client().post(api_url, params=params, json=json_data)
+    process_response(rs, "continuation")
+    rs.raise_for_status()
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="json_decode"):
+        return rs.json()
+
+
+class AsyncVideo:
+    @classmethod
+    async def get_from(cls, url_or_id: str) -> Video:
+        if url_or_id.startswith("http"):
+            url = url_or_id
+        else:
+            url = Video.get_url(url_or_id)
+
+        rs, yt_initial_data = await load(url)
+
+        # NOTE: Оригинальный url может поменяться, лучше брать тот, что будет после запроса
+        return Video.parse_from_page(str(rs.url), rs, yt_initial_data)
+
+    @classmethod
+    async def get_duration_seconds(cls, video_id: str) -> int | None:
+        rs, _ = await load(Video.get_url(video_id))
+        return Video.parse_duration_seconds_from_page(rs)
+
+    @classmethod
+    async def get_transcripts(cls, video: Video) -> list[TranscriptItem]:
+        request = video.get_transcripts_request()
+        if not request:
+            return []
+
+        url, params, json_data = request
+        with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+            rs = await get_client().post(url, json=json_data, params=params)
+        process_response(rs, "transcript", is_paced=False)
+
+        return Video.parse_transcripts(rs.json())
+
+    @classmethod
+    async def get_thumbnail_by_max_size(cls, video: Video) -> bytes:
+        return await download_url_as_bytes(video.get_url_thumbnail_by_max_size())
+
+    @classmethod
+    async def get_thumbnail_for_maxresdefault(cls, video: Video) -> bytes:
+        return await download_url_as_bytes(video.get_url_thumbnail_for_maxresdefault())
+
+
+class AsyncPlaylist:
+    @classmethod
+    async def load_context(cls, url_or_id: str) -> tuple[str, str, Context]:
+        playlist_id, url = Playlist.get_id_and_url(url_or_id)
+
+        rs, yt_initial_data = None, None
+
+        # NOTE: Миксы через browse не отдаются
+        if not Playlist.is_mix(playlist_id):
+            try:
+                rs, yt_initial_data = await load_browse(url, f"VL{playlist_id}")
+            except InnertubeConfigError:
+                pass
+
+        if not rs:
+            rs, yt_initial_data = await load(url)
+
+            # NOTE: Оригинальный url может поменяться, лучше брать тот, что будет после запроса
+            url = str(rs.url)
+
+        context = Context(
+            yt_initial_data=yt_initial_data,
+            rs=rs,
+        )
+        return playlist_id, url, context
+
+    @classmethod
+    async def iter_videos(
+        cls,
+        url_or_id: str,
+        summary: bool = False,
+        max_pages: int | None = None,
+    ) -> AsyncGenerator[Video | VideoSummary, None]:
+        playlist_id, url, context = await cls.load_context(url_or_id)
+        yt_cfg_data = get_page_data(context.rs).get_yt_cfg_data()
+        guard = Playlist.get_pagination_guard(playlist_id, max_pages)
+
+        # Первая порция видео будет в самой странице
+        items, continuation_item = get_raw_video_renderer_items_and_continuation_item(
+            context.yt_initial_data
+        )
+        while True:
+            for data_video in guard.filter_items(items):
+                if summary:
+                    yield VideoSummary.parse_from(data_video)
+                else:
+                    yield Video.parse_from(data_video, context)
+
+            continuation_item = guard.check_next(continuation_item)
+            if not continuation_item:
+                break
+
+            data = await load_continuation(url, yt_cfg_data, continuation_item)
+            items, continuation_item = get_raw_video_renderer_items_and_continuation_item(
+                data
+            )
+
+    @classmethod
+    async def get_video_list(
+        cls,
+        url: str,
+        context: Context,
+        video_count: int | None = None,
+        previous: Playlist | None = None,
+        stop_after_seq: int | None = None,
+        summary: bool = False,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        deadline: float | None = None,
+        max_pages: int | None = None,
+        is_mix: bool = False,
+    ) -> PlaylistVideoListBuilder:
+        yt_cfg_data = get_page_data(context.rs).get_yt_cfg_data()
+
+        builder = PlaylistVideoListBuilder(
+            context, video_count, previous, stop_after_seq, summary, on_progress,
+            max_pages, is_mix,
+        )
+
+        # Первая порция видео будет в самой странице
+        items, next_continuation_item = get_raw_video_renderer_items_and_continuation_item(
+            context.yt_initial_data
+        )
+        continuation_item = builder.add_page(None, items, next_continuation_item)
+
+        # Подгрузка следующих видео
+        while continuation_item:
+            timeout = asyncio.timeout(get_remaining_seconds(deadline))
+            try:
+                async with timeout:
+                    data = await load_continuation(url, yt_cfg_data, continuation_item)
+            except TimeoutError:
+                if not timeout.expired():
+                    raise
+
+                builder.is_complete = False
+                break
+
+            items, next_continuation_item = get_raw_video_renderer_items_and_continuation_item(
+                data
+            )
+            continuation_item = builder.add_page(
+                continuation_item, items, next_continuation_item
+            )
+
+        return builder
+
+    @classmethod
+    async def get_from(
+        cls,
+        url_or_id: str,
+        previous: Playlist | None = None,
+        stop_after_seq: int | None = None,
+        summary: bool = False,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        deadline_seconds: float | None = None,
+        max_pages: int | None = None,
+    ) -> Playlist:
+        """Параметры как у Playlist.get_from"""
+
+        deadline = None
+        if deadline_seconds is not None:
+            deadline = time.monotonic() + deadline_seconds
+
+        with metrics.timer(METRIC_STAGE_SECONDS, stage="playlist"):
+            playlist_id, url, context = await cls.load_context(url_or_id)
+            video_count = Playlist.get_video_count(context.yt_initial_data)
+
+            if previous and previous.id != playlist_id:
+                previous = None
+
+            builder = await cls.get_video_list(
+                url, context, video_count, previous, stop_after_seq, summary,
+                on_progress, deadline, max_pages, Playlist.is_mix(playlist_id),
+            )
+
+            playlist = Playlist.create(playlist_id, url, context, video_count, builder)
+            if summary:
+                playlist.context = None
+
+            return playlist
+
+
+class AsyncChannel:
+    @classmethod
+    async def get_stats(
+        cls,
+        url_or_handle: str,
+        previous: ChannelStats | None = None,
+        checkpoint: ChannelStats | None = None,
+        on_progress: Callable[[ChannelStatsBuilder], None] | None = None,
+        max_pages: int | None = None,
+    ) -> ChannelStats:
+        with metrics.timer(METRIC_STAGE_SECONDS, stage="channel"):
+            channel_id, url = Channel.get_id_and_url(url_or_handle)
+            rs, yt_initial_data = await load(url)
+            yt_cfg_data = get_page_data(rs).get_yt_cfg_data()
+
+            stats = Channel.create_stats(channel_id, url, yt_initial_data, checkpoint)
+            if stats is checkpoint:
+                previous = None
+
+            builder = ChannelStatsBuilder(
+                stats, previous, on_progress=on_progress, max_pages=max_pages
+            )
+
+            if stats.continuation_item:
+                continuation_item = builder.guard.check_next(stats.continuation_item)
+            else:
+                # Первая порция видео будет в самой странице
+                continuation_item = builder.add_page(
+                    *get_raw_video_renderer_items_and_continuation_item(yt_initial_data)
+                )
+
+            while continuation_item:
+                data = await load_continuation(url, yt_cfg_data, continuation_item)
+                continuation_item = builder.add_page(
+                    *get_raw_video_renderer_items_and_continuation_item(data)
+                )
+
+            return stats
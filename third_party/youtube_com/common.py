@@ -8,9 +8,11 @@ import json
 import re
 import time
 
-from dataclasses import dataclass, field
-from datetime import datetime, date
-from typing import Generator
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, replace
+from datetime import datetime, date, timedelta
+from functools import cached_property
+from typing import Callable, Generator
 from urllib.parse import urljoin, urlparse, parse_qs
 
 # pip install dpath==2.0.5
@@ -22,48 +24,155 @@ import requests
 # pip install tzlocal==4.1
 import tzlocal
 
+from third_party.metrics import registry as metrics
+from third_party.youtube_com.rate_limiter import RateLimiter
+from third_party.youtube_com.transport import Transport
+
 
 class AlertError(Exception):
     pass
 
 
+class InnertubeConfigError(Exception):
+    pass
+
+
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0"
 )
 BASE_URL = "https://www.youtube.com"
 
+# NOTE: Ограничения подгрузки порций (см. PaginationGuard). Порция плейлиста -
+#       до 100 видео. Миксы бесконечные, поэтому для них свой предел
+MAX_PAGES = 1000
+MIX_MAX_PAGES = 10
+
+# NOTE: Без timeout requests ждет ответа сколько угодно, и зависший запрос
+#       держит поток. Для async_common.py значения те же
+TIMEOUT_SECONDS = 30
+CONNECT_TIMEOUT_SECONDS = 10
+SESSION_TIMEOUT = (CONNECT_TIMEOUT_SECONDS, TIMEOUT_SECONDS)
+
+# NOTE: Пул соединений (по числу потоков, которые делают запросы, можно поменять
+#       через transport.set_pool_size) и повторы при ошибках соединения и 5xx.
+#       Для async_common.py значения те же
+POOL_SIZE = 32
+RETRIES = 2
+RETRY_BACKOFF_FACTOR = 0.5
+# Сколько неиспользуемое соединение держится открытым (для async_common.py,
+# у requests соединения в пуле не закрываются)
+KEEPALIVE_EXPIRY_SECONDS = 60
+
+
+transport = Transport(
+    pool_size=POOL_SIZE,
+    retries=RETRIES,
+    backoff_factor=RETRY_BACKOFF_FACTOR,
+    headers={"User-Agent": USER_AGENT},
+    # NOTE: Accept all (required for mixes)
+    # SOURCE: https://github.com/yt-dlp/yt-dlp/blob/ed24640943872c4cf30d7cc4601bec87b50ba03c/yt_dlp/extractor/youtube/_base.py#L614
+    cookies={"SOCS": "CAI"},
+)
+
+# NOTE: INNERTUBE_API_KEY и INNERTUBE_CONTEXT из ytcfg последней загруженной страницы.
+#       С ними первую порцию плейлиста можно запросить через API, без HTML
+innertube_cfg_data: dict = dict()
+
+# NOTE: Общий темп запросов к ютубу на весь процесс (и для async_common.py).
+#       Начальная скорость как у прежней паузы 0.5 секунды перед каждой порцией
+rate_limiter = RateLimiter(
+    rate=2,
+    min_rate=0.2,
+    max_rate=20,
+    burst=5,
+)
+
+# NOTE: Время по этапам загрузки и разбора (метка stage)
+METRIC_STAGE_SECONDS = "youtube_stage_seconds"
+
+metrics.gauge(
+    "youtube_rate_limit_rps",
+    lambda: rate_limiter.rate,
+    help="Current request rate allowed by the rate limiter",
+)
+
+
+def get_rate_limit_delay() -> float:
+    delay = rate_limiter.reserve()
+    metrics.observe(METRIC_STAGE_SECONDS, delay, stage="rate_limit_wait")
+    return delay
+
+
+def get_wire_bytes(rs: requests.Response) -> int:
+    """Размер ответа до распаковки (gzip, br)"""
+
+    # NOTE: У httpx.Response есть num_bytes_downloaded, а у requests
+    #       сколько прочитано из сокета знает urllib3
+    num_bytes = getattr(rs, "num_bytes_downloaded", None)
+    if num_bytes is None and rs.raw is not None:
+        num_bytes = rs.raw.tell()
 
-session = requests.Session()
-session.headers["User-Agent"] = USER_AGENT
+    return len(rs.content) if num_bytes is None else num_bytes
 
-# NOTE: Accept all (required for mixes)
-# SOURCE: https://github.com/yt-dlp/yt-dlp/blob/ed24640943872c4cf30d7cc4601bec87b50ba03c/yt_dlp/extractor/youtube/_base.py#L614
-session.cookies["SOCS"] = "CAI"
+
+def process_response(rs: requests.Response, kind: str, is_paced: bool = True):
+    if is_paced:
+        rate_limiter.feedback(rs.status_code)
+
+    metrics.inc(
+        "youtube_requests_total",
+        help="Requests to YouTube",
+        kind=kind,
+        status=rs.status_code,
+    )
+    metrics.inc(
+        "youtube_response_bytes_total",
+        len(rs.content),
+        help="Bytes received from YouTube",
+        kind=kind,
+    )
+    metrics.inc(
+        "youtube_wire_bytes_total",
+        get_wire_bytes(rs),
+        help="Bytes received from YouTube before decompression",
+        kind=kind,
+    )
 
 
 def process_text(text: str) -> str:
     return text.strip().replace("\xa0", " ").replace("\u202f", " ")
 
 
+def _compile_date_pattern(
+    regex_pattern: str,
+    months: list[str],
+) -> tuple[re.Pattern, list[str]]:
+    regex = regex_pattern % "|".join(months)
+    return re.compile(regex, flags=re.IGNORECASE), months
+
+
+DATE_PATTERNS: list[tuple[re.Pattern, list[str]]] = [
+    _compile_date_pattern(
+        r"(?P<month>%s) (?P<day>\d{,2}), (?P<year>\d{4})",
+        ['jan', 'feb', 'mar', 'apr', 'may', 'june', 'july', 'aug', 'sep', 'oct', 'nov', 'dec'],
+    ),
+    _compile_date_pattern(
+        r"(?P<day>\d{,2}) (?P<month>%s)\.? (?P<year>\d{4})",
+        ['янв', 'февр', 'мар', 'апр', 'мая', 'июн', 'июл', 'авг', 'сент', 'окт', 'нояб', 'дек'],
+    ),
+]
+
+
 def parse_date(value: str) -> date | None:
-    for regex_pattern, months in [
-        (
-            r"(?P<month>%s) (?P<day>\d{,2}), (?P<year>\d{4})",
-            ['jan', 'feb', 'mar', 'apr', 'may', 'june', 'july', 'aug', 'sep', 'oct', 'nov', 'dec'],
-        ),
-        (
-            r"(?P<day>\d{,2}) (?P<month>%s)\.? (?P<year>\d{4})",
-            ['янв', 'февр', 'мар', 'апр', 'мая', 'июн', 'июл', 'авг', 'сент', 'окт', 'нояб', 'дек'],
-        ),
-    ]:
-        regex = regex_pattern % "|".join(months)
-        m = re.search(regex, value, flags=re.IGNORECASE)
+    for regex, months in DATE_PATTERNS:
+        m = regex.search(value)
         if not m:
             continue
 
         return date(
             year=int(m["year"]),
-            month=months.index(m["month"]) + 1,
+            # NOTE: Шаблоны без учета регистра, а месяцы в списке - в нижнем
+            month=months.index(m["month"].lower()) + 1,
             day=int(m["day"]),
         )
 
@@ -93,19 +202,13 @@ def time_to_seconds(time_str: str) -> int:
 
 
 def download_url_as_bytes(url: str) -> bytes:
-    rs = session.get(url)
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = transport.get(url, timeout=SESSION_TIMEOUT)
+    process_response(rs, "thumbnail", is_paced=False)
     rs.raise_for_status()
     return rs.content
 
 
-def get_yt_cfg_data(html: str) -> dict:
-    m = re.search(r"ytcfg\.set\((\{.+?\})\);", html)
-    if not m:
-        raise Exception("Не удалось найти на странице ytcfg.set!")
-
-    return json.loads(m.group(1))
-
-
 def raise_if_error(yt_initial_data: dict):
     # NOTE: Example:
     """
@@ -154,38 +257,205 @@ def dict_merge(d1: dict, d2: dict):
             d1[k] = v
 
 
+def compile_path(path: str) -> tuple[str | int, ...]:
+    """
+    Разбор пути вида "title/runs/0/text" один раз, чтобы не делать
+    этого (как dpath.util.get) на каждый вызов
+    """
+
+    return tuple(int(part) if part.isdigit() else part for part in path.split("/"))
+
+
+_NOT_SET = object()
+
+
+def get_by_path(data: dict | list, path: tuple[str | int, ...], default=_NOT_SET):
+    """
+    Аналог dpath.util.get для путей без шаблонов, подготовленных через compile_path.
+    Если значения нет и default не задан, то будет KeyError.
+    """
+
+    try:
+        for key in path:
+            data = data[key]
+        return data
+
+    except (KeyError, IndexError, TypeError):
+        if default is _NOT_SET:
+            raise KeyError("/".join(map(str, path)))
+        return default
+
+
+@dataclass
+class PageData:
+    yt_initial_data: dict | None = None
+    yt_cfg_data: dict | None = None
+    yt_initial_player_response: dict | None = None
+
+    def get_yt_initial_data(self) -> dict:
+        if not self.yt_initial_data:
+            raise Exception("Could not find ytInitialData!")
+
+        return self.yt_initial_data
+
+    def get_yt_cfg_data(self) -> dict:
+        if not self.yt_cfg_data:
+            raise Exception("Не удалось найти на странице ytcfg.set!")
+
+        return self.yt_cfg_data
+
+    def get_yt_initial_player_response(self) -> dict:
+        if not self.yt_initial_player_response:
+            raise Exception("Не удалось найти на странице ytInitialPlayerResponse!")
+
+        return self.yt_initial_player_response
+
+
+# NOTE: Имена групп совпадают с полями PageData
+PATTERN_PAGE_DATA = re.compile(
+    r'(?P<yt_initial_data>window\["ytInitialData"\] = |var ytInitialData = )'
+    r"|(?P<yt_cfg_data>ytcfg\.set\()"
+    r"|(?P<yt_initial_player_response>ytInitialPlayerResponse = )"
+)
+JSON_DECODER = json.JSONDecoder()
+
+
+@metrics.timed(METRIC_STAGE_SECONDS, stage="extract_page_data")
+def extract_page_data(html: str) -> PageData:
+    """
+    Поиск всех встроенных в страницу JSON за один проход. Объект разбирается
+    через raw_decode прямо с места находки, поэтому его конец определяется
+    парсером JSON, а не регуляркой (которая могла ошибиться на "});" внутри строк),
+    и поиск продолжается уже после объекта.
+    """
+
+    page_data = PageData()
+    names = PATTERN_PAGE_DATA.groupindex.keys()
+
+    pos = 0
+    while m := PATTERN_PAGE_DATA.search(html, pos):
+        pos = m.end()
+
+        name = m.lastgroup
+        if getattr(page_data, name) is not None or not html.startswith("{", pos):
+            continue
+
+        try:
+            value, pos = JSON_DECODER.raw_decode(html, pos)
+        except json.JSONDecodeError:
+            continue
+
+        setattr(page_data, name, value)
+        if all(getattr(page_data, n) is not None for n in names):
+            break
+
+    return page_data
+
+
+def get_page_data(rs: requests.Response) -> PageData:
+    # NOTE: Результат запоминается в самом ответе, чтобы страница разбиралась один раз
+    try:
+        return rs._page_data
+    except AttributeError:
+        rs._page_data = extract_page_data(rs.text)
+        return rs._page_data
+
+
+def get_yt_cfg_data(html: str) -> dict:
+    return extract_page_data(html).get_yt_cfg_data()
+
+
 def get_yt_initial_data(html: str) -> dict | None:
-    patterns = [
-        re.compile(r'window\["ytInitialData"\] = (\{.+?\});'),
-        re.compile(r"var ytInitialData = (\{.+?\});"),
-    ]
+    return extract_page_data(html).yt_initial_data
+
 
-    for pattern in patterns:
-        m = pattern.search(html)
-        if m:
-            data_str = m.group(1)
-            return json.loads(data_str)
+def get_yt_initial_player_response(html: str) -> dict:
+    return extract_page_data(html).get_yt_initial_player_response()
+
+
+def remember_innertube_cfg_data(page_data: PageData):
+    yt_cfg_data = page_data.yt_cfg_data
+    if yt_cfg_data and "INNERTUBE_API_KEY" in yt_cfg_data:
+        innertube_cfg_data.update(
+            INNERTUBE_API_KEY=yt_cfg_data["INNERTUBE_API_KEY"],
+            INNERTUBE_CONTEXT=yt_cfg_data["INNERTUBE_CONTEXT"],
+        )
 
 
 def load(url: str) -> tuple[requests.Response, dict]:
-    rs = session.get(url)
+    time.sleep(get_rate_limit_delay())
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = transport.get(url, timeout=SESSION_TIMEOUT)
+    process_response(rs, "page")
     rs.raise_for_status()
 
-    data = get_yt_initial_data(rs.text)
-    if not data:
-        raise Exception("Could not find ytInitialData!")
+    page_data = get_page_data(rs)
+    remember_innertube_cfg_data(page_data)
 
+    data = page_data.get_yt_initial_data()
     raise_if_error(data)
 
     return rs, data
 
 
-def get_yt_initial_player_response(html: str) -> dict:
-    m = re.search(r"ytInitialPlayerResponse = (\{.+?\});", html)
-    if not m:
-        raise Exception("Не удалось найти на странице ytInitialPlayerResponse!")
+def get_browse_request(url: str, browse_id: str) -> tuple[str, dict, dict, dict]:
+    """
+    Возвращает url, параметры и тело POST-запроса к /youtubei/v1/browse,
+    а также настройки клиента (yt_cfg_data), с которыми он сделан.
+    Если настроек нет, то будет InnertubeConfigError.
+    """
+
+    yt_cfg_data = dict(innertube_cfg_data)
+    if not yt_cfg_data:
+        raise InnertubeConfigError("Нет сохраненных настроек INNERTUBE!")
+
+    browse_data = get_context_data(url, yt_cfg_data["INNERTUBE_CONTEXT"])
+    browse_data["browseId"] = browse_id
+
+    api_url = urljoin(BASE_URL, "/youtubei/v1/browse")
+    params = {
+        "key": yt_cfg_data["INNERTUBE_API_KEY"],
+        "prettyPrint": "false",
+    }
+    return api_url, params, browse_data, yt_cfg_data
 
-    return json.loads(m.group(1))
+
+def process_browse_response(
+    rs: requests.Response,
+    yt_cfg_data: dict,
+) -> tuple[requests.Response, dict]:
+    if rs.status_code in (400, 401, 403):
+        raise InnertubeConfigError(f"Запрос к API отклонен: HTTP {rs.status_code}")
+    rs.raise_for_status()
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="json_decode"):
+        data = rs.json()
+
+    # NOTE: Для пагинации ответ должен выглядеть как страница
+    rs._page_data = PageData(yt_initial_data=data, yt_cfg_data=yt_cfg_data)
+
+    raise_if_error(data)
+
+    return rs, data
+
+
+def load_browse(url: str, browse_id: str) -> tuple[requests.Response, dict]:
+    """
+    Аналог load, но данные запрашиваются сразу из /youtubei/v1/browse
+    с настройками клиента от прошлых загрузок страниц.
+    Если настроек нет или ютуб их не принял, то будет InnertubeConfigError.
+    """
+
+    api_url, params, browse_data, yt_cfg_data = get_browse_request(url, browse_id)
+    time.sleep(get_rate_limit_delay())
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = transport.post(
+            api_url, params=params, json=browse_data, timeout=SESSION_TIMEOUT
+        )
+    process_response(rs, "browse")
+    return process_browse_response(rs, yt_cfg_data)
 
 
 def get_context_data(url: str, innertube_context: dict) -> dict:
@@ -295,57 +565,288 @@ def get_api_url_from_continuation_item(url: str, continuation_item: dict) -> str
     return urljoin(url, api_url)
 
 
-def get_raw_video_renderer_items(yt_initial_data: dict) -> list[dict]:
+def get_continuation_request(
+    url: str,
+    yt_cfg_data: dict,
+    continuation_item: dict,
+) -> tuple[str, dict, dict]:
+    """Возвращает url, параметры и тело POST-запроса следующей порции"""
+
+    api_url = get_api_url_from_continuation_item(url, continuation_item)
+    params = {
+        "key": yt_cfg_data["INNERTUBE_API_KEY"],
+        "prettyPrint": "false",
+    }
+    json_data = get_context_with_continuation(url, yt_cfg_data, continuation_item)
+    return api_url, params, json_data
+
+
+def get_remaining_seconds(deadline: float | None) -> float | None:
+    """Сколько секунд осталось до deadline (по time.monotonic), None - без ограничения"""
+
+    if deadline is None:
+        return
+    return deadline - time.monotonic()
+
+
+def load_continuation(
+    url: str,
+    yt_cfg_data: dict,
+    continuation_item: dict,
+    timeout: float | None = None,
+) -> dict:
+    """
+    timeout - ограничение на весь запрос, если он меньше SESSION_TIMEOUT.
+    С ним запрос не повторяется: повторы с паузами вышли бы за срок.
+    """
+
+    api_url, params, json_data = get_continuation_request(
+        url, yt_cfg_data, continuation_item
+    )
+
+    time.sleep(get_rate_limit_delay())
+
+    session_timeout = SESSION_TIMEOUT
+    if timeout is not None:
+        # NOTE: У requests ограничения только на подключение и на паузы в чтении
+        timeout = max(timeout, 0.001)
+        session_timeout = (
+            min(CONNECT_TIMEOUT_SECONDS, timeout),
+            min(TIMEOUT_SECONDS, timeout),
+        )
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+        rs = transport.post(
+            api_url,
+            params=params,
+            json=json_data,
+            timeout=session_timeout,
+            retries=timeout is None,
+        )
+    process_response(rs, "continuation")
+    rs.raise_for_status()
+
+    with metrics.timer(METRIC_STAGE_SECONDS, stage="json_decode"):
+        return rs.json()
+
+
+VIDEO_RENDERER_KEYS = [
+    "gridVideoRenderer",
+    "videoRenderer",
+    "playlistVideoRenderer",
+    "playlistPanelVideoRenderer",
+    "playlistRenderer",
+]
+CONTINUATION_ITEM_KEY = "continuationItemRenderer"
+
+
+def find_values_by_keys(data: dict | list, keys: list[str]) -> dict[str, list]:
+    """
+    Аналог dpath.util.values(data, f"**/{key}") сразу для нескольких ключей
+    за один обход дерева. Порядок значений такой же, как у dpath: сначала
+    дочерние элементы узла, затем рекурсивно каждый из них.
+    """
+
+    found: dict[str, list] = {key: [] for key in keys}
+
+    stack: list[dict | list] = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in found:
+                    found[key].append(value)
+            children = node.values()
+        else:
+            children = node
+
+        # В обратном порядке, чтобы первым из стека достался первый дочерний элемент
+        stack += [
+            child for child in reversed(children) if isinstance(child, (dict, list))
+        ]
+
+    return found
+
+
+@metrics.timed(METRIC_STAGE_SECONDS, stage="find_renderers")
+def get_raw_video_renderer_items_and_continuation_item(
+    data: dict,
+) -> tuple[list[dict], dict | None]:
+    # NOTE: Раньше было по отдельному dpath.util.values(data, "**/...") на каждый
+    #       тип рендерера и еще один на continuationItemRenderer
+    found = find_values_by_keys(data, VIDEO_RENDERER_KEYS + [CONTINUATION_ITEM_KEY])
+
     items = []
-    for render in [
-        "**/gridVideoRenderer",
-        "**/videoRenderer",
-        "**/playlistVideoRenderer",
-        "**/playlistPanelVideoRenderer",
-        "**/playlistRenderer",
-    ]:
-        items += dpath.util.values(yt_initial_data, render)
+    for key in VIDEO_RENDERER_KEYS:
+        items += found[key]
+
+    # Может вернуться несколько continuationItemRenderer, берем первый
+    continuation_items = found[CONTINUATION_ITEM_KEY]
+    continuation_item = continuation_items[0] if continuation_items else None
+
+    return items, continuation_item
 
+
+def get_raw_video_renderer_items(yt_initial_data: dict) -> list[dict]:
+    items, _ = get_raw_video_renderer_items_and_continuation_item(yt_initial_data)
     return items
 
 
-def get_generator_raw_video_list_from_data(
+def get_continuation_token(continuation_item: dict) -> str | None:
+    key = "continuationCommand"
+    for command in find_values_by_keys(continuation_item, [key])[key]:
+        if isinstance(command, dict) and "token" in command:
+            return command["token"]
+
+    return
+
+
+class PaginationGuard:
+    """
+    Защита от бесконечной подгрузки порций. Загрузка останавливается, если:
+        * continuation-токен уже был;
+        * с dedup=True в порции не осталось новых видео;
+        * загружено max_pages порций.
+
+    С dedup=True повторы видео (по videoId) отбрасываются. Это нужно для миксов:
+    в их порциях одни и те же видео приходят снова и снова. В обычных
+    плейлистах одно видео может быть несколько раз, и даже порции могут
+    совпадать, поэтому там остановка только по токенам и max_pages.
+
+    Причина остановки - в stop_reason.
+    """
+
+    def __init__(self, max_pages: int | None = None, dedup: bool = False):
+        self.max_pages = max_pages
+        self.dedup = dedup
+
+        self.pages = 0
+        self.stop_reason: str | None = None
+
+        self._tokens: set[str] = set()
+        self._video_ids: set[str] = set()
+
+    @classmethod
+    def for_playlist(cls, is_mix: bool, max_pages: int | None = None) -> "PaginationGuard":
+        """По умолчанию MAX_PAGES порций, у миксов - MIX_MAX_PAGES и без повторов видео"""
+
+        if max_pages is None:
+            max_pages = MIX_MAX_PAGES if is_mix else MAX_PAGES
+
+        return cls(max_pages, dedup=is_mix)
+
+    def reset(self):
+        """Забыть видео и токены, например перед повторной загрузкой с начала"""
+
+        self._tokens.clear()
+        self._video_ids.clear()
+
+    def _stop(self, reason: str):
+        self.stop_reason = reason
+        metrics.inc(
+            "youtube_pagination_stops_total",
+            help="Pagination stopped before the last page",
+            reason=reason,
+        )
+
+    def filter_items(self, items: list[dict]) -> list[dict]:
+        """Видео порции без повторов. Вызывается на каждую загруженную порцию"""
+
+        self.pages += 1
+
+        if not self.dedup:
+            return items
+
+        new_items = []
+        for item in items:
+            video_id = item.get("videoId")
+            if video_id:
+                if video_id in self._video_ids:
+                    continue
+                self._video_ids.add(video_id)
+
+            new_items.append(item)
+
+        if items and not new_items:
+            self._stop("no_new_videos")
+
+        return new_items
+
+    def check_next(self, continuation_item: dict | None) -> dict | None:
+        """continuation_item, если следующую порцию стоит загружать, иначе None"""
+
+        if not continuation_item or self.stop_reason:
+            return
+
+        if self.max_pages is not None and self.pages >= self.max_pages:
+            self._stop("max_pages")
+            return
+
+        token = get_continuation_token(continuation_item)
+        if token:
+            if token in self._tokens:
+                self._stop("repeated_token")
+                return
+            self._tokens.add(token)
+
+        return continuation_item
+
+
+def get_generator_raw_pages_from_data(
     yt_initial_data: dict,
     rs: requests.Response,
-) -> Generator[dict, None, None]:
-    yt_cfg_data = get_yt_cfg_data(rs.text)
-    innertube_api_key = yt_cfg_data["INNERTUBE_API_KEY"]
+    continuation_item: dict | None = None,
+    guard: PaginationGuard | None = None,
+    url: str | None = None,
+) -> Generator[tuple[dict | None, list[dict]], None, None]:
+    """
+    Возвращает порции видео вместе с continuationItemRenderer, которым порция
+    была загружена (у первой порции, что есть в самой странице, он None).
+    Если передан continuation_item, загрузка начнется с него, а не с начала.
 
-    # Первая порция видео будет в самой странице
-    yield from get_raw_video_renderer_items(yt_initial_data)
+    guard ограничивает подгрузку (см. PaginationGuard), по умолчанию - только
+    повторы и MAX_PAGES порций.
 
-    data = yt_initial_data
+    url - адрес страницы для запросов порций. Если rs - ответ /youtubei/v1/browse,
+    то его нужно передать: в адресе ответа есть ключ API.
+    """
 
-    # Подгрузка следующих видео
-    while True:
-        time.sleep(0.5)
+    if url is None:
+        url = rs.url
+    yt_cfg_data = get_page_data(rs).get_yt_cfg_data()
 
-        try:
-            # Может вернуться несколько continuationItemRenderer, берем первый
-            continuation_item = dpath.util.values(data, "**/continuationItemRenderer")[0]
-        except (KeyError, IndexError):
-            break
+    if guard is None:
+        guard = PaginationGuard(MAX_PAGES)
 
-        url_next_page_data = get_api_url_from_continuation_item(
-            rs.url, continuation_item
+    if continuation_item:
+        continuation_item = guard.check_next(continuation_item)
+    else:
+        # Первая порция видео будет в самой странице
+        items, next_continuation_item = get_raw_video_renderer_items_and_continuation_item(
+            yt_initial_data
         )
+        yield None, guard.filter_items(items)
 
-        next_page_data = get_context_with_continuation(
-            rs.url, yt_cfg_data, continuation_item
-        )
-        rs = session.post(
-            url_next_page_data,
-            params={"key": innertube_api_key},
-            json=next_page_data,
+        continuation_item = guard.check_next(next_continuation_item)
+
+    # Подгрузка следующих видео
+    while continuation_item:
+        data = load_continuation(url, yt_cfg_data, continuation_item)
+
+        items, next_continuation_item = get_raw_video_renderer_items_and_continuation_item(
+            data
         )
-        data = rs.json()
+        yield continuation_item, guard.filter_items(items)
+
+        continuation_item = guard.check_next(next_continuation_item)
 
-        yield from get_raw_video_renderer_items(data)
+
+def get_generator_raw_video_list_from_data(
+    yt_initial_data: dict,
+    rs: requests.Response,
+) -> Generator[dict, None, None]:
+    for _, items in get_generator_raw_pages_from_data(yt_initial_data, rs):
+        yield from items
 
 
 @dataclass
@@ -378,15 +879,23 @@ class TranscriptItem:
     start_time_str: str
     text: str
 
+    PATH_START_TIME_STR = compile_path("startTimeText/simpleText")
+    PATH_TEXT = compile_path("0/text")
+
     @classmethod
     def get_from(cls, transcript_segment_renderer: dict) -> "TranscriptItem":
+        # NOTE: Аналог dpath.util.get(transcript_segment_renderer, "**/runs/0/text")
+        runs: list = find_values_by_keys(transcript_segment_renderer, ["runs"])["runs"]
+        if not runs:
+            raise KeyError("**/runs/0/text")
+
         return cls(
             start_ms=int(transcript_segment_renderer["startMs"]),
             end_ms=int(transcript_segment_renderer["endMs"]),
-            start_time_str=dpath.util.get(
-                transcript_segment_renderer, "startTimeText/simpleText"
+            start_time_str=get_by_path(
+                transcript_segment_renderer, cls.PATH_START_TIME_STR
             ),
-            text=dpath.util.get(transcript_segment_renderer, "**/runs/0/text"),
+            text=get_by_path(runs[0], cls.PATH_TEXT),
         )
 
 
@@ -406,11 +915,18 @@ class Video:
     is_lasy: bool = True
     context: Context = field(default=None, repr=False, compare=False)
 
+    # NOTE: Пути разбираются один раз, т.к. parse_from вызывается на каждое видео
+    PATH_URL = compile_path("navigationEndpoint/commandMetadata/webCommandMetadata/url")
+    PATH_TITLE_RUNS_TEXT = compile_path("title/runs/0/text")
+    PATH_TITLE_SIMPLE_TEXT = compile_path("title/simpleText")
+    PATH_LENGTH_TEXT = compile_path("lengthText/simpleText")
+    PATH_SEQ = compile_path("index/simpleText")
+    PATH_DATE_TEXT = compile_path("dateText/simpleText")
+    PATH_THUMBNAILS = compile_path("thumbnail/thumbnails")
+
     @classmethod
     def parse_url(cls, data_video: dict) -> str:
-        url_video = dpath.util.get(
-            data_video, "navigationEndpoint/commandMetadata/webCommandMetadata/url"
-        )
+        url_video = get_by_path(data_video, cls.PATH_URL)
         return urljoin(BASE_URL, url_video)
 
     @classmethod
@@ -420,9 +936,9 @@ class Video:
                 return title
 
         try:
-            return dpath.util.get(data_video, "title/runs/0/text")
+            return get_by_path(data_video, cls.PATH_TITLE_RUNS_TEXT)
         except KeyError:
-            return dpath.util.get(data_video, "title/simpleText")
+            return get_by_path(data_video, cls.PATH_TITLE_SIMPLE_TEXT)
 
     @classmethod
     def parse_duration_seconds(cls, data_video: dict) -> int:
@@ -432,13 +948,20 @@ class Video:
         except KeyError:
             # Если есть продолжительность в секундах в виде текста, пробуем распарсить
             try:
-                text = dpath.util.get(data_video, "lengthText/simpleText")
+                text = get_by_path(data_video, cls.PATH_LENGTH_TEXT)
                 duration_seconds = time_to_seconds(text)
             except KeyError:
                 duration_seconds = None
 
         return duration_seconds
 
+    @classmethod
+    def parse_seq(cls, data_video: dict) -> int | None:
+        try:
+            return int(get_by_path(data_video, cls.PATH_SEQ))
+        except (KeyError, TypeError, ValueError):
+            return
+
     def get_url_thumbnail_by_max_size(self) -> str:
         return max(self.thumbnails, key=lambda x: (x.width, x.height)).url
 
@@ -465,13 +988,11 @@ class Video:
     @classmethod
     def get_is_live_now(cls, video: dict) -> bool:
         # Стримы имеют значок BADGE_STYLE_TYPE_LIVE_NOW
-        try:
-            badges = dpath.util.values(video, "**/metadataBadgeRenderer/style")
-            return "BADGE_STYLE_TYPE_LIVE_NOW" in badges
-        except KeyError:
-            pass
-
-        return False
+        key = "metadataBadgeRenderer"
+        return any(
+            isinstance(badge, dict) and badge.get("style") == "BADGE_STYLE_TYPE_LIVE_NOW"
+            for badge in find_values_by_keys(video, [key])[key]
+        )
 
     @classmethod
     def parse_from(
@@ -494,31 +1015,29 @@ class Video:
         else:
             duration_text = None
 
-        try:
-            seq = int(data_video["index"]["simpleText"])
-        except:
-            seq = None
+        seq = cls.parse_seq(data_video)
 
-        try:
-            create_date_raw: str | None = process_text(
-                data_video["dateText"]["simpleText"]
-            )
-        except:
-            create_date_raw = None
+        create_date_raw: str | None = get_by_path(
+            data_video, cls.PATH_DATE_TEXT, default=None
+        )
+        if create_date_raw is not None:
+            create_date_raw = process_text(create_date_raw)
 
-        try:
-            create_date: date | None = parse_date(create_date_raw)
-        except:
-            create_date = None
+        create_date: date | None = None
+        if create_date_raw is not None:
+            try:
+                create_date = parse_date(create_date_raw)
+            except ValueError:
+                pass
 
         thumbnails = [
             Thumbnail.get_from(thumbnail)
-            for thumbnail in dpath.util.values(data_video, "thumbnail/thumbnails/*")
+            for thumbnail in get_by_path(data_video, cls.PATH_THUMBNAILS, default=[])
         ]
 
         try:
             view_count = int(data_video["viewCount"])
-        except:
+        except (KeyError, TypeError, ValueError):
             view_count = None
 
         context = Context(data_video=data_video)
@@ -561,9 +1080,17 @@ class Video:
         rs, yt_initial_data = load(url)
 
         # NOTE: Оригинальный url может поменяться, лучше брать тот, что будет после запроса
-        url = rs.url
+        return cls.parse_from_page(rs.url, rs, yt_initial_data)
 
-        yt_cfg_data = get_yt_cfg_data(rs.text)
+    @classmethod
+    def parse_from_page(
+        cls,
+        url: str,
+        rs: requests.Response,
+        yt_initial_data: dict,
+    ) -> "Video":
+        page_data = get_page_data(rs)
+        yt_cfg_data = page_data.get_yt_cfg_data()
         context = Context(
             yt_initial_data=yt_initial_data,
             yt_cfg_data=yt_cfg_data,
@@ -571,7 +1098,7 @@ class Video:
         )
 
         data_video = dpath.util.get(yt_initial_data, "**/videoPrimaryInfoRenderer")
-        yt_initial_player_response = get_yt_initial_player_response(rs.text)
+        yt_initial_player_response = page_data.get_yt_initial_player_response()
 
         # NOTE: Костыль, чтобы старый код, парсящий видео из плейлистов и других страниц,
         #       в parse_from смог разобрать
@@ -586,7 +1113,22 @@ class Video:
 
         return video
 
-    def get_transcripts(self) -> list[TranscriptItem]:
+    @classmethod
+    def parse_duration_seconds_from_page(cls, rs: requests.Response) -> int | None:
+        """
+        Продолжительность видео из ytInitialPlayerResponse страницы видео,
+        без разбора всего видео. У трансляций и премьер ее нет.
+        """
+
+        player_response = get_page_data(rs).get_yt_initial_player_response()
+        try:
+            return int(player_response["videoDetails"]["lengthSeconds"]) or None
+        except (KeyError, TypeError, ValueError):
+            return
+
+    def get_transcripts_request(self) -> tuple[str, dict, dict] | None:
+        """Возвращает url, параметры и тело POST-запроса субтитров"""
+
         yt_cfg_data = self.context.yt_cfg_data
         innertube_api_key = yt_cfg_data["INNERTUBE_API_KEY"]
         context = get_context_data(self.url, yt_cfg_data["INNERTUBE_CONTEXT"])
@@ -597,7 +1139,7 @@ class Video:
             default=None,
         )
         if not params_get_transcript_endpoint:
-            return []
+            return
 
         context["params"] = params_get_transcript_endpoint
 
@@ -606,11 +1148,356 @@ class Video:
             "key": innertube_api_key,
             "prettyPrint": "false",
         }
-        rs = session.post(url, json=context, params=params)
-        rs_data = rs.json()
+        return url, params, context
+
+    @classmethod
+    def parse_transcripts(cls, rs_data: dict) -> list[TranscriptItem]:
+        transcript_items = find_values_by_keys(rs_data, ["transcriptSegmentRenderer"])
+        return [
+            TranscriptItem.get_from(item)
+            for item in transcript_items["transcriptSegmentRenderer"]
+        ]
+
+    def get_transcripts(self) -> list[TranscriptItem]:
+        request = self.get_transcripts_request()
+        if not request:
+            return []
+
+        url, params, json_data = request
+        with metrics.timer(METRIC_STAGE_SECONDS, stage="http"):
+            rs = transport.post(url, json=json_data, params=params, timeout=SESSION_TIMEOUT)
+        process_response(rs, "transcript", is_paced=False)
+
+        return self.parse_transcripts(rs.json())
+
+
+@dataclass(slots=True)
+class VideoSummary:
+    """
+    Компактная запись о видео для подсчета длительности: без Context,
+    миниатюр и прочих полей Video. Полное видео загружается через get_video.
+    """
+
+    id: str
+    title: str
+    duration_seconds: int | None = None
+    seq: int | None = None
+
+    @property
+    def url(self) -> str:
+        return Video.get_url(self.id)
+
+    @property
+    def duration_text(self) -> str | None:
+        if self.duration_seconds:
+            return seconds_to_str(self.duration_seconds)
+
+    @classmethod
+    def parse_from(cls, data_video: dict) -> "VideoSummary":
+        return cls(
+            id=data_video["videoId"],
+            title=Video.parse_title(data_video),
+            duration_seconds=Video.parse_duration_seconds(data_video),
+            seq=Video.parse_seq(data_video),
+        )
+
+    @classmethod
+    def get_from_video(cls, video: Video) -> "VideoSummary":
+        return cls(
+            id=video.id,
+            title=video.title,
+            duration_seconds=video.duration_seconds,
+            seq=video.seq,
+        )
+
+    def get_video(self) -> Video:
+        return Video.get_from(self.id)
+
+
+@dataclass
+class PlaylistPage:
+    # Индекс первого видео порции в Playlist.video_list
+    start: int
+    # Чем порция была загружена, у первой порции (из самой страницы) это None
+    continuation_item: dict | None = field(default=None, repr=False)
+
+
+class PlaylistVideoListBuilder:
+    """
+    Сборка видео плейлиста по порциям. Сам ничего не загружает: add_page
+    возвращает continuationItemRenderer порции, которую нужно загрузить следующей,
+    или None, если загружать больше нечего. Так одна логика работает и с
+    синхронной, и с асинхронной загрузкой.
+
+    Если передан previous (прошлый снимок того же плейлиста), то загружаются
+    только порции, нужные для сверки с ним: как только очередная порция совпала
+    с видео из previous со сдвигом, равным изменению количества видео, остальные
+    видео берутся из previous без запросов. Если первая порция не изменилась,
+    а видео стало больше, то загрузка продолжится с последней порции previous.
+
+    NOTE: Замена видео без изменения их количества после первой порции так
+          не обнаружить, поэтому снимки стоит периодически загружать полностью.
+
+    Если передан stop_after_seq, то загрузка остановится, как только будет
+    видео с этим номером, а is_complete станет False. Так же is_complete
+    будет False, если загрузку прервали по deadline (см. Playlist.get_from).
+
+    С summary=True вместо Video будут VideoSummary.
+
+    on_progress вызывается после каждой разобранной порции, в loaded_pages
+    и loaded_videos - сколько порций и видео загружено на текущий момент.
+
+    Подгрузка ограничена PaginationGuard: не больше max_pages порций и без
+    повторов токенов. У миксов (is_mix=True) еще и без повторов видео,
+    а max_pages - их обычный конец, поэтому is_complete остается True.
+    У плейлистов после max_pages is_complete будет False.
+    """
+
+    def __init__(
+        self,
+        context: Context,
+        video_count: int | None = None,
+        previous: "Playlist | None" = None,
+        stop_after_seq: int | None = None,
+        summary: bool = False,
+        on_progress: Callable[["PlaylistVideoListBuilder"], None] | None = None,
+        max_pages: int | None = None,
+        is_mix: bool = False,
+    ):
+        self.context = context
+        self.video_count = video_count
+        self.previous = previous
+        self.stop_after_seq = stop_after_seq
+        self.summary = summary
+        self.on_progress = on_progress
+        self.is_mix = is_mix
+
+        self.guard = PaginationGuard.for_playlist(is_mix, max_pages)
+
+        self.video_list: list[Video | VideoSummary] = []
+        self.pages: list[PlaylistPage] = []
+        self.is_complete = True
+
+        self.loaded_pages = 0
+        self.loaded_videos = 0
+
+        self._can_reuse = bool(
+            previous
+            and previous.is_complete
+            and previous.video_list
+            and video_count is not None
+            and previous.video_count is not None
+        )
+        self._previous_ids: list[str] = (
+            [v.id for v in previous.video_list] if self._can_reuse else []
+        )
+        self._allow_resume = True
+        self._resumed_page: PlaylistPage | None = None
+
+        self._first_page: list[Video | VideoSummary] = []
+        self._first_page_next_continuation_item: dict | None = None
+
+    def add_page(
+        self,
+        continuation_item: dict | None,
+        items: list[dict],
+        next_continuation_item: dict | None,
+    ) -> dict | None:
+        items = self.guard.filter_items(items)
+        next_continuation_item = self._add_page(
+            continuation_item, items, next_continuation_item
+        )
+
+        self.loaded_pages += 1
+        self.loaded_videos += len(items)
+        if self.on_progress:
+            self.on_progress(self)
+
+        if next_continuation_item and self._is_stop_seq_reached():
+            self.is_complete = False
+            return
+
+        next_continuation_item = self.guard.check_next(next_continuation_item)
+        if self.guard.stop_reason == "max_pages" and not self.is_mix:
+            self.is_complete = False
+
+        return next_continuation_item
+
+    def _is_stop_seq_reached(self) -> bool:
+        if self.stop_after_seq is None or not self.video_list:
+            return False
+
+        # NOTE: Видео идут по возрастанию номеров
+        last_seq = self.video_list[-1].seq
+        return last_seq is not None and last_seq >= self.stop_after_seq
+
+    def _add_page(
+        self,
+        continuation_item: dict | None,
+        items: list[dict],
+        next_continuation_item: dict | None,
+    ) -> dict | None:
+        with metrics.timer(METRIC_STAGE_SECONDS, stage="parse_videos"):
+            if self.summary:
+                page = [VideoSummary.parse_from(data_video) for data_video in items]
+            else:
+                page = [
+                    Video.parse_from(data_video, self.context) for data_video in items
+                ]
+
+        metrics.inc("youtube_pages_total", help="Playlist pages parsed")
+        metrics.inc("youtube_videos_total", len(page), help="Playlist videos parsed")
+
+        if self._resumed_page:
+            return self._add_resumed_page(continuation_item, page, next_continuation_item)
+
+        start = len(self.video_list)
+        self.video_list += page
+        self.pages.append(PlaylistPage(start=start, continuation_item=continuation_item))
+
+        if start == 0:
+            self._first_page = page
+            self._first_page_next_continuation_item = next_continuation_item
+
+        if not self._can_reuse or not page:
+            return next_continuation_item
+
+        previous = self.previous
+        count_delta = self.video_count - previous.video_count
+        page_ids = [v.id for v in page]
+
+        # Порция совпала с previous - дальше плейлист не менялся
+        previous_start = start - count_delta
+        previous_end = previous_start + len(page)
+        if (
+            previous_start >= 0
+            and self._previous_ids[previous_start:previous_end] == page_ids
+        ):
+            for video in previous.video_list[previous_end:]:
+                if count_delta and video.seq is not None:
+                    video = replace(video, seq=video.seq + count_delta)
+                self.video_list.append(video)
+
+            # NOTE: Если номера видео сдвинулись, то и continuation у порций другие
+            if not count_delta:
+                self.pages += [p for p in previous.pages if p.start >= previous_end]
+
+            return
+
+        if (
+            self._allow_resume
+            and start == 0
+            and count_delta > 0
+            and len(previous.pages) > 1
+            and self._previous_ids[:len(page)] == page_ids
+        ):
+            # Если в плейлист добавили видео в конец, то достаточно перезагрузить
+            # последнюю известную порцию и все, что после нее
+            last_page = previous.pages[-1]
+            self.video_list = page + previous.video_list[len(page):last_page.start]
+            self.pages = previous.pages[:-1]
+            self._resumed_page = last_page
+            return last_page.continuation_item
+
+        return next_continuation_item
+
+    def _add_resumed_page(
+        self,
+        continuation_item: dict | None,
+        page: list[Video | VideoSummary],
+        next_continuation_item: dict | None,
+    ) -> dict | None:
+        last_page = self._resumed_page
+        self._resumed_page = None
+
+        # Порция должна начинаться с тех же видео, иначе изменения не только в конце
+        previous_tail_ids = self._previous_ids[last_page.start:]
+        page_ids = [v.id for v in page]
+        if page_ids[:len(previous_tail_ids)] != previous_tail_ids:
+            # Сверяем по порциям с начала
+            self._allow_resume = False
+            self.guard.reset()
+            self.video_list = list(self._first_page)
+            self.pages = [PlaylistPage(start=0)]
+            return self._first_page_next_continuation_item
+
+        # Дальше только новые видео
+        self._can_reuse = False
+        self.pages.append(
+            PlaylistPage(start=len(self.video_list), continuation_item=continuation_item)
+        )
+        self.video_list += page
+
+        return next_continuation_item
+
+
+@dataclass
+class PlaylistIndex:
+    """
+    Индекс видео плейлиста по номеру (seq): позиции видео, отсортированные
+    по номеру, и префиксные суммы длительностей и количества видео
+    с неизвестной длительностью. Итоги по диапазону номеров считаются
+    двоичным поиском, без обхода видео.
+
+    Диапазоны - пары (start, end) включительно, должны не пересекаться.
+    """
+
+    seqs: list[int]
+    positions: list[int]
+    duration_prefix: list[int]
+    unknown_prefix: list[int]
+
+    @classmethod
+    def get_from(cls, video_list: list[Video | VideoSummary]) -> "PlaylistIndex":
+        # NOTE: Если номера нет, то считаем его по позиции в плейлисте
+        items = sorted(
+            (video.seq if video.seq is not None else i + 1, i)
+            for i, video in enumerate(video_list)
+        )
+
+        duration_prefix = [0]
+        unknown_prefix = [0]
+        for _, i in items:
+            duration_seconds = video_list[i].duration_seconds
+            duration_prefix.append(duration_prefix[-1] + (duration_seconds or 0))
+            unknown_prefix.append(unknown_prefix[-1] + (duration_seconds is None))
+
+        return cls(
+            seqs=[seq for seq, _ in items],
+            positions=[i for _, i in items],
+            duration_prefix=duration_prefix,
+            unknown_prefix=unknown_prefix,
+        )
+
+    def get_slice(self, start: int, end: int) -> slice:
+        return slice(
+            bisect_left(self.seqs, start),
+            bisect_right(self.seqs, end),
+        )
+
+    def get_total(self, ranges: list[tuple[int, int]]) -> tuple[int, int, int]:
+        """
+        Возвращает количество видео, их общую длительность в секундах
+        и количество видео с неизвестной длительностью.
+        """
+
+        count = duration_seconds = unknown_count = 0
+        for start, end in ranges:
+            s = self.get_slice(start, end)
+            count += s.stop - s.start
+            duration_seconds += self.duration_prefix[s.stop] - self.duration_prefix[s.start]
+            unknown_count += self.unknown_prefix[s.stop] - self.unknown_prefix[s.start]
+
+        return count, duration_seconds, unknown_count
+
+    def get_positions(self, ranges: list[tuple[int, int]]) -> list[int]:
+        """Индексы в video_list для видео из диапазонов"""
+
+        positions = []
+        for start, end in ranges:
+            positions += self.positions[self.get_slice(start, end)]
 
-        transcript_items = dpath.util.values(rs_data, "**/transcriptSegmentRenderer")
-        return [TranscriptItem.get_from(item) for item in transcript_items]
+        return positions
 
 
 @dataclass
@@ -618,11 +1505,35 @@ class Playlist:
     id: str
     url: str
     title: str
-    video_list: list[Video] = field(default_factory=list, repr=False)
+    video_list: list[Video | VideoSummary] = field(default_factory=list, repr=False)
     duration_seconds: int | None = None
     duration_text: str | None = None
+    video_count: int | None = None
+    pages: list[PlaylistPage] = field(default_factory=list, repr=False, compare=False)
     context: Context = field(default=None, repr=False, compare=False)
 
+    # NOTE: False, если загружены только первые видео (см. stop_after_seq)
+    is_complete: bool = True
+
+    def to_summary(self) -> "Playlist":
+        """Копия плейлиста без Context и с VideoSummary вместо Video"""
+
+        return replace(
+            self,
+            video_list=[
+                video
+                if isinstance(video, VideoSummary)
+                else VideoSummary.get_from_video(video)
+                for video in self.video_list
+            ],
+            context=None,
+        )
+
+    @cached_property
+    def index(self) -> PlaylistIndex:
+        # NOTE: Строится при первом обращении и живет, пока живет объект
+        return PlaylistIndex.get_from(self.video_list)
+
     @classmethod
     def get_id_from_url(cls, url: str) -> str:
         parsed_url = urlparse(url)
@@ -633,7 +1544,30 @@ class Playlist:
         return urljoin(BASE_URL, f"playlist?list={playlist_id}")
 
     @classmethod
+    def is_mix(cls, playlist_id: str) -> bool:
+        return playlist_id.startswith("RD")
+
+    PATH_TITLE = compile_path("metadata/playlistMetadataRenderer/title")
+    PATH_MIX_TITLE = compile_path(
+        "contents/twoColumnWatchNextResults/playlist/playlist/title"
+    )
+    PATHS_VIDEO_COUNT = [
+        compile_path(
+            "sidebar/playlistSidebarRenderer/items/0/playlistSidebarPrimaryInfoRenderer/stats/0"
+        ),
+        compile_path("header/playlistHeaderRenderer/numVideosText"),
+    ]
+
+    @classmethod
+    @metrics.timed(METRIC_STAGE_SECONDS, stage="playlist_metadata")
     def get_title(cls, yt_initial_data: dict) -> str:
+        # NOTE: Сначала известные пути - поиск через "**" обходит все дерево
+        #       и на больших плейлистах занимает сотни миллисекунд
+        for path in [cls.PATH_TITLE, cls.PATH_MIX_TITLE]:
+            title = get_by_path(yt_initial_data, path, default=None)
+            if isinstance(title, str):
+                return title
+
         try:
             # Playlist
             return dpath.util.get(
@@ -647,7 +1581,33 @@ class Playlist:
                 return dpath.util.get(yt_initial_data, "title/simpleText")
 
     @classmethod
-    def get_from(cls, url_or_id: str) -> "Playlist":
+    @metrics.timed(METRIC_STAGE_SECONDS, stage="playlist_metadata")
+    def get_video_count(cls, yt_initial_data: dict) -> int | None:
+        # NOTE: Количество видео, которое показывает сам ютуб. У миксов его нет
+        for path in cls.PATHS_VIDEO_COUNT:
+            value: dict | None = get_by_path(yt_initial_data, path, default=None)
+            if not isinstance(value, dict):
+                continue
+
+            text = value.get("simpleText") or "".join(
+                run["text"] for run in value.get("runs", [])
+            )
+            m = re.search(r"\d[\d\s,.]*", process_text(text))
+            if m:
+                return int(re.sub(r"\D", "", m.group()))
+
+        return
+
+    @classmethod
+    def get_pagination_guard(
+        cls,
+        playlist_id: str,
+        max_pages: int | None = None,
+    ) -> PaginationGuard:
+        return PaginationGuard.for_playlist(cls.is_mix(playlist_id), max_pages)
+
+    @classmethod
+    def get_id_and_url(cls, url_or_id: str) -> tuple[str, str]:
         if url_or_id.startswith("http"):
             url = url_or_id
             playlist_id = cls.get_id_from_url(url)
@@ -660,33 +1620,516 @@ class Playlist:
             playlist_id = url_or_id
             url = cls.get_url(playlist_id)
 
-        rs, yt_initial_data = load(url)
+        return playlist_id, url
 
-        # NOTE: Оригинальный url может поменяться, лучше брать тот, что будет после запроса
-        url = rs.url
+    @classmethod
+    def get_video_list(
+        cls,
+        url: str,
+        context: Context,
+        video_count: int | None = None,
+        previous: "Playlist | None" = None,
+        stop_after_seq: int | None = None,
+        summary: bool = False,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        deadline: float | None = None,
+        max_pages: int | None = None,
+        is_mix: bool = False,
+    ) -> PlaylistVideoListBuilder:
+        """
+        url - адрес плейлиста (см. load_context), а не context.rs.url:
+        у ответа /youtubei/v1/browse в адресе ключ API
+        """
+
+        yt_cfg_data = get_page_data(context.rs).get_yt_cfg_data()
+
+        builder = PlaylistVideoListBuilder(
+            context, video_count, previous, stop_after_seq, summary, on_progress,
+            max_pages, is_mix,
+        )
 
-        context = Context(
-            yt_initial_data=yt_initial_data,
-            rs=rs,
+        # Первая порция видео будет в самой странице
+        items, next_continuation_item = get_raw_video_renderer_items_and_continuation_item(
+            context.yt_initial_data
         )
+        continuation_item = builder.add_page(None, items, next_continuation_item)
 
-        title = cls.get_title(yt_initial_data)
+        # Подгрузка следующих видео
+        while continuation_item:
+            timeout = get_remaining_seconds(deadline)
+            if timeout is not None and timeout <= 0:
+                builder.is_complete = False
+                break
 
-        total_seconds = 0
-        video_list = []
-        for data_video in get_generator_raw_video_list_from_data(yt_initial_data, rs):
-            video = Video.parse_from(data_video, context)
-            video_list.append(video)
+            try:
+                data = load_continuation(url, yt_cfg_data, continuation_item, timeout)
+            except requests.Timeout:
+                if timeout is None or get_remaining_seconds(deadline) > 0:
+                    raise
+
+                builder.is_complete = False
+                break
 
-            if video.duration_seconds:
-                total_seconds += video.duration_seconds
+            items, next_continuation_item = get_raw_video_renderer_items_and_continuation_item(
+                data
+            )
+            continuation_item = builder.add_page(
+                continuation_item, items, next_continuation_item
+            )
+
+        return builder
+
+    @classmethod
+    def create(
+        cls,
+        playlist_id: str,
+        url: str,
+        context: Context,
+        video_count: int | None,
+        builder: PlaylistVideoListBuilder,
+    ) -> "Playlist":
+        video_list = builder.video_list
+        total_seconds = sum(
+            video.duration_seconds for video in video_list if video.duration_seconds
+        )
 
         return cls(
             id=playlist_id,
             url=url,
-            title=title,
+            title=cls.get_title(context.yt_initial_data),
             video_list=video_list,
             duration_seconds=total_seconds,
             duration_text=seconds_to_str(total_seconds),
+            video_count=video_count,
+            pages=builder.pages,
             context=context,
+            is_complete=builder.is_complete,
+        )
+
+    @classmethod
+    def load_context(cls, url_or_id: str) -> tuple[str, str, Context]:
+        """Загрузка первой порции плейлиста, возвращает id, url и Context"""
+
+        playlist_id, url = cls.get_id_and_url(url_or_id)
+
+        rs, yt_initial_data = None, None
+
+        # NOTE: Миксы через browse не отдаются
+        if not cls.is_mix(playlist_id):
+            try:
+                rs, yt_initial_data = load_browse(url, f"VL{playlist_id}")
+            except InnertubeConfigError:
+                pass
+
+        if not rs:
+            rs, yt_initial_data = load(url)
+
+            # NOTE: Оригинальный url может поменяться, лучше брать тот, что будет после запроса
+            url = rs.url
+
+        context = Context(
+            yt_initial_data=yt_initial_data,
+            rs=rs,
         )
+        return playlist_id, url, context
+
+    @classmethod
+    def iter_videos(
+        cls,
+        url_or_id: str,
+        summary: bool = False,
+        max_pages: int | None = None,
+    ) -> Generator[Video | VideoSummary, None, None]:
+        """
+        Видео плейлиста по мере загрузки порций. Следующая порция
+        запрашивается, только когда закончились видео предыдущей, поэтому
+        после выхода из цикла лишних запросов не будет.
+        """
+
+        playlist_id, url, context = cls.load_context(url_or_id)
+        for _, items in get_generator_raw_pages_from_data(
+            context.yt_initial_data,
+            context.rs,
+            guard=cls.get_pagination_guard(playlist_id, max_pages),
+            url=url,
+        ):
+            for data_video in items:
+                if summary:
+                    yield VideoSummary.parse_from(data_video)
+                else:
+                    yield Video.parse_from(data_video, context)
+
+    @classmethod
+    @metrics.timed(METRIC_STAGE_SECONDS, stage="playlist")
+    def get_from(
+        cls,
+        url_or_id: str,
+        previous: "Playlist | None" = None,
+        stop_after_seq: int | None = None,
+        summary: bool = False,
+        on_progress: Callable[[PlaylistVideoListBuilder], None] | None = None,
+        deadline_seconds: float | None = None,
+        max_pages: int | None = None,
+    ) -> "Playlist":
+        """
+        Если передан stop_after_seq, то видео загрузятся только до этого номера
+        (с точностью до порции) и у плейлиста будет is_complete=False.
+
+        Если передан deadline_seconds, то через столько секунд загрузка
+        остановится и вернется то, что успело загрузиться, с is_complete=False.
+        Сколько всего видео в плейлисте - в video_count.
+
+        max_pages - ограничение на количество порций, по умолчанию MAX_PAGES,
+        а у миксов MIX_MAX_PAGES (см. PlaylistVideoListBuilder).
+
+        С summary=True в video_list будут компактные VideoSummary, а у плейлиста
+        не будет Context - так он занимает в разы меньше памяти.
+
+        on_progress вызывается после каждой загруженной порции видео.
+        """
+
+        deadline = None
+        if deadline_seconds is not None:
+            deadline = time.monotonic() + deadline_seconds
+
+        playlist_id, url, context = cls.load_context(url_or_id)
+        video_count = cls.get_video_count(context.yt_initial_data)
+
+        if previous and previous.id != playlist_id:
+            previous = None
+
+        builder = cls.get_video_list(
+            url, context, video_count, previous, stop_after_seq, summary, on_progress,
+            deadline, max_pages, cls.is_mix(playlist_id),
+        )
+
+        playlist = cls.create(playlist_id, url, context, video_count, builder)
+        if summary:
+            playlist.context = None
+
+        return playlist
+
+
+@dataclass
+class ChannelStats:
+    """
+    Итоги по видео вкладки канала без самих видео, поэтому на десятки тысяч
+    видео память не растет.
+
+    NOTE: Год публикации приблизительный - в списке видео канала ютуб
+          показывает только относительное время, например "3 года назад".
+    """
+
+    id: str
+    url: str
+    title: str
+    video_count: int = 0
+    duration_seconds: int = 0
+    unknown_count: int = 0
+    # Год -> [количество видео, продолжительность в секундах], None - год неизвестен
+    by_year: dict[int | None, list[int]] = field(default_factory=dict)
+    # id самых новых видео: при обновлении загрузка идет только до них
+    newest_ids: list[str] = field(default_factory=list)
+    # Порция, с которой продолжится незавершенная загрузка
+    continuation_item: dict | None = field(default=None, repr=False)
+    loaded_pages: int = 0
+    is_complete: bool = False
+
+    @property
+    def duration_text(self) -> str:
+        return seconds_to_str(self.duration_seconds)
+
+    def add(self, duration_seconds: int | None, year: int | None):
+        self.video_count += 1
+        if not duration_seconds:
+            self.unknown_count += 1
+            duration_seconds = 0
+
+        self.duration_seconds += duration_seconds
+
+        year_stats = self.by_year.setdefault(year, [0, 0])
+        year_stats[0] += 1
+        year_stats[1] += duration_seconds
+
+    def merge(self, other: "ChannelStats"):
+        self.video_count += other.video_count
+        self.duration_seconds += other.duration_seconds
+        self.unknown_count += other.unknown_count
+
+        for year, (count, duration_seconds) in other.by_year.items():
+            year_stats = self.by_year.setdefault(year, [0, 0])
+            year_stats[0] += count
+            year_stats[1] += duration_seconds
+
+
+class ChannelStatsBuilder:
+    """
+    Подсчет ChannelStats по порциям видео. Как и PlaylistVideoListBuilder,
+    сам ничего не загружает: add_page возвращает continuationItemRenderer
+    следующей порции или None, если загружать больше нечего.
+
+    Если передан previous (прошлые полные итоги того же канала), то загрузка
+    остановится на первом видео из previous.newest_ids, а итоги previous
+    добавятся к итогам новых видео.
+
+    NOTE: Удаленные с канала видео так не обнаружить, поэтому итоги стоит
+          периодически считать заново.
+
+    on_progress вызывается после каждой порции, в stats.continuation_item
+    в этот момент - порция для продолжения загрузки.
+
+    Подгрузка ограничена PaginationGuard: не больше max_pages порций за раз
+    (по умолчанию MAX_PAGES) и без повторов токенов. Остановленные так итоги
+    неполные (is_complete=False), после max_pages их можно продолжить
+    с stats.continuation_item.
+    """
+
+    MAX_NEWEST_IDS = 20
+
+    def __init__(
+        self,
+        stats: ChannelStats,
+        previous: ChannelStats | None = None,
+        today: date | None = None,
+        on_progress: Callable[["ChannelStatsBuilder"], None] | None = None,
+        max_pages: int | None = None,
+    ):
+        self.stats = stats
+        self.previous = previous
+        self.today = today or date.today()
+        self.on_progress = on_progress
+        self.guard = PaginationGuard(MAX_PAGES if max_pages is None else max_pages)
+
+        # NOTE: Общее количество видео на вкладке канала неизвестно
+        self.video_count = None
+
+        self._known_ids = set(previous.newest_ids) if previous else set()
+        self._new_ids: list[str] = []
+
+    @property
+    def loaded_pages(self) -> int:
+        return self.stats.loaded_pages
+
+    @property
+    def loaded_videos(self) -> int:
+        return self.stats.video_count
+
+    def add_page(
+        self,
+        items: list[dict],
+        next_continuation_item: dict | None,
+    ) -> dict | None:
+        stats = self.stats
+        items = self.guard.filter_items(items)
+
+        with metrics.timer(METRIC_STAGE_SECONDS, stage="parse_videos"):
+            for data_video in items:
+                # NOTE: Среди рендереров бывают и плейлисты, у них нет videoId
+                video_id = data_video.get("videoId")
+                if not video_id:
+                    continue
+
+                if video_id in self._known_ids:
+                    self._finish_with_previous()
+                    next_continuation_item = None
+                    break
+
+                if len(stats.newest_ids) < self.MAX_NEWEST_IDS:
+                    stats.newest_ids.append(video_id)
+
+                stats.add(
+                    Video.parse_duration_seconds(data_video),
+                    Channel.parse_published_year(data_video, self.today),
+                )
+
+        metrics.inc("youtube_pages_total", help="Playlist pages parsed")
+
+        checked_continuation_item = self.guard.check_next(next_continuation_item)
+
+        stats.loaded_pages += 1
+        # NOTE: После повтора токена продолжать с этой порции бессмысленно
+        if self.guard.stop_reason != "max_pages":
+            stats.continuation_item = checked_continuation_item
+        else:
+            stats.continuation_item = next_continuation_item
+        stats.is_complete = next_continuation_item is None
+        if self.on_progress:
+            self.on_progress(self)
+
+        return checked_continuation_item
+
+    def _finish_with_previous(self):
+        stats = self.stats
+        stats.merge(self.previous)
+
+        # Новые видео, затем самые новые из прошлых итогов
+        for video_id in self.previous.newest_ids:
+            if len(stats.newest_ids) >= self.MAX_NEWEST_IDS:
+                break
+            if video_id not in stats.newest_ids:
+                stats.newest_ids.append(video_id)
+
+
+class Channel:
+    """
+    Вкладки видео и трансляций канала: ссылки youtube.com вида /@handle,
+    /channel/UC..., /c/name, /user/name, в том числе с /videos и /streams
+    на конце. Можно и просто "@handle". Другие вкладки не поддерживаются.
+    """
+
+    TABS = ["videos", "streams"]
+    DEFAULT_TAB = "videos"
+    # NOTE: Без адреса сайта - только "@handle", иначе за канал сошел бы
+    #       и обычный текст вида "c/foo"
+    PATTERN_URL = re.compile(
+        r"^(?:https?://(?:[\w-]+\.)?youtube\.com/"
+        r"(?P<base>@[\w.-]+|(?:channel|c|user)/[\w.-]+)|(?P<handle>@[\w.-]+))"
+        rf"(?:/(?P<tab>{'|'.join(TABS)}))?/?(?:[?#]\S*)?$"
+    )
+
+    PATH_TITLE = compile_path("metadata/channelMetadataRenderer/title")
+    PATH_PUBLISHED_TIME_TEXT = compile_path("publishedTimeText/simpleText")
+
+    # Сколько дней в единице относительного времени публикации (en и ru)
+    PATTERN_PUBLISHED_AGO = re.compile(
+        r"(?P<value>\d+)\s*(?P<unit>year|month|week|day|hour|minute|second"
+        r"|год|лет|месяц|недел|день|дн|час|минут|секунд)",
+        flags=re.IGNORECASE,
+    )
+    UNIT_DAYS = {
+        "year": 365,
+        "год": 365,
+        "лет": 365,
+        "month": 30,
+        "месяц": 30,
+        "week": 7,
+        "недел": 7,
+        "day": 1,
+        "день": 1,
+        "дн": 1,
+    }
+
+    @classmethod
+    def is_url(cls, url_or_handle: str) -> bool:
+        return bool(cls.PATTERN_URL.match(url_or_handle))
+
+    @classmethod
+    def get_id_and_url(cls, url_or_handle: str) -> tuple[str, str]:
+        """
+        id - путь вкладки канала, например "@handle/videos", он же ключ для кэша
+        """
+
+        m = cls.PATTERN_URL.match(url_or_handle)
+        if not m:
+            raise ValueError(f"Invalid channel url: {url_or_handle!r}")
+
+        base = m["base"] or m["handle"]
+
+        # NOTE: Хэндлы не зависят от регистра, а id каналов зависят
+        if base.startswith("@"):
+            base = base.lower()
+
+        tab = m["tab"] or cls.DEFAULT_TAB
+
+        channel_id = f"{base}/{tab}"
+        return channel_id, cls.get_url(channel_id)
+
+    @classmethod
+    def get_url(cls, channel_id: str) -> str:
+        """Ссылка на вкладку по id из get_id_and_url"""
+
+        return urljoin(BASE_URL, channel_id)
+
+    @classmethod
+    def get_title(cls, yt_initial_data: dict) -> str | None:
+        title = get_by_path(yt_initial_data, cls.PATH_TITLE, default=None)
+        return title if isinstance(title, str) else None
+
+    @classmethod
+    def parse_published_year(cls, data_video: dict, today: date) -> int | None:
+        text = get_by_path(data_video, Video.PATH_DATE_TEXT, default=None)
+        if text:
+            try:
+                create_date = parse_date(process_text(text))
+            except ValueError:
+                create_date = None
+
+            if create_date:
+                return create_date.year
+
+        text = get_by_path(data_video, cls.PATH_PUBLISHED_TIME_TEXT, default=None)
+        if not text:
+            return
+
+        m = cls.PATTERN_PUBLISHED_AGO.search(process_text(text))
+        if not m:
+            return
+
+        days = int(m["value"]) * cls.UNIT_DAYS.get(m["unit"].lower(), 0)
+        return (today - timedelta(days=days)).year
+
+    @classmethod
+    def create_stats(
+        cls,
+        channel_id: str,
+        url: str,
+        yt_initial_data: dict,
+        checkpoint: ChannelStats | None = None,
+    ) -> ChannelStats:
+        """Итоги для новой загрузки или checkpoint, если можно продолжить его"""
+
+        if checkpoint and checkpoint.id == channel_id and checkpoint.continuation_item:
+            return checkpoint
+
+        return ChannelStats(
+            id=channel_id,
+            url=url,
+            title=cls.get_title(yt_initial_data) or channel_id,
+        )
+
+    @classmethod
+    @metrics.timed(METRIC_STAGE_SECONDS, stage="channel")
+    def get_stats(
+        cls,
+        url_or_handle: str,
+        previous: ChannelStats | None = None,
+        checkpoint: ChannelStats | None = None,
+        on_progress: Callable[[ChannelStatsBuilder], None] | None = None,
+        max_pages: int | None = None,
+    ) -> ChannelStats:
+        """
+        Итоги по видео вкладки канала. Видео не сохраняются, по каждой порции
+        обновляются только суммы.
+
+        С previous загрузятся только новые видео (см. ChannelStatsBuilder).
+        С checkpoint (незавершенные итоги) загрузка продолжится с его порции.
+        max_pages - ограничение на количество порций, по умолчанию MAX_PAGES.
+        """
+
+        channel_id, url = cls.get_id_and_url(url_or_handle)
+        rs, yt_initial_data = load(url)
+        yt_cfg_data = get_page_data(rs).get_yt_cfg_data()
+
+        stats = cls.create_stats(channel_id, url, yt_initial_data, checkpoint)
+        if stats is checkpoint:
+            previous = None
+
+        builder = ChannelStatsBuilder(
+            stats, previous, on_progress=on_progress, max_pages=max_pages
+        )
+
+        if stats.continuation_item:
+            continuation_item = builder.guard.check_next(stats.continuation_item)
+        else:
+            # Первая порция видео будет в самой странице
+            continuation_item = builder.add_page(
+                *get_raw_video_renderer_items_and_continuation_item(yt_initial_data)
+            )
+
+        while continuation_item:
+            data = load_continuation(url, yt_cfg_data, continuation_item)
+            continuation_item = builder.add_page(
+                *get_raw_video_renderer_items_and_continuation_item(data)
+            )
+
+        return stats
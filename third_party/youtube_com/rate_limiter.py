@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Общий на процесс темп запросов: token bucket со скоростью rate запросов
+    в секунду и запасом burst. Скорость подстраивается по ответам (AIMD):
+    на каждый успешный ответ растет на increase_step, а на 429 и 5xx
+    умножается на decrease_factor.
+
+    Сам не ждет: reserve занимает место в очереди и возвращает, сколько секунд
+    нужно подождать перед запросом - так его можно использовать и с time.sleep,
+    и с asyncio.sleep.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: float = 1,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+        self._rate = rate
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self._rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated_at) * self._rate,
+        )
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            self._refill()
+
+            # NOTE: Отрицательное число токенов - очередь уже занятых запросов
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+
+            return -self._tokens / self._rate
+
+    def feedback(self, status_code: int):
+        with self._lock:
+            self._refill()
+
+            if status_code == 429 or status_code >= 500:
+                self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+
+                # Без запаса, чтобы после ошибки запросы не ушли пачкой
+                self._tokens = min(self._tokens, 0)
+
+            elif status_code < 400:
+                self._rate = min(self.max_rate, self._rate + self.increase_step)
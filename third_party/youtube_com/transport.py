@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+__author__ = "ipetrash"
+
+
+import threading
+import weakref
+
+from typing import Callable
+
+# pip install requests==2.32.2
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from third_party.metrics import registry as metrics
+
+
+# NOTE: 429 здесь не повторяется - на него реагирует RateLimiter
+RETRY_STATUSES = (500, 502, 503, 504)
+
+METRIC_CONNECTIONS = "youtube_connections_total"
+METRIC_RETRIES = "youtube_retries_total"
+
+
+def inc_connections(is_new: bool):
+    metrics.inc(
+        METRIC_CONNECTIONS,
+        help="Requests to YouTube by connection: new or reused from the pool",
+        state="new" if is_new else "reused",
+    )
+
+
+def inc_retries(count: int):
+    metrics.inc(METRIC_RETRIES, count, help="Retried requests to YouTube")
+
+
+class _HTTPAdapter(HTTPAdapter):
+    """HTTPAdapter, у которого повторы можно отключить для запросов текущего потока"""
+
+    def __init__(self, local: threading.local, **kwargs):
+        self._local = local
+        super().__init__(**kwargs)
+
+    @property
+    def max_retries(self) -> Retry:
+        if getattr(self._local, "is_retries_disabled", False):
+            return Retry(0, read=False, raise_on_status=False)
+        return self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value: Retry):
+        self._max_retries = value
+
+
+class Transport:
+    """
+    HTTP для синхронных запросов к ютубу из нескольких потоков.
+
+    Соединения общие: один пул на pool_size соединений к каждому хосту.
+    Его стоит брать по числу потоков (или задач), которые одновременно делают
+    запросы (см. set_pool_size): при меньшем лишние соединения закрываются
+    после запроса, и следующий запрос снова тратит время на TLS.
+    А requests.Session, и вместе с ней куки, у каждого потока своя:
+    cookie jar сессии не рассчитан на одновременные изменения.
+
+    Ошибки соединения и ответы RETRY_STATUSES повторяются до retries раз
+    с паузой backoff_factor * 2 ** (попытка - 1). Если у запроса есть свой
+    срок (см. load_continuation), то повторы стоит отключить через
+    retries=False, иначе запрос может длиться в несколько раз дольше timeout.
+
+    Accept-Encoding - все сжатия, что умеет распаковывать urllib3
+    (br - если установлен brotli).
+    """
+
+    def __init__(
+        self,
+        pool_size: int,
+        retries: int,
+        backoff_factor: float,
+        headers: dict[str, str] | None = None,
+        cookies: dict[str, str] | None = None,
+    ):
+        self.pool_size = pool_size
+
+        self._local = threading.local()
+
+        self.adapter = _HTTPAdapter(
+            self._local,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "POST"]),
+                raise_on_status=False,
+            ),
+        )
+        self.headers = {"Accept-Encoding": ACCEPT_ENCODING} | (headers or dict())
+        self.cookies = dict(cookies or dict())
+
+        # NOTE: Список общий для сессий всех потоков, поэтому добавленный
+        #       позже обработчик сработает и в уже созданных сессиях
+        self.hooks: list[Callable] = [self._on_response]
+
+        # NOTE: Соединения, по которым уже были ответы. По ним видно,
+        #       взято соединение из пула или открыто новое
+        self._connections = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        session: requests.Session | None = getattr(self._local, "session", None)
+        if not session:
+            session = requests.Session()
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            session.headers.update(self.headers)
+            for name, value in self.cookies.items():
+                session.cookies[name] = value
+            session.hooks["response"] = self.hooks
+
+            self._local.session = session
+
+        return session
+
+    def set_pool_size(self, pool_size: int):
+        """Новый размер пула, соединения старого пула закрываются"""
+
+        self.pool_size = pool_size
+        self.adapter.close()
+        self.adapter.init_poolmanager(DEFAULT_POOLSIZE, pool_size)
+
+    def _on_response(self, rs: requests.Response, *args, **kwargs):
+        retries = getattr(rs.raw, "retries", None)
+        if retries and retries.history:
+            inc_retries(len(retries.history))
+
+        connection = getattr(rs.raw, "connection", None)
+        if connection is None:
+            return
+
+        with self._lock:
+            is_new = connection not in self._connections
+            self._connections.add(connection)
+        inc_connections(is_new)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        retries: bool = True,
+        **kwargs,
+    ) -> requests.Response:
+        if retries:
+            return self.session.request(method, url, **kwargs)
+
+        self._local.is_retries_disabled = True
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            self._local.is_retries_disabled = False
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)